@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# fake_github.py - Local stand-in for the parts of the GitHub API that ghrm uses
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+# Settings GitHub only returns for a single repository, not in listings
+FULL_ONLY_FIELDS = (
+    "allow_squash_merge", "allow_merge_commit", "allow_rebase_merge", "allow_auto_merge", "allow_update_branch",
+    "delete_branch_on_merge", "use_squash_pr_title_as_default", "squash_merge_commit_title",
+    "squash_merge_commit_message", "merge_commit_title", "merge_commit_message",
+)
+
+
+def timestamp():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class FakeGitHub:
+    """
+    In-memory state of one or more organizations plus request accounting.
+
+    Serves REST list pagination with Link headers capped at max_per_page,
+    X-RateLimit-* headers for a primary quota per credential that resets
+    every rate_window seconds, GitHub App installation tokens, ETag revalidation (304 responses are free, as on GitHub), an
+    optional secondary rate limit 403 every throttle_every requests, and
+    the GraphQL repository lookups used by GHRM_READ_BACKEND=graphql.
+    """
+
+    def __init__(self, org, latency=0.0, max_per_page=100, rate_limit=1000000, rate_window=3600, throttle_every=0):
+        orgs = [org] if isinstance(org, str) else list(org)
+        # The first organization is the one used when none is named
+        self.org = orgs[0]
+        self.logins = {login.lower(): login for login in orgs}
+        self.latency = latency
+        self.max_per_page = max_per_page
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.throttle_every = throttle_every
+        self.repos = {login.lower(): {} for login in orgs}
+        # Repository names whose deletion is refused, as for a token without admin rights
+        self.protected = set()
+        self.stats = {}
+        self.lock = threading.Lock()
+        self._next_id = 1
+        # Per Authorization header: [window start, quota used, requests]
+        self._quotas = {}
+        self._tokens = 0
+
+    def seed(self, count, prefix="seed"):
+        for org in self.logins.values():
+            for index in range(count):
+                # Alternating topics give selectors something to match
+                self.add_repo(f"{prefix}-{index}", {"topics": ["team-a" if index % 2 == 0 else "team-b"]}, org)
+
+    def add_repo(self, name, attributes, org=None):
+        org = self.logins[(org or self.org).lower()]
+        with self.lock:
+            now = timestamp()
+            self.repos[org.lower()][name.lower()] = {
+                "id": self._next_id, "org": org, "name": name, "attrs": attributes, "labels": {},
+                "created_at": now, "updated_at": now,
+            }
+            self._next_id += 1
+
+    def count(self, key):
+        self.add(key, 1)
+
+    def add(self, key, amount):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def take_quota(self, credential):
+        """
+        Returns (limit, remaining, reset, throttled) after counting one request
+        against the quota of credential, as GitHub counts per user or installation.
+        """
+        with self.lock:
+            now = time.time()
+            quota = self._quotas.setdefault(credential, [now, 0, 0])
+            if now - quota[0] >= self.rate_window:
+                quota[0], quota[1] = now, 0
+            quota[2] += 1
+            throttled = bool(self.throttle_every) and quota[2] % self.throttle_every == 0
+            if quota[1] < self.rate_limit and not throttled:
+                quota[1] += 1
+            remaining = self.rate_limit - quota[1]
+            return self.rate_limit, remaining, int(quota[0] + self.rate_window), throttled
+
+    def installation_id(self, org):
+        return 1000 + list(self.logins).index(org.lower())
+
+    def issue_token(self, installation_id):
+        with self.lock:
+            self._tokens += 1
+            return f"ghs_fake_{installation_id}_{self._tokens}"
+
+    def repo_json(self, repo, base, listing=False):
+        name, org = repo["name"], repo["org"]
+        data = {
+            "id": repo["id"],
+            "node_id": f"R_{repo['id']}",
+            "name": name,
+            "full_name": f"{org}/{name}",
+            "owner": {"login": org, "type": "Organization"},
+            "url": f"{base}/repos/{org}/{name}",
+            "html_url": f"{base}/{org}/{name}",
+            "description": None,
+            "homepage": None,
+            "private": True,
+            "visibility": "private",
+            "fork": False,
+            "archived": False,
+            "has_issues": True,
+            "has_projects": True,
+            "has_wiki": True,
+            "has_discussions": False,
+            "is_template": False,
+            "default_branch": "main",
+            "allow_squash_merge": True,
+            "allow_merge_commit": True,
+            "allow_rebase_merge": True,
+            "allow_auto_merge": False,
+            "delete_branch_on_merge": False,
+            "topics": [],
+            "created_at": repo["created_at"],
+            "updated_at": repo["updated_at"],
+            "pushed_at": repo["created_at"],
+        }
+        data.update(repo["attrs"])
+        if "private" in repo["attrs"] and "visibility" not in repo["attrs"]:
+            data["visibility"] = "private" if repo["attrs"]["private"] else "public"
+        if listing:
+            for field in FULL_ONLY_FIELDS:
+                data.pop(field, None)
+        return data
+
+    def graphql_node(self, repo, base):
+        data = self.repo_json(repo, base)
+        return {
+            "id": data["node_id"],
+            "databaseId": data["id"],
+            "name": data["name"],
+            "nameWithOwner": data["full_name"],
+            "url": data["html_url"],
+            "description": data["description"],
+            "homepageUrl": data["homepage"],
+            "isPrivate": data["private"],
+            "visibility": data["visibility"].upper(),
+            "isFork": data["fork"],
+            "isArchived": data["archived"],
+            "hasIssuesEnabled": data["has_issues"],
+            "hasProjectsEnabled": data["has_projects"],
+            "hasWikiEnabled": data["has_wiki"],
+            "hasDiscussionsEnabled": data["has_discussions"],
+            "isTemplate": data["is_template"],
+            "defaultBranchRef": {"name": data["default_branch"]},
+            "squashMergeAllowed": data["allow_squash_merge"],
+            "mergeCommitAllowed": data["allow_merge_commit"],
+            "rebaseMergeAllowed": data["allow_rebase_merge"],
+            "autoMergeAllowed": data["allow_auto_merge"],
+            "deleteBranchOnMerge": data["delete_branch_on_merge"],
+            "createdAt": data["created_at"],
+            "updatedAt": data["updated_at"],
+            "pushedAt": data["pushed_at"],
+            "repositoryTopics": {"nodes": [{"topic": {"name": topic}} for topic in data["topics"]]},
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Keep-alive clients open few connections
+        self.state.count("connections")
+
+    @property
+    def base(self):
+        return f"http://{self.headers['Host']}"
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def send(self, status, body=None, headers=None, quota=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        headers = dict(headers or {})
+        if status == 200 and self.command == "GET":
+            etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                self.state.count("304")
+                status, data = 304, b""
+        if data and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            data = gzip.compress(data)
+            headers["Content-Encoding"] = "gzip"
+        self.state.add("bytes_sent", len(data))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        if quota is not None:
+            limit, remaining, reset, _ = quota
+            self.send_header("X-RateLimit-Limit", str(limit))
+            self.send_header("X-RateLimit-Remaining", str(remaining))
+            self.send_header("X-RateLimit-Reset", str(reset))
+            self.send_header("X-RateLimit-Resource", "graphql" if self.path.endswith("/graphql") else "core")
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_request(self, verb):
+        state = self.state
+        url = urlparse(self.path)
+        path, query = url.path, parse_qs(url.query)
+        body = self.read_body() if verb in ("POST", "PATCH", "PUT") else None
+
+        if path == "/__stats":
+            with state.lock:
+                stats = dict(state.stats)
+            return self.send(200, stats)
+
+        if state.latency:
+            time.sleep(state.latency)
+        state.count("requests")
+        state.count(f"{verb} " + re.sub(r"^/repos/[^/]+/[^/]+", "/repos/{owner}/{repo}", re.sub(r"/labels/.+$", "/labels/{name}", path)))
+
+        quota = state.take_quota(self.headers.get("Authorization", ""))
+        if quota[3]:
+            state.count("throttled")
+            return self.send(403, {"message": "You have exceeded a secondary rate limit."}, {"Retry-After": "1"}, quota)
+        if quota[1] <= 0:
+            state.count("rate_limited")
+            return self.send(403, {"message": "API rate limit exceeded"}, None, quota)
+
+        if path == "/user":
+            return self.send(200, {"login": "benchmark", "url": f"{self.base}/user"}, None, quota)
+        # GitHub App endpoints; the app's JWT is not verified
+        match = re.match(r"^/orgs/([^/]+)/installation$", path)
+        if match and match.group(1).lower() in state.logins:
+            return self.send(200, {"id": state.installation_id(match.group(1)), "app_id": 1}, None, quota)
+        match = re.match(r"^/app/installations/(\d+)/access_tokens$", path)
+        if match and verb == "POST":
+            expires_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + 3600))
+            return self.send(201, {"token": state.issue_token(match.group(1)), "expires_at": expires_at}, None, quota)
+        match = re.match(r"^/orgs/([^/]+)(/repos)?$", path)
+        if match and match.group(1).lower() in state.logins:
+            org = state.logins[match.group(1).lower()]
+            if match.group(2):
+                return self.list_or_create(verb, query, body, quota, org)
+            with state.lock:
+                total = len(state.repos[org.lower()])
+            return self.send(200, {
+                "login": org,
+                "url": f"{self.base}/orgs/{org}",
+                "public_repos": 0,
+                "total_private_repos": total,
+            }, None, quota)
+        if path == "/graphql" or path.endswith("/api/graphql"):
+            return self.graphql(body, quota)
+
+        match = re.match(r"^/repos/([^/]+)/([^/]+)(/labels(?:/(.+))?|/issues)?$", path)
+        if match and match.group(1).lower() in state.logins:
+            with state.lock:
+                repo = state.repos[match.group(1).lower()].get(unquote(match.group(2)).lower())
+            if repo is None:
+                return self.send(404, {"message": "Not Found"}, None, quota)
+            if match.group(3) == "/issues":
+                # Issues are not modelled; label merges find none to relabel
+                return self.send(200, [], None, quota)
+            if match.group(3):
+                return self.labels(verb, repo, match.group(4), body, quota)
+            return self.repository(verb, repo, body, quota)
+        return self.send(404, {"message": "Not Found"}, None, quota)
+
+    def list_or_create(self, verb, query, body, quota, org):
+        state = self.state
+        org_repos = state.repos[org.lower()]
+        if verb == "POST":
+            name = body.pop("name")
+            with state.lock:
+                exists = name.lower() in org_repos
+            if exists:
+                return self.send(422, {"message": "Repository creation failed."}, None, quota)
+            for key in ("auto_init", "gitignore_template", "license_template", "team_id"):
+                body.pop(key, None)
+            state.add_repo(name, body, org)
+            with state.lock:
+                repo = org_repos[name.lower()]
+            return self.send(201, state.repo_json(repo, self.base), None, quota)
+
+        per_page = min(int(query.get("per_page", ["30"])[0]), state.max_per_page)
+        page = int(query.get("page", ["1"])[0])
+        # Listings can be sorted by activity, newest first by default, as on GitHub
+        sort = {"updated": "updated_at", "pushed": "created_at", "created": "created_at"}.get(query.get("sort", [""])[0])
+        descending = query.get("direction", ["desc"])[0] == "desc"
+        with state.lock:
+            repos = sorted(org_repos.values(), key=lambda repo: repo["id"])
+            if sort:
+                repos.sort(key=lambda repo: repo[sort], reverse=descending)
+        chunk = repos[(page - 1) * per_page:page * per_page]
+        headers = {}
+        if page * per_page < len(repos):
+            last = (len(repos) + per_page - 1) // per_page
+            link = f"{self.base}/orgs/{org}/repos?per_page={per_page}"
+            if sort:
+                link += f"&sort={query['sort'][0]}&direction={'desc' if descending else 'asc'}"
+            headers["Link"] = f'<{link}&page={page + 1}>; rel="next", <{link}&page={last}>; rel="last"'
+        return self.send(200, [state.repo_json(repo, self.base, listing=True) for repo in chunk], headers, quota)
+
+    def repository(self, verb, repo, body, quota):
+        state = self.state
+        if verb == "GET":
+            return self.send(200, state.repo_json(repo, self.base), None, quota)
+        if verb == "PATCH":
+            new_name = body.pop("name", repo["name"])
+            with state.lock:
+                org_repos = state.repos[repo["org"].lower()]
+                repo["attrs"].update(body)
+                repo["updated_at"] = timestamp()
+                if new_name != repo["name"]:
+                    del org_repos[repo["name"].lower()]
+                    repo["name"] = new_name
+                    org_repos[new_name.lower()] = repo
+            return self.send(200, state.repo_json(repo, self.base), None, quota)
+        if verb == "DELETE":
+            if repo["name"].lower() in state.protected:
+                return self.send(403, {"message": "Must have admin rights to Repository."}, None, quota)
+            with state.lock:
+                state.repos[repo["org"].lower()].pop(repo["name"].lower(), None)
+            return self.send(204, None, None, quota)
+        return self.send(404, {"message": "Not Found"}, None, quota)
+
+    def labels(self, verb, repo, name, body, quota):
+        labels = repo["labels"]
+        url = f"{self.base}/repos/{repo['org']}/{repo['name']}/labels"
+
+        def label_json(label):
+            return {**label, "url": f"{url}/{label['name']}"}
+
+        if name is None:
+            if verb == "POST":
+                labels[body["name"].lower()] = {"name": body["name"], "color": body.get("color"),
+                                                "description": body.get("description")}
+                return self.send(201, label_json(labels[body["name"].lower()]), None, quota)
+            return self.send(200, [label_json(label) for label in labels.values()], None, quota)
+
+        label = labels.get(unquote(name).lower())
+        if label is None:
+            return self.send(404, {"message": "Not Found"}, None, quota)
+        if verb == "PATCH":
+            del labels[label["name"].lower()]
+            label["name"] = body.get("new_name", label["name"])
+            label.update({key: body[key] for key in ("color", "description") if key in body})
+            labels[label["name"].lower()] = label
+            return self.send(200, label_json(label), None, quota)
+        if verb == "DELETE":
+            del labels[label["name"].lower()]
+            return self.send(204, None, None, quota)
+        return self.send(200, label_json(label), None, quota)
+
+    def graphql(self, body, quota):
+        state = self.state
+        variables = body.get("variables") or {}
+        if "organization(" in body.get("query", ""):
+            with state.lock:
+                org_repos = state.repos.get(str(variables.get("login")).lower(), {})
+                repos = sorted(org_repos.values(), key=lambda repo: repo["id"])
+            start = int(variables.get("after") or 0)
+            end = start + min(variables.get("first", 100), state.max_per_page)
+            return self.send(200, {"data": {"organization": {"repositories": {
+                "pageInfo": {"hasNextPage": end < len(repos), "endCursor": str(end)},
+                "nodes": [state.graphql_node(repo, self.base) for repo in repos[start:end]],
+            }}}}, None, quota)
+
+        data, errors = {}, []
+        org_repos = state.repos.get(str(variables.get("owner")).lower(), {})
+        for key, name in variables.items():
+            if not re.match(r"^n\d+$", key):
+                continue
+            alias = "r" + key[1:]
+            with state.lock:
+                repo = org_repos.get(name.lower())
+            data[alias] = state.graphql_node(repo, self.base) if repo else None
+            if repo is None:
+                errors.append({"type": "NOT_FOUND", "path": [alias], "message": f"Could not resolve {name}"})
+        response = {"data": data}
+        if errors:
+            response["errors"] = errors
+        return self.send(200, response, None, quota)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PATCH(self):
+        self.handle_request("PATCH")
+
+    def do_PUT(self):
+        self.handle_request("PUT")
+
+    def do_DELETE(self):
+        self.handle_request("DELETE")
+
+
+def serve(state, host="127.0.0.1", port=0):
+    """
+    Returns a started server for state; its URL is http://host:server.server_port.
+    """
+    handler = type("BoundHandler", (Handler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-github", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake GitHub API for ghrm benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    parser.add_argument("--org", default="benchmark", help="Organization, or a comma-separated list of organizations")
+    parser.add_argument("--seed", type=int, default=0, help="Repositories to create in each organization before serving")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request, in milliseconds")
+    parser.add_argument("--max-per-page", type=int, default=100)
+    parser.add_argument("--rate-limit", type=int, default=1000000, help="Primary quota per window")
+    parser.add_argument("--rate-window", type=int, default=3600, help="Primary quota window, in seconds")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with a secondary limit 403")
+    args = parser.parse_args()
+
+    state = FakeGitHub(
+        args.org.split(","),
+        latency=args.latency / 1000,
+        max_per_page=args.max_per_page,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        throttle_every=args.throttle_every
+    )
+    state.seed(args.seed)
+    server = serve(state, args.host, args.port)
+    # The benchmark runner reads the URL from the first line
+    print(f"http://{args.host}:{server.server_port}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# run.py - Offline throughput benchmarks for ghrm against the fake GitHub API
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import urlopen
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), "src")
+
+# Each scenario runs against the org left behind by the previous one
+SCENARIOS = {
+    "create": "create",        # every repository is missing and gets created
+    "reconcile": "create",     # every repository already matches; nothing is written
+    "update": "create",        # every repository gets one setting changed
+    "delete": "delete",        # every repository is deleted
+}
+DEFAULT_SCENARIOS = ["create", "reconcile", "delete"]
+
+
+def org_names(args):
+    return [args.org] if args.orgs == 1 else [f"{args.org}-{index}" for index in range(args.orgs)]
+
+
+def write_config(path, size, description, orgs):
+    # The repositories are split evenly across the organizations, one YAML document each
+    with open(path, "w") as f:
+        for number, org in enumerate(orgs):
+            f.write(f"---\norganization: {org}\nrepositories:\n")
+            for index in range(number, size, len(orgs)):
+                f.write(f"  bench-{index:05d}:\n    description: \"{description} {index}\"\n    private: true\n")
+
+
+def start_server(args, seed):
+    command = [
+        sys.executable, os.path.join(BENCHMARKS_DIR, "fake_github.py"),
+        "--org", ",".join(org_names(args)),
+        "--seed", str(seed),
+        "--latency", str(args.latency),
+        "--max-per-page", str(args.max_per_page),
+        "--rate-limit", str(args.rate_limit),
+        "--rate-window", str(args.rate_window),
+        "--throttle-every", str(args.throttle_every),
+    ]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    url = server.stdout.readline().strip()
+    if not url:
+        server.kill()
+        raise RuntimeError("fake GitHub server did not start")
+    return server, url
+
+
+def server_stats(url):
+    with urlopen(f"{url}/__stats") as response:
+        return json.loads(response.read())
+
+
+def run_ghrm(action, config, env, workers, extra_args):
+    """
+    Runs ghrm and returns (seconds, peak RSS in MiB, exit status).
+    """
+    command = [sys.executable, "-m", "ghrm", action, "--config", config, "--workers", str(workers)] + extra_args
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # wait4 reports the resource usage of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return elapsed, peak, process.returncode
+
+
+def benchmark_size(args, size):
+    results = []
+    server, url = start_server(args, args.org_extra)
+    try:
+        with tempfile.TemporaryDirectory(prefix="ghrm-bench-") as workdir:
+            env = dict(
+                os.environ,
+                GITHUB_API_URL=url,
+                # Each token has a quota of its own on the fake server
+                GITHUB_TOKEN=",".join(f"benchmark-{index}" for index in range(args.tokens)),
+                GITHUB_ORG=org_names(args)[0],
+                GHRM_CACHE_DIR=os.path.join(workdir, "cache"),
+                PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""),
+            )
+            env.pop("SLACK_WEBHOOK_URL", None)
+            env.pop("DISCORD_WEBHOOK_URL", None)
+            if not args.paced:
+                # Measure ghrm itself rather than GitHub's pacing policy
+                env["GHRM_POINTS_PER_MINUTE"] = "1000000000"
+            if args.backend:
+                env["GHRM_READ_BACKEND"] = args.backend
+
+            for scenario in args.scenarios:
+                config = os.path.join(workdir, f"{scenario}.yaml")
+                description = "Updated benchmark repository" if scenario == "update" else "Benchmark repository"
+                write_config(config, size, description, org_names(args))
+                before = server_stats(url)
+                elapsed, peak, status = run_ghrm(SCENARIOS[scenario], config, env, args.workers, args.ghrm_args)
+                after = server_stats(url)
+                requests = after.get("requests", 0) - before.get("requests", 0)
+                calls = {
+                    key: after[key] - before.get(key, 0)
+                    for key in sorted(after)
+                    if key[0].isupper() and after[key] != before.get(key, 0)
+                }
+                results.append({
+                    "size": size,
+                    "scenario": scenario,
+                    "workers": args.workers,
+                    "orgs": args.orgs,
+                    "tokens": args.tokens,
+                    "exit_status": status,
+                    "wall_seconds": round(elapsed, 3),
+                    "requests": requests,
+                    "requests_per_repo": round(requests / size, 3),
+                    "not_modified": after.get("304", 0) - before.get("304", 0),
+                    "peak_rss_mib": round(peak, 1),
+                    "calls": calls,
+                })
+                print(format_row(results[-1]), flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def format_row(result):
+    return (
+        f"{result['size']:>7} {result['scenario']:<10} {result['wall_seconds']:>9.2f} "
+        f"{result['requests']:>9} {result['requests_per_repo']:>9.2f} {result['not_modified']:>7} "
+        f"{result['peak_rss_mib']:>9.1f}" + ("" if result["exit_status"] == 0 else f"  exit {result['exit_status']}")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ghrm against a local fake GitHub API")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Repositories per run (100 to 50000)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=DEFAULT_SCENARIOS)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=20.0, help="Added server latency per request, in milliseconds")
+    parser.add_argument("--max-per-page", type=int, default=100)
+    parser.add_argument("--rate-limit", type=int, default=1000000, help="Primary quota reported by the server")
+    parser.add_argument("--rate-window", type=int, default=3600, help="Primary quota window, in seconds")
+    parser.add_argument("--tokens", type=int, default=1, help="Personal access tokens to pool, each with its own quota")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with a secondary limit 403")
+    parser.add_argument("--org", default="benchmark")
+    parser.add_argument("--orgs", type=int, default=1, help="Spread each run across this many organizations")
+    parser.add_argument("--org-extra", type=int, default=0, help="Unrelated repositories already in each org")
+    parser.add_argument("--backend", choices=["rest", "graphql"], help="GHRM_READ_BACKEND for the runs")
+    parser.add_argument("--paced", action="store_true", help="Keep ghrm's default request pacing")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("ghrm_args", nargs=argparse.REMAINDER, help="Extra ghrm arguments after --")
+    args = parser.parse_args()
+    args.ghrm_args = [arg for arg in args.ghrm_args if arg != "--"]
+
+    print(f"{'repos':>7} {'scenario':<10} {'wall s':>9} {'requests':>9} {'req/repo':>9} {'304s':>7} {'peak MiB':>9}")
+    results = []
+    for size in args.sizes:
+        results.extend(benchmark_size(args, size))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "latency_ms": args.latency,
+                "workers": args.workers,
+                "backend": args.backend or "rest",
+                "paced": args.paced,
+                "results": results,
+            }, f, indent=2)
+    return 1 if any(result["exit_status"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+# auth.py - GitHub credentials: personal tokens, GitHub App installations and credential pools
+
+import hashlib
+import itertools
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from github import Auth, Consts, GithubException, GithubIntegration
+from github.Requester import WithRequester
+from .credentials import auth_cache_ttl_from_env, cached_installation, mark_installation
+from .ratelimit import rate_limiter_from_env
+
+# Installation tokens live for an hour; replace them this long before they expire
+INSTALLATION_TOKEN_REFRESH = timedelta(minutes=5)
+
+# The credential chosen for the request being sent on each thread
+_selected = threading.local()
+
+
+def take_selected():
+    """
+    Returns the Credential a pool chose for this thread's pending request,
+    and clears it, or None when the request was not authenticated by a pool.
+    """
+    credential = getattr(_selected, "credential", None)
+    _selected.credential = None
+    return credential
+
+
+class Credential:
+    """
+    One credential of a pool and the rate limiter pacing its own quota.
+
+    name identifies the credential in logs and metrics without revealing
+    it: "token-<hash prefix>" or "app-<id>/<installation id>".
+    """
+
+    def __init__(self, name, auth, limiter=None):
+        self.name = name
+        self.auth = auth
+        self.limiter = limiter if limiter is not None else rate_limiter_from_env(name)
+        self.pool = None
+
+    def authorization(self):
+        return f"{self.auth.token_type} {self.auth.token}"
+
+
+class InstallationAuth(Auth.AppInstallationAuth):
+    """
+    GitHub App installation auth that refreshes its token well before it
+    expires, and only once when several workers find it stale together.
+    Tokens are kept in memory only.
+    """
+
+    def __init__(self, app_auth, installation_id):
+        super().__init__(app_auth, installation_id)
+        self._lock = threading.Lock()
+        self._authorization = None
+
+    def _stale(self):
+        return self._authorization is None or (
+            self._authorization.expires_at - INSTALLATION_TOKEN_REFRESH < datetime.now(timezone.utc)
+        )
+
+    @property
+    def token(self):
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    self._authorization = self._get_installation_authorization()
+        return self._authorization.token
+
+
+class CredentialPool(Auth.Auth, WithRequester["CredentialPool"]):
+    """
+    Spreads requests across several credentials, each with its own quota.
+
+    Requests go round-robin to credentials that are neither paused after
+    pushback nor running low on their primary quota; when every credential
+    is constrained, the one with the most quota left is used. The transport
+    paces each request with the limiter of the credential it was sent with,
+    so throughput grows with the number of credentials.
+    """
+
+    def __init__(self, credentials):
+        super().__init__()
+        if not credentials:
+            raise ValueError("A credential pool needs at least one credential")
+        self.credentials = list(credentials)
+        for credential in self.credentials:
+            credential.pool = self
+        self._turn = itertools.count()
+        # Shared by every credential of the pool, e.g. to key cached responses
+        self.identity = hashlib.sha256(
+            "\n".join(sorted(credential.name for credential in self.credentials)).encode()
+        ).hexdigest()
+
+    def withRequester(self, requester):
+        super().withRequester(requester)
+        for credential in self.credentials:
+            if isinstance(credential.auth, WithRequester):
+                credential.auth.withRequester(requester)
+        return self
+
+    @property
+    def uses_apps(self):
+        return any(isinstance(credential.auth, Auth.AppInstallationAuth) for credential in self.credentials)
+
+    def select(self):
+        """
+        Returns the credential the next request should use.
+        """
+        start = next(self._turn)
+        count = len(self.credentials)
+        for offset in range(count):
+            credential = self.credentials[(start + offset) % count]
+            if not credential.limiter.is_constrained():
+                return credential
+        return max(self.credentials, key=lambda credential: credential.limiter.headroom())
+
+    @property
+    def token_type(self):
+        return self.credentials[0].auth.token_type
+
+    @property
+    def token(self):
+        return self.credentials[0].auth.token
+
+    def authentication(self, headers):
+        _selected.credential = None
+        credential = self.select()
+        # Resolving an installation token can send a request of its own; pick the credential up afterwards
+        headers["Authorization"] = credential.authorization()
+        _selected.credential = credential
+
+    @property
+    def _masked_token(self):
+        return "(pooled credential removed)"
+
+
+def _token_name(token):
+    return "token-" + hashlib.sha256(token.encode()).hexdigest()[:12]
+
+
+def _app_ids():
+    return [app_id.strip() for app_id in (os.getenv("GITHUB_APP_ID") or "").split(",") if app_id.strip()]
+
+
+def uses_apps_from_env():
+    """
+    Returns True when GitHub Apps are configured through GITHUB_APP_ID.
+    """
+    return bool(_app_ids())
+
+
+def _app_private_keys():
+    # GITHUB_APP_PRIVATE_KEY holds one PEM; GITHUB_APP_PRIVATE_KEY_PATH lists one file per app
+    key = os.getenv("GITHUB_APP_PRIVATE_KEY")
+    if key:
+        return [key.replace("\\n", "\n")]
+    keys = []
+    for path in filter(None, (os.getenv("GITHUB_APP_PRIVATE_KEY_PATH") or "").split(",")):
+        with open(path.strip(), "r", encoding="utf-8") as f:
+            keys.append(f.read())
+    return keys
+
+
+def _app_credentials(org_name, base_url):
+    app_ids = _app_ids()
+    if not app_ids:
+        return []
+    keys = _app_private_keys()
+    if len(keys) != len(app_ids):
+        raise EnvironmentError(
+            "Set GITHUB_APP_PRIVATE_KEY, or one GITHUB_APP_PRIVATE_KEY_PATH file per GITHUB_APP_ID"
+        )
+    installation_id = os.getenv("GITHUB_APP_INSTALLATION_ID")
+    if installation_id and len(app_ids) > 1:
+        raise EnvironmentError("GITHUB_APP_INSTALLATION_ID can only be used with a single GITHUB_APP_ID")
+    if installation_id and not installation_id.isdigit():
+        raise EnvironmentError("GITHUB_APP_INSTALLATION_ID must be a number")
+
+    credentials = []
+    for app_id, key in zip(app_ids, keys):
+        app_auth = Auth.AppAuth(app_id, key)
+        if installation_id:
+            installation = int(installation_id)
+        else:
+            # Each organization has its own installation of the app; looked up once per GHRM_AUTH_CACHE_TTL
+            installation = cached_installation(base_url, app_id, org_name, auth_cache_ttl_from_env())
+        if installation is None:
+            integration = GithubIntegration(auth=app_auth, base_url=base_url)
+            try:
+                installation = integration.get_org_installation(org_name).id
+            except GithubException as e:
+                if e.status == 404:
+                    raise EnvironmentError(f"GitHub App {app_id} is not installed in organization '{org_name}'") from e
+                raise
+            mark_installation(base_url, app_id, org_name, installation)
+        credentials.append(Credential(f"app-{app_id}/{installation}", InstallationAuth(app_auth, installation)))
+    return credentials
+
+
+def credential_pool_from_env(org_name, base_url=Consts.DEFAULT_BASE_URL):
+    """
+    Returns the CredentialPool for an organization.
+
+    GITHUB_TOKEN holds a personal access token, or several separated by
+    commas. GITHUB_APP_ID with GITHUB_APP_PRIVATE_KEY (or
+    GITHUB_APP_PRIVATE_KEY_PATH) adds a GitHub App, authenticated as its
+    installation in the organization; GITHUB_APP_INSTALLATION_ID skips
+    looking the installation up. Several apps can be listed with commas.
+    Every credential configured joins the pool.
+    """
+    tokens = [token.strip() for token in (os.getenv("GITHUB_TOKEN") or "").split(",") if token.strip()]
+    credentials = [Credential(_token_name(token), Auth.Token(token)) for token in tokens]
+    credentials += _app_credentials(org_name, base_url)
+    if not credentials:
+        raise EnvironmentError(
+            "GITHUB_TOKEN environment variable is not set (or configure a GitHub App with GITHUB_APP_ID)"
+        )
+    return CredentialPool(credentials)
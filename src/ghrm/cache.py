@@ -0,0 +1,149 @@
+# cache.py - On-disk cache of GitHub API responses for conditional requests
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+
+DEFAULT_HTTP_CACHE_MAX_MB = 100
+
+
+def cache_dir(*parts):
+    """
+    Returns the ghrm cache directory, creating it if needed.
+
+    GHRM_CACHE_DIR overrides the default of $XDG_CACHE_HOME/ghrm.
+    """
+    root = os.getenv("GHRM_CACHE_DIR") or os.path.join(
+        os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "ghrm"
+    )
+    path = os.path.join(root, *parts)
+    # Cached responses can contain private repository data
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def write_atomic(path, data):
+    """
+    Writes bytes to path so concurrent readers never see a partial file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ResponseCache:
+    """
+    Stores response bodies with their ETag/Last-Modified validators.
+
+    Each entry is one file. Reading an entry bumps its mtime, and when the
+    total size goes over max_bytes the least recently used entries are
+    evicted until the cache is back under 90% of the cap.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def get(self, key):
+        """
+        Returns the cached entry for key, or None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(f.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("key") == key else None
+
+    def put(self, key, etag, last_modified, headers, body):
+        """
+        Stores a response that carries at least one validator.
+        """
+        if not etag and not last_modified:
+            return
+        data = json.dumps({
+            "key": key,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": headers,
+            "body": body,
+        }).encode()
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            previous = os.path.getsize(path)
+        except OSError:
+            previous = 0
+        try:
+            write_atomic(path, data)
+        except OSError as e:
+            print(f"Warning: unable to write HTTP cache entry: {str(e)}", file=sys.stderr)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(data) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.unlink(path)
+                self._size -= size
+            except FileNotFoundError:
+                continue
+
+
+def http_cache_from_env():
+    """
+    Returns the response cache configured through the environment.
+
+    Set GHRM_HTTP_CACHE=0 to disable it and GHRM_HTTP_CACHE_MAX_MB to
+    change the size cap.
+    """
+    if os.getenv("GHRM_HTTP_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    try:
+        max_mb = float(os.getenv("GHRM_HTTP_CACHE_MAX_MB", str(DEFAULT_HTTP_CACHE_MAX_MB)))
+    except ValueError:
+        raise EnvironmentError("GHRM_HTTP_CACHE_MAX_MB must be a number") from None
+    return ResponseCache(cache_dir("http"), int(max_mb * 1024 * 1024))
@@ -2,33 +2,38 @@
 
 import argparse
 import os
-import yaml
+import sys
+import time
 from rich.text import Text
 from dotenv import load_dotenv
 from github import Github, GithubException, Auth
-from .repository import (
-    create_repository,
-    delete_repository
-)
+from .repository import get_connection
 
 from .display import (
     display_result,
-    display_list,
-    display_empty
+    display_empty,
+    display_summary,
+    set_verbose,
+    RecordWriter,
+    RunProgress
 )
+from .labels import load_label_config
+from .snapshot import Snapshot, snapshot_path_from_env
+from .selection import selector_from_args
+from .decommission import DEFAULT_BATCH_SIZE
+from .metrics import metrics
+from .runner import READ_ONLY_ACTIONS, STAGED_ACTIONS, Run, run_snapshot
 
-from .notifications.slack import send_slack_notification
-from .notifications.discord import send_discord_notification
+from .notifications.slack import queue_slack_notification
+from .notifications.discord import queue_discord_notification
+from .notifications.dispatcher import dispatcher
+from .notifications.digest import Digest
 from .__version__ import VERSION
 
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
-def load_config(config_path):
-    with open(config_path, 'r') as file:
-        return yaml.safe_load(file)
-
-def run_cli():
+def build_parser():
     parser = argparse.ArgumentParser(description="GitHub Repository Manager CLI")
 
     parser.add_argument(
@@ -39,152 +44,268 @@ def run_cli():
 
     parser.add_argument(
         "action",
-        choices=["create", "delete"],
+        choices=["create", "delete", "labels", "audit", "snapshot", "decommission"],
         help="Action to perform",
         nargs="?"
     )
 
+    parser.add_argument(
+        "command",
+        choices=["sync"],
+        help="Labels command to perform",
+        nargs="?"
+    )
+
     parser.add_argument(
         "--config",
-        help="Path to YAML config file",
+        help="Path to a YAML config file, a directory of YAML files, or a glob",
         required=False
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of repositories to process concurrently (default: 1)"
+    )
 
-    if args.version:
-        print(f"GitHub Manager CLI Version: {VERSION}")
-        return
+    parser.add_argument(
+        "--notify",
+        choices=["each", "digest"],
+        default="each",
+        help="Send a notification per repository, or one chunked digest at the end of the run (default: each)"
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only process repositories whose config changed since it was last applied"
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip repositories finished by an interrupted or partly failed run of the same action and config"
+    )
+
+    parser.add_argument(
+        "--repos",
+        help="labels sync: repositories config limiting which repositories are synced (default: the whole org)"
+    )
+
+    parser.add_argument(
+        "--org",
+        action="append",
+        help="labels sync, snapshot: organization to process; repeat for several (default: GITHUB_ORG)"
+    )
+
+    parser.add_argument(
+        "--snapshot",
+        help="snapshot: SQLite file to write (default: GHRM_SNAPSHOT_FILE); "
+             "audit: read the organizations from this snapshot instead of GitHub"
+    )
+
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="snapshot: list every repository again instead of only those changed since the last snapshot"
+    )
+
+    parser.add_argument(
+        "--grace-hours",
+        type=float,
+        help="decommission: hours an archived repository is kept before it is deleted "
+             "(default: GHRM_DECOMMISSION_GRACE_HOURS or 168)"
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"decommission: repositories deleted per batch; a batch with failures stops the deletions "
+             f"(default: {DEFAULT_BATCH_SIZE})"
+    )
+
+    parser.add_argument(
+        "--select",
+        action="append",
+        metavar="KEY=VALUE",
+        help="Only process repositories matching name=GLOB, regex=REGEX, topic=TOPIC, "
+             "visibility=public|private|internal or archived=true|false; repeat to combine"
+    )
+
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="labels sync: also delete labels that are not part of the canonical set"
+    )
+
+    parser.add_argument(
+        "--output",
+        choices=["text", "ndjson"],
+        default="text",
+        help="ndjson: stream one JSON record per repository and a final summary to stdout; other output goes to stderr"
+    )
+
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print every step taken for every repository instead of one line per repository"
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        default=os.getenv("GHRM_METRICS_FILE"),
+        help="Write per-endpoint request counts, latencies and rate-limit usage to this file at the end of the run"
+    )
 
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prometheus"],
+        help="Format of --metrics-file (default: prometheus for a .prom file, json otherwise)"
+    )
+
+    return parser
+
+def check_args(parser, args):
+    """
+    Rejects option combinations that do not apply, and returns the --select
+    Selector (or None).
+    """
     if not args.action:
         parser.error("action is required when not using --version")
 
-    if not args.config:
+    if args.action == "snapshot":
+        args.snapshot = args.snapshot or snapshot_path_from_env()
+        if not args.snapshot:
+            parser.error("snapshot requires --snapshot or GHRM_SNAPSHOT_FILE")
+    elif not args.config:
         parser.error("--config is required when performing an action")
 
-    config = load_config(args.config)
-    repos = config.get('repositories', {})
-    description = config.get('description')
+    if args.snapshot and args.action not in ("audit", "snapshot"):
+        parser.error("--snapshot only applies to audit and snapshot")
+
+    if args.org and not (args.action == "snapshot" or (args.action == "labels" and not args.repos)):
+        parser.error(
+            "--org only applies to snapshot and to labels sync without --repos; "
+            "name the organization in the config with `organization` or `org/name` entries"
+        )
+
+    try:
+        cli_selector = selector_from_args(args.select)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.action == "audit" and args.snapshot and not os.path.exists(args.snapshot):
+        parser.error(f"snapshot not found: {args.snapshot}; create it with `ghrm snapshot`")
+
+    if args.action == "labels" and args.command != "sync":
+        parser.error("labels requires a command: sync")
+
+    if args.action != "labels" and args.command is not None:
+        parser.error(f"{args.action} takes no command; `{args.command}` only applies to labels")
+
+    if args.action in READ_ONLY_ACTIONS and (args.incremental or args.resume):
+        parser.error(f"{args.action} reads every repository; --incremental and --resume do not apply")
+
+    if args.action in STAGED_ACTIONS and (args.incremental or args.resume):
+        parser.error(f"{args.action} picks up where the last run stopped; --incremental and --resume do not apply")
+
+    if args.grace_hours is not None and args.grace_hours < 0:
+        parser.error("--grace-hours cannot be negative")
+
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    return cli_selector
+
+def run_cli():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.version:
+        print(f"GitHub Manager CLI Version: {VERSION}")
+        return
+
+    cli_selector = check_args(parser, args)
+
+    digest = Digest(f"GitHub Manager: {args.action}") if args.notify == "digest" else None
 
     def send_notification(action, details, status="success"):
+        if digest is not None:
+            digest.add(action, details, status)
+            return
+        # Posted by a background thread so webhooks never slow down repository operations
         if SLACK_WEBHOOK_URL:
-            send_slack_notification(action, details, status)
+            queue_slack_notification(action, details, status)
         if DISCORD_WEBHOOK_URL:
-            send_discord_notification(action, details, status)
+            queue_discord_notification(action, details, status)
+
+    records = None
+    if args.output == "ndjson":
+        # stdout carries nothing but records; text meant for people goes to stderr
+        records = RecordWriter(sys.stdout)
+        sys.stdout = sys.stderr
+
+    default_org = os.getenv("GITHUB_ORG")
+
+    set_verbose(args.verbose)
+    progress = RunProgress(args.action)
+
+    # An audit of a snapshot runs offline
+    snapshot = Snapshot(args.snapshot) if args.action == "audit" and args.snapshot else None
 
+    # Connect up front so credential errors surface before any work is dispatched
+    if default_org and snapshot is None:
+        get_connection()
+
+    run_error = None
     try:
-        # Handle repository creation based on YAML config
-        if args.action == "create":
-            if isinstance(repos, dict):
-                for repo_name, repo_config in repos.items():
-                    result = create_repository(repo_name, description=repo_config.get('description'), repo_config=repo_config)
-                    if result == "created":
-                        send_notification(
-                            "Repository Created",
-                            {
-                                "Repository": repo_name,
-                                "Description": repo_config.get('description')
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository created: ",
-                                (repo_name, "bold green")
-                            ),
-                            "success"
-                        )
-                    elif result == "updated":
-                        send_notification(
-                            "Repository Updated",
-                            {
-                                "Repository": repo_name,
-                                "Description": repo_config.get('description')
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository updated: ",
-                                (repo_name, "bold blue")
-                            ),
-                            "success"
-                        )
-            elif isinstance(repos, list):
-                for repo_name in repos:
-                    result = create_repository(repo_name, description=description)
-                    if result == "created":
-                        send_notification(
-                            "Repository Created",
-                            {
-                                "Repository": repo_name,
-                                "Description": description
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository created: ",
-                                (repo_name, "bold green")
-                            ),
-                            "success"
-                        )
-                    elif result == "updated":
-                        send_notification(
-                            "Repository Updated",
-                            {
-                                "Repository": repo_name,
-                                "Description": description
-                            },
-                            "success"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository updated: ",
-                                (repo_name, "bold blue")
-                            ),
-                            "success"
-                        )
-
-        # Handle repository deletion based on YAML config
-        elif args.action == "delete":
-            if isinstance(repos, dict):
-                for repo_name in repos.keys():
-                    if delete_repository(repo_name):
-                        send_notification(
-                            "Repository Deleted",
-                            {
-                                "Repository": repo_name
-                            },
-                            "warning"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository deleted: ",
-                                (repo_name, "bold red")
-                            ),
-                            "warning"
-                        )
-            elif isinstance(repos, list):
-                for repo_name in repos:
-                    if delete_repository(repo_name):
-                        send_notification(
-                            "Repository Deleted",
-                            {
-                                "Repository": repo_name
-                            },
-                            "warning"
-                        )
-                        display_result(
-                            Text.assemble(
-                                "GitHub repository deleted: ",
-                                (repo_name, "bold red")
-                            ),
-                            "warning"
-                        )
+        if args.action == "snapshot":
+            run_snapshot(args, args.org or [default_org], records)
+            return
+        labels = None
+        if args.action == "labels":
+            labels = load_label_config(args.config)
+        run = Run(
+            args,
+            progress,
+            send_notification,
+            records=records,
+            labels=labels,
+            snapshot=snapshot,
+            default_org=default_org,
+            cli_selector=cli_selector
+        )
+        with progress:
+            if progress.console.is_terminal and (args.action != "labels" or args.repos):
+                run.count_entries(args.repos or args.config)
+            if args.action != "labels":
+                run.fan_out(run.config_entries())
+            elif args.repos:
+                run.fan_out(run.repos_entries())
+            else:
+                run.fan_out((), args.org or [None])
+
+        if run.resumed:
+            print(f"Skipped {len(run.resumed)} repositories finished by the previous run", file=sys.stderr)
+            metrics.record_result(args.action, "resumed", len(run.resumed))
+        if run.journaled:
+            print(
+                f"Skipped {len(run.journaled)} repositories unchanged since they were last applied", file=sys.stderr
+            )
+            metrics.record_result(args.action, "journaled", len(run.journaled))
+        failed = sum(1 for result in run.results if result.error is not None)
+        if failed:
+            print(f"{failed} repositories failed; rerun with --resume to retry only those", file=sys.stderr)
+        display_summary(args.action, run.results)
 
     except Exception as e:
         error_message = str(e)
+        run_error = error_message
         send_notification(
             "Error Occurred",
             {
@@ -201,5 +322,33 @@ def run_cli():
             "error"
         )
 
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+        if digest is not None:
+            digest.send(SLACK_WEBHOOK_URL, DISCORD_WEBHOOK_URL)
+        dispatcher.flush()
+        if args.metrics_file:
+            try:
+                metrics.write(args.metrics_file, args.metrics_format)
+            except OSError as e:
+                print(f"Warning: unable to write metrics: {str(e)}", file=sys.stderr)
+        # Repositories that failed, including those of organizations that could not be opened
+        failed = progress.counts.get("failed", 0)
+        if records is not None:
+            records.write({
+                "type": "summary",
+                "action": args.action,
+                "total": progress.done,
+                "results": dict(sorted(progress.counts.items())),
+                "failed": failed,
+                "seconds": round(time.monotonic() - progress.started, 3),
+                "error": run_error
+            })
+            sys.stdout = records.stream
+
+    if run_error is not None or failed:
+        sys.exit(1)
+
 if __name__ == "__main__":
     run_cli()
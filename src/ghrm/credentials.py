@@ -0,0 +1,83 @@
+# credentials.py - Caches successful GitHub credential validation and app installation lookups
+
+import hashlib
+import json
+import os
+import time
+from .cache import cache_dir, write_atomic
+
+DEFAULT_AUTH_CACHE_TTL = 3600
+
+
+def auth_cache_ttl_from_env():
+    """
+    Returns how long a successful validation is trusted, in seconds.
+
+    GHRM_AUTH_CACHE_TTL overrides the default of one hour; 0 disables the cache.
+    """
+    try:
+        return max(0, int(os.getenv("GHRM_AUTH_CACHE_TTL", str(DEFAULT_AUTH_CACHE_TTL))))
+    except ValueError:
+        raise EnvironmentError("GHRM_AUTH_CACHE_TTL must be a whole number of seconds") from None
+
+
+def _validation_path(base_url, token, org_name):
+    # Only a hash of the token is ever written to disk
+    digest = hashlib.sha256(f"{base_url}\n{token}\n{org_name}".encode()).hexdigest()
+    return os.path.join(cache_dir("auth"), f"{digest}.json")
+
+
+def _read_record(path, ttl):
+    # Returns the record written less than ttl seconds ago, or None
+    if ttl <= 0:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        validated_at = record["validated_at"]
+        return record if 0 <= time.time() - validated_at < ttl else None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_record(path, **fields):
+    try:
+        write_atomic(path, json.dumps({"validated_at": time.time(), **fields}).encode())
+    except OSError:
+        # The cache only saves round trips; failing to write it is harmless
+        pass
+
+
+def validated_login(base_url, token, org_name, ttl):
+    """
+    Returns the org's login if the token was validated against the org less
+    than ttl seconds ago, or None.
+    """
+    record = _read_record(_validation_path(base_url, token, org_name), ttl)
+    login = record.get("login") if record is not None else None
+    return login if isinstance(login, str) else None
+
+
+def mark_validated(base_url, token, org_name, login):
+    """
+    Records a successful validation of the token against the org, whose
+    login is login.
+    """
+    _write_record(_validation_path(base_url, token, org_name), login=login)
+
+
+def cached_installation(base_url, app_id, org_name, ttl):
+    """
+    Returns the id of the GitHub App's installation in the org if it was
+    looked up less than ttl seconds ago, or None.
+    """
+    record = _read_record(_validation_path(base_url, f"app-{app_id}", org_name), ttl)
+    installation_id = record.get("installation_id") if record is not None else None
+    return installation_id if isinstance(installation_id, int) else None
+
+
+def mark_installation(base_url, app_id, org_name, installation_id):
+    """
+    Records the id of the GitHub App's installation in the org.
+    """
+    _write_record(_validation_path(base_url, f"app-{app_id}", org_name), installation_id=installation_id)
@@ -0,0 +1,121 @@
+# decommission.py - Retires repositories in two phases: archive first, delete after a grace period
+
+import os
+import time
+from .journal import open_journal
+
+DEFAULT_GRACE_HOURS = 168
+DEFAULT_BATCH_SIZE = 50
+
+# Stages recorded per repository
+ARCHIVED = "archived"
+DELETED = "deleted"
+
+
+def grace_hours_from_env():
+    """
+    Returns how long an archived repository is kept before it is deleted.
+
+    GHRM_DECOMMISSION_GRACE_HOURS overrides the default of 168 hours (a week).
+    """
+    try:
+        hours = float(os.getenv("GHRM_DECOMMISSION_GRACE_HOURS", str(DEFAULT_GRACE_HOURS)))
+    except ValueError:
+        raise EnvironmentError("GHRM_DECOMMISSION_GRACE_HOURS must be a number") from None
+    if hours < 0:
+        raise EnvironmentError("GHRM_DECOMMISSION_GRACE_HOURS cannot be negative")
+    return hours
+
+
+class DecommissionState:
+    """
+    Remembers, per repository of one organization, when it was archived
+    for decommissioning and whether it has been deleted, so reruns pick up
+    where the last run stopped. Kept in an ApplyJournal of its own scope,
+    with the stage in place of the config hash.
+    """
+
+    def __init__(self, journal):
+        self.journal = journal
+
+    def archived_at(self, repo_name):
+        """
+        Returns when the repository was archived, or None.
+        """
+        entry = self.journal.get(repo_name)
+        return entry["applied_at"] if entry is not None and entry["hash"] == ARCHIVED else None
+
+    def is_deleted(self, repo_name):
+        entry = self.journal.get(repo_name)
+        return entry is not None and entry["hash"] == DELETED
+
+    def mark_archived(self, repo_name):
+        self.journal.record(repo_name, ARCHIVED)
+
+    def mark_deleted(self, repo_name):
+        self.journal.record(repo_name, DELETED)
+
+    def forget(self, repo_name):
+        self.journal.forget(repo_name)
+
+    def close(self):
+        self.journal.close()
+
+
+def open_state(base_url, org_name):
+    """
+    Returns the decommission state of an organization.
+    """
+    return DecommissionState(open_journal(base_url, org_name, "decommission"))
+
+
+def is_due(archived_at, grace_hours, now=None):
+    """
+    Returns True when a repository archived at archived_at has served its grace period.
+    """
+    return archived_at is not None and (now or time.time()) - archived_at >= grace_hours * 3600
+
+
+def plan_decommission(repo_names, inventory, state, grace_hours, now=None):
+    """
+    Sorts the repositories to decommission by what each one needs, from
+    one listing of the organization and the recorded state.
+
+    Returns a list of (repo_name, stage, repo), where stage is one of:
+
+    - "archive": not archived yet
+    - "delete": archived and past its grace period
+    - "waiting": archived, still within its grace period
+    - "decommissioned": deleted by an earlier run
+    - "missing": not in the organization
+    - "unarchived": archived by an earlier run, then unarchived; it is
+      not deleted, and its state is dropped so the grace period starts
+      over if it stays in the list
+    """
+    plan = []
+    for repo_name in repo_names:
+        if state.is_deleted(repo_name):
+            plan.append((repo_name, "decommissioned", None))
+            continue
+        repo = inventory.get(repo_name)[1]
+        archived_at = state.archived_at(repo_name)
+        if repo is None:
+            stage = "missing"
+        elif archived_at is None:
+            # Archived outside of ghrm counts too; the grace period starts once it is recorded
+            stage = "archive"
+        elif not repo.archived:
+            stage = "unarchived"
+        elif is_due(archived_at, grace_hours, now):
+            stage = "delete"
+        else:
+            stage = "waiting"
+        plan.append((repo_name, stage, repo))
+    return plan
+
+
+def batches(items, size):
+    """
+    Splits items into lists of at most size.
+    """
+    return [items[index:index + size] for index in range(0, len(items), size)]
@@ -1,6 +1,10 @@
 # display.py - Display module for GitHub Manager CLI
 
+import json
+import threading
+import time
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 from rich.style import Style
@@ -9,16 +13,32 @@ from rich.text import Text
 # Initialize Rich console
 console = Console()
 
-def display_result(message, status="success"):
-    # Define styles for different status types
-    styles = {
-        "success": "green",
-        "error": "red",
-        "info": "blue",
-        "warning": "yellow"
-    }
+# Refreshes per second of the live progress view
+PROGRESS_REFRESH_PER_SECOND = 4
+# Seconds between progress lines when output is not a terminal
+PROGRESS_LOG_INTERVAL = 30
+
+_verbose = True
+
+STATUS_STYLES = {
+    "success": "green",
+    "error": "red",
+    "info": "blue",
+    "warning": "yellow"
+}
+
+def set_verbose(enabled):
+    """Turns the per-repository step messages printed by log on or off"""
+    global _verbose
+    _verbose = enabled
 
-    style = styles.get(status, "white")
+def log(message, file=None):
+    """Prints a per-repository step message unless verbosity is off"""
+    if _verbose:
+        print(message, file=file)
+
+def display_result(message, status="success"):
+    style = STATUS_STYLES.get(status, "white")
 
     # Create panel with appropriate styling
     panel = Panel(
@@ -49,3 +69,142 @@ def display_list(title, items, columns):
 def display_empty(message):
     """Display message for empty results"""
     console.print(f"[italic]{message}[/italic]")
+
+def display_summary(action, results):
+    """Display per-outcome totals and failures for a bulk run"""
+    totals = {}
+    failures = []
+    for task_result in results:
+        outcome = "failed" if task_result.error is not None else str(task_result.result).lower()
+        totals[outcome] = totals.get(outcome, 0) + 1
+        if task_result.error is not None:
+            failures.append((task_result.name, str(task_result.error)))
+
+    display_list(
+        f"{action.capitalize()} summary",
+        sorted(totals.items()) + [("total", len(results))],
+        ["Outcome", "Count"]
+    )
+    if failures:
+        display_list("Failures", failures, ["Repository", "Error"])
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class RunProgress:
+    """
+    Reports the progress of a bulk run.
+
+    On a terminal, a single live line shows counts by outcome, throughput
+    and, once the number of repositories is known, the ETA. It is redrawn
+    a few times per second from the aggregated counts, so rendering costs
+    the same for ten repositories as for fifty thousand; only errors are
+    printed above it. Elsewhere (CI logs, pipes), each repository gets one
+    compact line and an aggregated progress line is logged periodically.
+    """
+
+    def __init__(self, action, total=None, output=None):
+        self.action = action
+        self.total = total
+        self.console = output or console
+        self.counts = {}
+        self.done = 0
+        self.processed = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._live = None
+        self._logged_at = self.started
+
+    def __enter__(self):
+        if self.console.is_terminal:
+            self._live = Live(
+                self,
+                console=self.console,
+                refresh_per_second=PROGRESS_REFRESH_PER_SECOND,
+                transient=True
+            )
+            self._live.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+
+    def set_total(self, total):
+        """Sets the number of repositories in the run, once it is known"""
+        self.total = total
+
+    def add_total(self, count):
+        """Adds to the number of repositories in the run, for runs that learn it in parts"""
+        with self._lock:
+            self.total = (self.total or 0) + count
+
+    def add(self, repo_name, outcome, message=None, status="success"):
+        """Counts a finished repository; message is shown for it when not live"""
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+            self.done += 1
+            self.processed += 1
+
+        if self._live is not None:
+            if status == "error":
+                self.console.print(Text.assemble(("✗ ", "bold red"), message or repo_name))
+            return
+
+        line = Text.assemble((f"{outcome:<10}", STATUS_STYLES.get(status, "white")), " ")
+        line.append(message if message is not None else repo_name)
+        self.console.print(line, highlight=False, soft_wrap=True)
+        now = time.monotonic()
+        if now - self._logged_at >= PROGRESS_LOG_INTERVAL:
+            self._logged_at = now
+            self.console.print(self.status_line(), highlight=False, soft_wrap=True)
+
+    def skip(self, outcome):
+        """Counts a repository that was left out of the run without a line of its own"""
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+            self.done += 1
+
+    def status_line(self):
+        """Returns the aggregated progress as one line of text"""
+        with self._lock:
+            done, processed = self.done, self.processed
+            counts = sorted(self.counts.items())
+        elapsed = time.monotonic() - self.started
+        # Skipped repositories cost nothing, so they are left out of the throughput
+        rate = processed / elapsed if elapsed > 0 else 0.0
+
+        line = Text(f"{self.action}: ", style="bold")
+        line.append(f"{done}/{self.total}" if self.total is not None else str(done))
+        for outcome, count in counts:
+            line.append(" · ")
+            line.append(f"{outcome} {count}", style="red" if outcome == "failed" else "")
+        line.append(f" · {rate:.1f}/s · {_duration(elapsed)}")
+        if self.total is not None and rate > 0:
+            line.append(f" · ETA {_duration(max(self.total - done, 0) / rate)}")
+        return line
+
+    def __rich__(self):
+        return self.status_line()
+
+
+class RecordWriter:
+    """
+    Writes one JSON object per line to a stream, flushing each line so
+    consumers can process records while the run is still going.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
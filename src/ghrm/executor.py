@@ -0,0 +1,63 @@
+# executor.py - Runs repository operations on a bounded pool of workers
+
+import itertools
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# seconds is the wall time of the call
+TaskResult = namedtuple("TaskResult", ["index", "name", "result", "error", "seconds"], defaults=(None,))
+
+
+def _run(index, func, name, kwargs):
+    started = time.perf_counter()
+    try:
+        result = func(name, **kwargs)
+    except Exception as e:
+        return TaskResult(index, name, None, e, time.perf_counter() - started)
+    return TaskResult(index, name, result, None, time.perf_counter() - started)
+
+
+def run_tasks(func, items, workers=1, on_result=None):
+    """
+    Calls func(name, **kwargs) for every (name, kwargs) item.
+
+    At most `workers` calls run at once and items are consumed lazily, so
+    the whole item list is never queued up front. Exceptions are captured
+    per item instead of aborting the run. on_result is called from the
+    calling thread as each item finishes. Results are returned in input order.
+    """
+    results = []
+
+    def collect(task_result):
+        results.append(task_result)
+        if on_result:
+            on_result(task_result)
+
+    if workers <= 1:
+        for index, (name, kwargs) in enumerate(items):
+            collect(_run(index, func, name, kwargs))
+        return results
+
+    iterator = enumerate(items)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = set()
+
+        def submit(batch):
+            for index, (name, kwargs) in batch:
+                pending.add(pool.submit(_run, index, func, name, kwargs))
+
+        # Keep a small backlog queued so workers never sit idle between items
+        submit(itertools.islice(iterator, workers * 2))
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                collect(future.result())
+            submit(itertools.islice(iterator, len(done)))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    results.sort(key=lambda task_result: task_result.index)
+    return results
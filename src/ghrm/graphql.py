@@ -0,0 +1,189 @@
+# graphql.py - Batched repository reads through the GitHub GraphQL API
+
+import os
+import sys
+from github import GithubException
+from github.Repository import Repository
+from .inventory import PER_PAGE
+
+# Repositories looked up per aliased query
+BATCH_SIZE = 50
+
+# repo.edit argument -> GraphQL Repository field
+EDIT_FIELDS = {
+    "name": "name",
+    "description": "description",
+    "homepage": "homepageUrl",
+    "private": "isPrivate",
+    "visibility": "visibility",
+    "has_issues": "hasIssuesEnabled",
+    "has_projects": "hasProjectsEnabled",
+    "has_wiki": "hasWikiEnabled",
+    "has_discussions": "hasDiscussionsEnabled",
+    "is_template": "isTemplate",
+    "default_branch": "defaultBranchRef",
+    "allow_squash_merge": "squashMergeAllowed",
+    "allow_merge_commit": "mergeCommitAllowed",
+    "allow_rebase_merge": "rebaseMergeAllowed",
+    "allow_auto_merge": "autoMergeAllowed",
+    "allow_update_branch": "allowUpdateBranch",
+    "allow_forking": "forkingAllowed",
+    "delete_branch_on_merge": "deleteBranchOnMerge",
+    "web_commit_signoff_required": "webCommitSignoffRequired",
+    "use_squash_pr_title_as_default": "squashPrTitleUsedAsDefault",
+    "squash_merge_commit_title": "squashMergeCommitTitle",
+    "squash_merge_commit_message": "squashMergeCommitMessage",
+    "merge_commit_title": "mergeCommitTitle",
+    "merge_commit_message": "mergeCommitMessage",
+    "archived": "isArchived",
+}
+
+# REST attribute -> GraphQL field, for attributes that are not edit arguments
+EXTRA_FIELDS = {
+    "id": "databaseId",
+    "node_id": "id",
+    "full_name": "nameWithOwner",
+    "html_url": "url",
+    "fork": "isFork",
+    "created_at": "createdAt",
+    "updated_at": "updatedAt",
+    "pushed_at": "pushedAt",
+    "topics": "repositoryTopics",
+}
+
+_SELECTIONS = {
+    "defaultBranchRef": "defaultBranchRef { name }",
+    "repositoryTopics": "repositoryTopics(first: 100) { nodes { topic { name } } }",
+}
+
+REPOSITORY_FRAGMENT = "fragment repositorySettings on Repository {\n  %s\n}" % "\n  ".join(
+    _SELECTIONS.get(field, field) for field in list(EDIT_FIELDS.values()) + list(EXTRA_FIELDS.values())
+)
+
+ORGANIZATION_QUERY = """
+query($login: String!, $first: Int!, $after: String) {
+  organization(login: $login) {
+    repositories(first: $first, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes { ...repositorySettings }
+    }
+  }
+}
+""" + REPOSITORY_FRAGMENT
+
+
+def read_backend_from_env():
+    """
+    Returns the backend used for repository reads: "rest" (default) or "graphql".
+
+    Set with GHRM_READ_BACKEND.
+    """
+    backend = os.getenv("GHRM_READ_BACKEND", "rest").strip().lower() or "rest"
+    if backend not in ("rest", "graphql"):
+        raise EnvironmentError("GHRM_READ_BACKEND must be 'rest' or 'graphql'")
+    return backend
+
+
+def rest_attributes(node):
+    """
+    Maps a GraphQL Repository node to the REST attributes of a Repository,
+    which use the same names as the repo.edit arguments.
+    """
+    attributes = {}
+    for key, field in list(EDIT_FIELDS.items()) + list(EXTRA_FIELDS.items()):
+        if field in node:
+            attributes[key] = node[field]
+    if "default_branch" in attributes:
+        branch = attributes["default_branch"]
+        attributes["default_branch"] = branch["name"] if branch else None
+    if attributes.get("visibility"):
+        attributes["visibility"] = attributes["visibility"].lower()
+    if "topics" in attributes:
+        attributes["topics"] = [node["topic"]["name"] for node in (attributes["topics"] or {}).get("nodes") or []]
+    return attributes
+
+
+def batch_query(count):
+    """
+    Returns a query that looks up count repositories of one owner, aliased r0..r{count-1}.
+    """
+    names = ", ".join(f"$n{i}: String!" for i in range(count))
+    lookups = "\n".join(
+        f"  r{i}: repository(owner: $owner, name: $n{i}) {{ ...repositorySettings }}" for i in range(count)
+    )
+    return f"query($owner: String!, {names}) {{\n{lookups}\n}}\n{REPOSITORY_FRAGMENT}"
+
+
+class GraphQLReader:
+    """
+    Reads repository settings for many repositories per request.
+
+    Lookups by name are batched with aliases, BATCH_SIZE repositories per
+    query, and the whole organization is listed with cursor pagination.
+    Results are returned as completed PyGithub Repository objects, so they
+    can be diffed and edited like REST results without further requests.
+    """
+
+    batch_size = BATCH_SIZE
+
+    def __init__(self, github, owner):
+        self.requester = github.requester
+        self.owner = owner
+
+    def _query(self, query, variables):
+        # Not Requester.graphql_query: that raises when any alias is missing
+        _, data = self.requester.requestJsonAndCheck(
+            "POST", self.requester.graphql_url, input={"query": query, "variables": variables}
+        )
+        errors = [error for error in data.get("errors") or [] if error.get("type") != "NOT_FOUND"]
+        if errors:
+            raise GithubException(400, data, None)
+        return data.get("data") or {}
+
+    def _repository(self, node):
+        attributes = rest_attributes(node)
+        attributes["url"] = f"{self.requester.base_url}/repos/{attributes['full_name']}"
+        return Repository(self.requester, {}, attributes, completed=True)
+
+    def fetch(self, names):
+        """
+        Returns {name: Repository or None} for the given repository names.
+        """
+        names = list(dict.fromkeys(names))
+        found = {}
+        for start in range(0, len(names), self.batch_size):
+            batch = names[start:start + self.batch_size]
+            variables = {"owner": self.owner}
+            variables.update({f"n{i}": name for i, name in enumerate(batch)})
+            data = self._query(batch_query(len(batch)), variables)
+            for i, name in enumerate(batch):
+                node = data.get(f"r{i}")
+                found[name] = self._repository(node) if node else None
+        return found
+
+    def list_repositories(self):
+        """
+        Yields every repository in the organization.
+        """
+        after = None
+        while True:
+            data = self._query(ORGANIZATION_QUERY, {"login": self.owner, "first": PER_PAGE, "after": after})
+            organization = data.get("organization")
+            if organization is None:
+                raise GithubException(404, {"message": f"Organization '{self.owner}' not found"}, None)
+            page = organization["repositories"]
+            for node in page["nodes"]:
+                yield self._repository(node)
+            if not page["pageInfo"]["hasNextPage"]:
+                return
+            after = page["pageInfo"]["endCursor"]
+
+
+def graphql_reader_from_env(github, owner):
+    """
+    Returns a GraphQLReader when GHRM_READ_BACKEND=graphql, otherwise None.
+    """
+    if read_backend_from_env() != "graphql":
+        return None
+    print("Reading repositories through the GitHub GraphQL API", file=sys.stderr)
+    return GraphQLReader(github, owner)
@@ -0,0 +1,149 @@
+# inventory.py - In-memory index of an organization's repositories
+
+import math
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .display import log
+
+# Largest page size the GitHub REST API accepts for list endpoints
+PER_PAGE = 100
+
+
+class Inventory:
+    """
+    Name -> repository index built from one paginated listing of the org.
+
+    Until it is loaded every lookup is a miss, and callers fall back to a
+    direct `org.get_repo`. Once the number of direct lookups reaches the
+    number of pages needed to list the whole org, the org is listed once and
+    every further lookup is answered from memory.
+
+    With a reader (see ghrm.graphql) the org is listed through it, and the
+    repositories named in a run can be prefetched in batches up front.
+    """
+
+    def __init__(self, org, reader=None):
+        self.org = org
+        self.reader = reader
+        self._repos = None
+        self._fetched = {}
+        self._batches = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._repos is not None
+
+    def page_count(self):
+        """
+        Number of list requests needed to index the whole organization, or
+        None when the token cannot see its private repository count.
+        """
+        if self.org.total_private_repos is None:
+            return None
+        total = (self.org.public_repos or 0) + self.org.total_private_repos
+        return max(1, math.ceil(total / PER_PAGE))
+
+    def load(self, workers=1):
+        """
+        Lists every repository in the organization and indexes it by name.
+
+        With several workers, the pages of a REST listing are fetched
+        concurrently; GraphQL listings follow a cursor, one page at a time.
+        """
+        with self._lock:
+            self._load(workers)
+
+    def _load(self, workers=1):
+        if self._repos is not None:
+            return
+        print(f"Listing repositories within GitHub {self.org.login}", file=sys.stderr)
+        if self.reader:
+            repos = self.reader.list_repositories()
+        elif workers > 1:
+            repos = self._list_pages(workers)
+        else:
+            repos = self.org.get_repos(type="all")
+        self._repos = {repo.name.lower(): repo for repo in repos}
+        self._fetched = {}
+
+    def _list_pages(self, workers):
+        listing = self.org.get_repos(type="all")
+        pages = self.page_count()
+        # Without a count, pages are read a round of workers at a time until a short one
+        step = 1 if pages is not None else workers
+        with ThreadPoolExecutor(max_workers=min(workers, pages or workers), thread_name_prefix="ghrm-list") as pool:
+            results = list(pool.map(listing.get_page, range(pages or workers)))
+            # The organization can outgrow its counts while it is listed; follow on until a short page
+            while len(results[-1]) == PER_PAGE:
+                results.extend(pool.map(listing.get_page, range(len(results), len(results) + step)))
+        return [repo for page in results for repo in page]
+
+    def repositories(self):
+        """
+        Returns every repository in the organization, listing it if needed.
+        """
+        with self._lock:
+            self._load()
+            return list(self._repos.values())
+
+    def prefetch(self, repo_names):
+        """
+        Looks up repo_names in batches through the reader, or lists the whole
+        org once prefetching would take as many requests. Does nothing without
+        a reader.
+        """
+        if self.reader is None:
+            return
+        with self._lock:
+            if self._repos is not None:
+                return
+            names = [name for name in dict.fromkeys(repo_names) if name.lower() not in self._fetched]
+            if not names:
+                return
+            batches = math.ceil(len(names) / self.reader.batch_size)
+            pages = self.page_count()
+            # Without a count, listing may cost more than any number of batches
+            if pages is not None and self._batches + batches >= pages:
+                self._load()
+                return
+            self._batches += batches
+            log(f"Reading {len(names)} repositories within GitHub {self.org.login}", file=sys.stderr)
+            for name, repo in self.reader.fetch(names).items():
+                self._fetched[name.lower()] = repo
+
+    def get(self, repo_name):
+        """
+        Returns (known, repo).
+
+        known is False when the inventory is not loaded yet and the caller
+        should look the repository up directly. When known is True, repo is
+        None if the repository does not exist in the organization.
+        """
+        with self._lock:
+            if self._repos is None:
+                if repo_name.lower() in self._fetched:
+                    return True, self._fetched[repo_name.lower()]
+                self._misses += 1
+                pages = self.page_count()
+                # Without a count, the listing's cost is unknown and direct lookups stay bounded by the run
+                if pages is None or self._misses <= pages:
+                    return False, None
+                self._load()
+            return True, self._repos.get(repo_name.lower())
+
+    def add(self, repo):
+        with self._lock:
+            if self._repos is not None:
+                self._repos[repo.name.lower()] = repo
+            elif repo.name.lower() in self._fetched:
+                self._fetched[repo.name.lower()] = repo
+
+    def discard(self, repo_name):
+        with self._lock:
+            if self._repos is not None:
+                self._repos.pop(repo_name.lower(), None)
+            elif repo_name.lower() in self._fetched:
+                self._fetched[repo_name.lower()] = None
@@ -0,0 +1,174 @@
+# journal.py - Records the config last applied to each repository
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from .cache import cache_dir, write_atomic
+
+DEFAULT_FULL_REFRESH_HOURS = 24
+
+
+def full_refresh_hours_from_env():
+    """
+    Returns how often an incremental run falls back to a full sweep.
+
+    GHRM_FULL_REFRESH_HOURS overrides the default of 24 hours.
+    """
+    try:
+        hours = float(os.getenv("GHRM_FULL_REFRESH_HOURS", str(DEFAULT_FULL_REFRESH_HOURS)))
+    except ValueError:
+        raise EnvironmentError("GHRM_FULL_REFRESH_HOURS must be a number") from None
+    if hours < 0:
+        raise EnvironmentError("GHRM_FULL_REFRESH_HOURS cannot be negative")
+    return hours
+
+
+def config_hash(action, description, repo_config):
+    """
+    Returns a stable hash of the desired state of one repository.
+    """
+    data = json.dumps([action, description, repo_config], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class ApplyJournal:
+    """
+    Remembers, per repository, the hash of the config last applied
+    successfully and when it was applied, plus when the last full sweep of
+    each config finished. Several configs (e.g. shards) can manage the same
+    organization, and a sweep of one says nothing about the others.
+
+    The journal is an append-only JSON lines file, so a run that dies part
+    way keeps everything it recorded; later lines win when it is read back.
+    It is rewritten compactly once stale lines outnumber live ones. Losing
+    the journal only costs one full sweep.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Finish time of the last full sweep, by config
+        self.full_refresh_at = {}
+        self._entries = {}
+        self._lines = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+                    self._apply(record)
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, record):
+        if "full_refresh_at" in record:
+            self.full_refresh_at[record.get("config")] = record["full_refresh_at"]
+        elif record.get("hash") is None:
+            self._entries.pop(record["repo"], None)
+        else:
+            self._entries[record["repo"]] = {"hash": record["hash"], "applied_at": record["applied_at"]}
+
+    def _append(self, record):
+        with self._lock:
+            self._apply(record)
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._lines += 1
+
+    def get(self, repo_name):
+        """
+        Returns {"hash", "applied_at"} for the repository, or None.
+        """
+        return self._entries.get(repo_name.lower())
+
+    def is_current(self, repo_name, digest):
+        entry = self.get(repo_name)
+        return entry is not None and entry["hash"] == digest
+
+    def refresh_due(self, hours, config=None):
+        """
+        Returns True when the last full sweep of config finished more than hours ago.
+        """
+        full_refresh_at = self.full_refresh_at.get(config)
+        return full_refresh_at is None or time.time() - full_refresh_at >= hours * 3600
+
+    def record(self, repo_name, digest):
+        self._append({"repo": repo_name.lower(), "hash": digest, "applied_at": time.time()})
+
+    def forget(self, repo_name):
+        if self.get(repo_name) is not None:
+            self._append({"repo": repo_name.lower(), "hash": None})
+
+    def mark_full_refresh(self, config=None):
+        self._append({"full_refresh_at": time.time(), "config": config})
+
+    def discard(self):
+        """
+        Deletes the journal file and forgets every entry.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._entries = {}
+            self.full_refresh_at = {}
+            self._lines = 0
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        """
+        Closes the journal, compacting it when most of its lines are stale.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._lines <= 2 * (len(self._entries) + len(self.full_refresh_at)):
+                return
+            lines = [json.dumps({"repo": repo, **entry}) for repo, entry in self._entries.items()]
+            lines += [
+                json.dumps({"full_refresh_at": full_refresh_at, "config": config})
+                for config, full_refresh_at in self.full_refresh_at.items()
+            ]
+            try:
+                write_atomic(self.path, "".join(line + "\n" for line in lines).encode())
+                self._lines = len(lines)
+            except OSError as e:
+                print(f"Warning: unable to compact apply journal: {str(e)}", file=sys.stderr)
+
+
+def open_journal(base_url, org_name, scope="repositories"):
+    """
+    Returns the apply journal for an organization. Actions that manage
+    different state of the same repositories (e.g. labels) use their own scope.
+    """
+    digest = hashlib.sha256(f"{base_url}\n{org_name}\n{scope}".encode()).hexdigest()
+    return ApplyJournal(os.path.join(cache_dir("journal"), f"{digest}.jsonl"))
+
+
+def open_checkpoint(base_url, org_name, action, config_path):
+    """
+    Returns the checkpoint of an action run against a config.
+
+    A checkpoint is a journal scoped to one run: it lists the repositories
+    finished so far, and is discarded once the run completes without failures.
+    """
+    key = f"{base_url}\n{org_name}\n{action}\n{os.path.abspath(config_path)}"
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return ApplyJournal(os.path.join(cache_dir("checkpoints"), f"{digest}.jsonl"))
@@ -0,0 +1,95 @@
+# labels.py - Canonical label definitions and label sync planning
+
+import hashlib
+import json
+from collections import namedtuple
+import yaml
+
+# Color for created labels that do not define one
+DEFAULT_COLOR = "ededed"
+
+CanonicalLabel = namedtuple("CanonicalLabel", ["name", "aliases", "color", "description"])
+
+LabelChange = namedtuple("LabelChange", ["operation", "label", "name", "color", "description"])
+
+
+def _color(value):
+    return str(value).lstrip("#").lower() if value is not None else None
+
+
+def load_label_config(config_file):
+    """
+    Reads the canonical labels from a labels.yaml file.
+
+    Each label maps to a list of aliases, or to a mapping with `aliases`,
+    `color` and `description`. The label name itself is always an alias.
+    """
+    with open(config_file, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    labels = []
+    for name, definition in (config.get("labels") or {}).items():
+        if isinstance(definition, dict):
+            aliases = definition.get("aliases") or []
+            color = _color(definition.get("color"))
+            description = definition.get("description")
+        else:
+            aliases, color, description = definition or [], None, None
+        names = [str(name)] + [str(alias) for alias in aliases]
+        labels.append(CanonicalLabel(str(name), list(dict.fromkeys(names)), color, description))
+    return labels
+
+
+def labels_hash(labels, prune=False):
+    """
+    Returns a stable hash of the label definitions, for the apply journal.
+    """
+    data = json.dumps([[list(label) for label in labels], prune], sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def plan_labels(existing, labels, prune=False):
+    """
+    Returns the LabelChanges that bring a repository's labels to the canonical set.
+
+    A canonical label that is missing is created, or renamed from the first
+    of its aliases found on the repository. Aliases left over once the
+    canonical label exists are merged into it: their issues and pull
+    requests get the canonical label before the alias is deleted, since
+    deleting a label takes it off everything it was on. Labels that are not part of the
+    canonical set are only deleted when prune is True. GitHub compares
+    label names case-insensitively, and so does the plan.
+    """
+    by_name = {}
+    for label in existing:
+        by_name.setdefault(label.name.lower(), label)
+
+    changes = []
+    used = set()
+    for canonical in labels:
+        present = []
+        for alias in canonical.aliases:
+            label = by_name.get(alias.lower())
+            if label is not None and label.name.lower() not in used:
+                present.append(label)
+                used.add(label.name.lower())
+
+        if not present:
+            changes.append(LabelChange(
+                "create", None, canonical.name, canonical.color or DEFAULT_COLOR, canonical.description or ""
+            ))
+            continue
+
+        target = present[0]
+        color = canonical.color or target.color
+        description = canonical.description if canonical.description is not None else target.description
+        if target.name != canonical.name or color != target.color or description != target.description:
+            changes.append(LabelChange("update", target, canonical.name, color, description or ""))
+        for alias in present[1:]:
+            changes.append(LabelChange("merge", alias, canonical.name, None, None))
+
+    if prune:
+        for name, label in by_name.items():
+            if name not in used:
+                changes.append(LabelChange("delete", label, label.name, None, None))
+    return changes
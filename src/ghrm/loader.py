@@ -0,0 +1,282 @@
+# loader.py - Streams repository entries from YAML configuration files
+
+import glob
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from collections import namedtuple
+import yaml
+from yaml.events import (
+    MappingEndEvent,
+    MappingStartEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+    StreamEndEvent
+)
+
+from .cache import cache_dir
+
+YAML_EXTENSIONS = (".yaml", ".yml")
+
+# Bump when the compiled layout or ConfigEntry changes
+COMPILED_FORMAT = 3
+_HASH_CHUNK = 1024 * 1024
+
+# description is the entry's own description, or the file's top-level one for list layouts;
+# org is the organization named by an `org/name` entry or the file's `organization`, if any;
+# selector is the `match` mapping of a `selectors` entry, whose name is None
+ConfigEntry = namedtuple(
+    "ConfigEntry", ["name", "config", "description", "org", "selector"], defaults=(None, None)
+)
+
+
+def config_files(path):
+    """
+    Returns the YAML files a --config value refers to: a file, every YAML
+    file in a directory, or the files matching a glob, in sorted order.
+    """
+    if os.path.isdir(path):
+        files = [
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.endswith(YAML_EXTENSIONS) and os.path.isfile(os.path.join(path, name))
+        ]
+    elif any(char in path for char in "*?["):
+        files = [name for name in glob.glob(path, recursive=True) if os.path.isfile(name)]
+    else:
+        return [path]
+    if not files:
+        raise FileNotFoundError(f"No YAML files found for {path}")
+    return sorted(files)
+
+
+def _construct(loader):
+    return loader.construct_document(loader.compose_node(None, None))
+
+
+def _qualified(name, org):
+    # `org/name` entries name their organization themselves
+    if isinstance(name, str) and "/" in name:
+        org, name = name.split("/", 1)
+    return name, org
+
+
+def _iter_section(loader, description, org):
+    # Yields the entries of a `repositories` value one at a time
+    if loader.check_event(MappingStartEvent):
+        loader.get_event()
+        while not loader.check_event(MappingEndEvent):
+            name, entry_org = _qualified(_construct(loader), org)
+            config = _construct(loader)
+            if config is not None and not isinstance(config, dict):
+                raise yaml.YAMLError(f"Repository `{name}` must be a mapping of settings")
+            yield ConfigEntry(name, config, (config or {}).get("description"), entry_org)
+        loader.get_event()
+    elif loader.check_event(SequenceStartEvent):
+        loader.get_event()
+        while not loader.check_event(SequenceEndEvent):
+            name, entry_org = _qualified(_construct(loader), org)
+            yield ConfigEntry(name, None, description, entry_org)
+        loader.get_event()
+    elif _construct(loader) is not None:
+        raise yaml.YAMLError("`repositories` must be a mapping or a list")
+
+
+def _iter_selectors(loader, org):
+    # Yields the entries of a `selectors` list; each is a repository config with a `match` mapping
+    if not loader.check_event(SequenceStartEvent):
+        if _construct(loader) is not None:
+            raise yaml.YAMLError("`selectors` must be a list")
+        return
+    loader.get_event()
+    while not loader.check_event(SequenceEndEvent):
+        config = _construct(loader)
+        if not isinstance(config, dict) or "match" not in config:
+            raise yaml.YAMLError("Each selector must be a mapping with a `match` key")
+        config = dict(config)
+        match = config.pop("match")
+        yield ConfigEntry(None, config or None, config.get("description"), org, match)
+    loader.get_event()
+
+
+def _iter_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        loader = yaml.SafeLoader(f)
+        try:
+            loader.get_event()
+            while not loader.check_event(StreamEndEvent):
+                loader.get_event()
+                if not loader.check_event(MappingStartEvent):
+                    _construct(loader)
+                else:
+                    loader.get_event()
+                    description = None
+                    org = None
+                    streamed = False
+                    while not loader.check_event(MappingEndEvent):
+                        key = _construct(loader)
+                        if key == "repositories":
+                            yield from _iter_section(loader, description, org)
+                            streamed = True
+                            continue
+                        if key == "selectors":
+                            yield from _iter_selectors(loader, org)
+                            streamed = True
+                            continue
+                        value = _construct(loader)
+                        if key in ("description", "organization"):
+                            if streamed:
+                                print(
+                                    f"Warning: `{key}` after `repositories` in {path} is ignored",
+                                    file=sys.stderr
+                                )
+                            if key == "description":
+                                description = value
+                            else:
+                                org = str(value) if value is not None else None
+                    loader.get_event()
+                loader.get_event()
+                # Anchors are scoped to their document
+                loader.anchors = {}
+        finally:
+            loader.dispose()
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CompiledConfigCache:
+    """
+    Stores the parsed entries of config files in marshal format so later
+    runs skip YAML parsing.
+
+    Entries are keyed by absolute path. A cached file is reused when its
+    mtime and size are unchanged, or otherwise when its content hash still
+    matches, so a fresh checkout of an unchanged file (as in CI) still hits.
+    Entries are written and read one record at a time.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, config_file):
+        key = hashlib.sha256(os.path.abspath(config_file).encode()).hexdigest()
+        return os.path.join(self.directory, key + ".bin")
+
+    def _header(self, stat, digest):
+        return (COMPILED_FORMAT, marshal.version, tuple(sys.version_info[:2]), stat.st_mtime_ns, stat.st_size, digest)
+
+    def _open_valid(self, config_file, stat):
+        # Returns (compiled file positioned after its header or None, content hash if computed)
+        try:
+            f = open(self._path(config_file), "rb")
+        except OSError:
+            return None, None
+        digest = None
+        try:
+            header = marshal.load(f)
+            if header[:3] == self._header(stat, None)[:3]:
+                if header[3:5] == (stat.st_mtime_ns, stat.st_size):
+                    return f, None
+                digest = _file_digest(config_file)
+                if header[5] == digest:
+                    return f, digest
+        except (EOFError, ValueError, TypeError, IndexError):
+            pass
+        f.close()
+        return None, digest
+
+    def is_compiled(self, path):
+        """
+        Returns True when every file of the config at path can be read from
+        the cache, so reading it again costs no YAML parsing.
+        """
+        for config_file in config_files(path):
+            f, _ = self._open_valid(config_file, os.stat(config_file))
+            if f is None:
+                return False
+            f.close()
+        return True
+
+    def iter_file(self, config_file):
+        """
+        Yields the entries of one config file, from the cache when it is valid.
+        """
+        stat = os.stat(config_file)
+        f, digest = self._open_valid(config_file, stat)
+        if f is not None:
+            with f:
+                yield from self._read(f)
+            return
+        yield from self._compile(config_file, stat, digest or _file_digest(config_file))
+
+    def _read(self, f):
+        while True:
+            record = marshal.load(f)
+            if record is None:
+                return
+            yield ConfigEntry(*record)
+
+    def _compile(self, config_file, stat, digest):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        except OSError as e:
+            print(f"Warning: unable to write compiled config cache: {str(e)}", file=sys.stderr)
+            yield from _iter_file(config_file)
+            return
+        f = os.fdopen(fd, "wb")
+        try:
+            marshal.dump(self._header(stat, digest), f)
+            for entry in _iter_file(config_file):
+                if f is not None:
+                    try:
+                        marshal.dump(tuple(entry), f)
+                    except ValueError:
+                        # Values marshal cannot store (e.g. YAML timestamps): parse this file every run
+                        f.close()
+                        f = None
+                yield entry
+            if f is not None:
+                marshal.dump(None, f)
+                f.close()
+                f = None
+                os.replace(tmp_path, self._path(config_file))
+        finally:
+            if f is not None:
+                f.close()
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+def config_cache_from_env():
+    """
+    Returns the compiled config cache, or None when GHRM_CONFIG_CACHE=0.
+    """
+    if os.getenv("GHRM_CONFIG_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return CompiledConfigCache(cache_dir("config"))
+
+
+def iter_config(path, cache=None):
+    """
+    Yields a ConfigEntry for every repository in the config at path.
+
+    Entries are parsed one at a time, so processing can start before the
+    whole config has been read and memory does not grow with its size. A
+    top-level `description`, used by list layouts, and a top-level
+    `organization` apply to the entries that follow them in the same
+    document; an entry named `org/name` targets that organization. A
+    top-level `selectors` list yields one entry per selector, with its
+    `match` mapping as the entry's selector. With a CompiledConfigCache, unchanged
+    files are read from it instead of being parsed.
+    """
+    for config_file in config_files(path):
+        yield from cache.iter_file(config_file) if cache else _iter_file(config_file)
@@ -0,0 +1,241 @@
+# metrics.py - Per-request instrumentation and run metrics export
+
+import json
+import re
+import threading
+import time
+from urllib.parse import urlparse
+from .cache import write_atomic
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path segments that identify objects are replaced so endpoints group together
+_ENDPOINT_PATTERNS = (
+    (re.compile(r"^/api/v3(?=/)"), ""),
+    (re.compile(r"^/repos/[^/]+/[^/]+"), "/repos/{owner}/{repo}"),
+    (re.compile(r"^/orgs/[^/]+"), "/orgs/{org}"),
+    (re.compile(r"^/users/[^/]+"), "/users/{user}"),
+    (re.compile(r"/labels/[^/]+$"), "/labels/{name}"),
+)
+
+
+def endpoint(url):
+    """
+    Returns the templated path of a GitHub API URL, e.g. /repos/{owner}/{repo}.
+    """
+    path = urlparse(url).path or "/"
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe counters for one run.
+
+    Every HTTP attempt is counted per kind ("github" or "webhook"), method,
+    endpoint and status, with a latency histogram per endpoint. Rate-limit
+    headers are tracked per quota resource and credential, so the quota
+    consumed by the run can be reported. Webhook URLs carry secrets, so only their host is kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self._requests = {}
+        self._latency = {}
+        self._quota = {}
+        self._wait = 0.0
+        self._results = {}
+
+    def record_request(self, kind, method, url, status, seconds, headers=None, credential=None):
+        """
+        Records one HTTP attempt; status is None when no response arrived.
+        credential is the pooled Credential the request was sent with, if any.
+        """
+        name = (urlparse(url).hostname or "") if kind == "webhook" else endpoint(url)
+        status = "error" if status is None else str(status)
+        with self._lock:
+            key = (kind, method, name, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.setdefault((kind, method, name), [0] * (len(LATENCY_BUCKETS) + 2))
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+            if headers is not None and kind == "github":
+                self._record_quota(headers, credential.name if credential is not None else "")
+
+    def _record_quota(self, headers, credential):
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset = int(headers["X-RateLimit-Reset"])
+        except (KeyError, TypeError, ValueError):
+            return
+        quota = self._quota.setdefault((headers.get("X-RateLimit-Resource", "core"), credential), {
+            "first_remaining": remaining + 1,
+            "first_reset": reset,
+            "used": 0,
+        })
+        if reset != quota["first_reset"]:
+            # The window rolled over; count what was used in the previous one
+            quota["used"] += max(quota["first_remaining"] - quota["remaining"], 0)
+            quota["first_remaining"], quota["first_reset"] = limit, reset
+        quota.update({"limit": limit, "remaining": remaining, "reset": reset})
+
+    def record_wait(self, seconds):
+        """
+        Records time spent waiting for the rate limiter.
+        """
+        with self._lock:
+            self._wait += seconds
+
+    def record_result(self, action, outcome, count=1):
+        """
+        Counts repositories of a run by outcome, e.g. "created" or "failed".
+        """
+        with self._lock:
+            key = (action, str(outcome).lower())
+            self._results[key] = self._results.get(key, 0) + count
+
+    def snapshot(self):
+        """
+        Returns the metrics as a JSON-serializable dict.
+        """
+        with self._lock:
+            latency = []
+            for (kind, method, name), histogram in sorted(self._latency.items()):
+                count, total = histogram[-2], histogram[-1]
+                buckets = {str(bound): histogram[index] for index, bound in enumerate(LATENCY_BUCKETS)}
+                buckets["+Inf"] = count
+                latency.append({
+                    "kind": kind,
+                    "method": method,
+                    "endpoint": name,
+                    "count": count,
+                    "sum_seconds": round(total, 6),
+                    "mean_seconds": round(total / count, 6) if count else 0.0,
+                    "buckets": buckets,
+                })
+            # Pooled credentials have quotas of their own; rate_limit adds them up
+            rate_limit, by_credential = {}, []
+            for (resource, credential), quota in sorted(self._quota.items()):
+                item = {
+                    "limit": quota["limit"],
+                    "remaining": quota["remaining"],
+                    "reset": quota["reset"],
+                    "used": quota["used"] + max(quota["first_remaining"] - quota["remaining"], 0),
+                }
+                if credential:
+                    by_credential.append({"resource": resource, "credential": credential, **item})
+                total = rate_limit.setdefault(resource, dict(item, limit=0, remaining=0, used=0))
+                total["reset"] = max(total["reset"], item["reset"])
+                for field in ("limit", "remaining", "used"):
+                    total[field] += item[field]
+            return {
+                "started_at": self.started,
+                "duration_seconds": round(time.time() - self.started, 3),
+                "requests": [
+                    {"kind": kind, "method": method, "endpoint": name, "status": status, "count": count}
+                    for (kind, method, name, status), count in sorted(self._requests.items())
+                ],
+                "latency": latency,
+                "rate_limit": rate_limit,
+                "rate_limit_by_credential": by_credential,
+                "rate_limit_wait_seconds": round(self._wait, 3),
+                "results": [
+                    {"action": action, "outcome": outcome, "count": count}
+                    for (action, outcome), count in sorted(self._results.items())
+                ],
+            }
+
+    def prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        data = self.snapshot()
+        lines = [
+            "# HELP ghrm_http_requests_total HTTP requests sent by ghrm, including retries.",
+            "# TYPE ghrm_http_requests_total counter",
+        ]
+        for item in data["requests"]:
+            labels = _labels(kind=item["kind"], method=item["method"], endpoint=item["endpoint"], status=item["status"])
+            lines.append(f"ghrm_http_requests_total{labels} {item['count']}")
+
+        lines += [
+            "# HELP ghrm_http_request_duration_seconds HTTP request latency.",
+            "# TYPE ghrm_http_request_duration_seconds histogram",
+        ]
+        for item in data["latency"]:
+            base = {"kind": item["kind"], "method": item["method"], "endpoint": item["endpoint"]}
+            for bound, count in item["buckets"].items():
+                lines.append(f"ghrm_http_request_duration_seconds_bucket{_labels(**base, le=bound)} {count}")
+            lines.append(f"ghrm_http_request_duration_seconds_sum{_labels(**base)} {item['sum_seconds']}")
+            lines.append(f"ghrm_http_request_duration_seconds_count{_labels(**base)} {item['count']}")
+
+        for name, field, help_text in (
+            ("ghrm_rate_limit_limit", "limit", "Rate limit quota per window."),
+            ("ghrm_rate_limit_remaining", "remaining", "Rate limit quota left at the end of the run."),
+            ("ghrm_rate_limit_used", "used", "Rate limit quota consumed during the run."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for resource, quota in data["rate_limit"].items():
+                lines.append(f"{name}{_labels(resource=resource)} {quota[field]}")
+        if data["rate_limit_by_credential"]:
+            for name, field, help_text in (
+                ("ghrm_credential_rate_limit_limit", "limit", "Rate limit quota per window of one pooled credential."),
+                ("ghrm_credential_rate_limit_remaining", "remaining", "Quota left to one pooled credential."),
+                ("ghrm_credential_rate_limit_used", "used", "Quota consumed through one pooled credential."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+                for quota in data["rate_limit_by_credential"]:
+                    labels = _labels(resource=quota["resource"], credential=quota["credential"])
+                    lines.append(f"{name}{labels} {quota[field]}")
+
+        lines += [
+            "# HELP ghrm_rate_limit_wait_seconds Time spent waiting for the rate limiter.",
+            "# TYPE ghrm_rate_limit_wait_seconds gauge",
+            f"ghrm_rate_limit_wait_seconds {data['rate_limit_wait_seconds']}",
+            "# HELP ghrm_run_repositories Repositories processed by outcome.",
+            "# TYPE ghrm_run_repositories gauge",
+        ]
+        for item in data["results"]:
+            labels = _labels(action=item["action"], outcome=item["outcome"])
+            lines.append(f"ghrm_run_repositories{labels} {item['count']}")
+        lines += [
+            "# HELP ghrm_run_duration_seconds Wall time of the run.",
+            "# TYPE ghrm_run_duration_seconds gauge",
+            f"ghrm_run_duration_seconds {data['duration_seconds']}",
+            "# HELP ghrm_run_started_timestamp_seconds Start of the run.",
+            "# TYPE ghrm_run_started_timestamp_seconds gauge",
+            f"ghrm_run_started_timestamp_seconds {data['started_at']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, output_format=None):
+        """
+        Writes the metrics to path as JSON, or as a Prometheus textfile when
+        output_format is "prometheus" or the path ends in .prom.
+        """
+        if output_format is None:
+            output_format = "prometheus" if path.endswith(".prom") else "json"
+        if output_format == "prometheus":
+            data = self.prometheus()
+        else:
+            data = json.dumps(self.snapshot(), indent=2) + "\n"
+        # Atomic, as the node_exporter textfile collector may read it at any time
+        write_atomic(path, data.encode())
+
+
+metrics = Metrics()
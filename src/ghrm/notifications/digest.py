@@ -0,0 +1,162 @@
+# digest.py - Batches a run's notifications into chunked summary messages
+
+import os
+import threading
+from datetime import datetime, timezone
+from .dispatcher import dispatcher
+from .discord import COLORS
+
+# Slack Block Kit limits for a single message
+# https://api.slack.com/reference/block-kit/blocks
+SLACK_MAX_BLOCKS = 50
+SLACK_MAX_SECTION_TEXT = 3000
+
+# Discord embed limits for a single message
+# https://discord.com/developers/docs/resources/message#embed-object-embed-limits
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_FIELDS = 25
+DISCORD_MAX_FIELD_VALUE = 1024
+DISCORD_MAX_MESSAGE_CHARS = 6000
+
+MAX_LINE_LENGTH = 300
+
+STATUS_ORDER = ("error", "warning", "success", "info")
+
+
+def _line(details):
+    if not isinstance(details, dict):
+        return str(details)
+    line = str(details.get("Repository", ""))
+    if "Error" in details:
+        line = f"{line}: {details['Error']}" if line else str(details["Error"])
+    if len(line) > MAX_LINE_LENGTH:
+        line = line[:MAX_LINE_LENGTH - 1] + "…"
+    return line
+
+
+def _chunks(lines, limit):
+    """
+    Joins lines with newlines into strings of at most limit characters.
+    """
+    chunk = []
+    size = 0
+    for line in lines:
+        if chunk and size + 1 + len(line) > limit:
+            yield "\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + (1 if size else 0)
+    if chunk:
+        yield "\n".join(chunk)
+
+
+class Digest:
+    """
+    Collects notification events for a whole run.
+
+    Events are grouped by title (e.g. "Repository Created") and sent as
+    summary messages that are split to fit Slack's and Discord's message
+    limits, so the number of webhook posts grows with the number of message
+    chunks rather than the number of repositories.
+    """
+
+    def __init__(self, title="GitHub Manager"):
+        self.title = title
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def add(self, action, details, status="success"):
+        with self._lock:
+            group = self._groups.setdefault(action, {"status": status, "lines": []})
+            group["lines"].append(_line(details))
+
+    def _sorted_groups(self):
+        # Errors first, and lines sorted, so the digest does not depend on completion order
+        def rank(item):
+            status = item[1]["status"]
+            return (STATUS_ORDER.index(status) if status in STATUS_ORDER else len(STATUS_ORDER), item[0])
+        return [
+            (action, {"status": group["status"], "lines": sorted(group["lines"])})
+            for action, group in sorted(self._groups.items(), key=rank)
+        ]
+
+    def summary(self):
+        return ", ".join(f"{action}: {len(group['lines'])}" for action, group in self._sorted_groups())
+
+    def slack_payloads(self):
+        """
+        Returns the Slack webhook payloads for the digest.
+        """
+        blocks = [
+            {"type": "header", "text": {"type": "plain_text", "text": self.title[:150]}},
+            {"type": "section", "text": {"type": "mrkdwn", "text": self.summary()[:SLACK_MAX_SECTION_TEXT]}},
+        ]
+        for action, group in self._sorted_groups():
+            heading = f"*{action}* ({len(group['lines'])})\n"
+            for text in _chunks(group["lines"], SLACK_MAX_SECTION_TEXT - len(heading)):
+                blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": heading + text}})
+
+        return [
+            {"text": f"{self.title}: {self.summary()}", "blocks": blocks[start:start + SLACK_MAX_BLOCKS]}
+            for start in range(0, len(blocks), SLACK_MAX_BLOCKS)
+        ]
+
+    def discord_payloads(self):
+        """
+        Returns the Discord webhook payloads for the digest.
+        """
+        timestamp = datetime.now(timezone.utc).isoformat()
+        content = self.summary()[:2000]
+        payloads = []
+        embeds = []
+        size = 0
+
+        def close_message():
+            nonlocal embeds, size
+            if embeds:
+                payloads.append({"content": content, "embeds": embeds})
+            embeds, size = [], 0
+
+        # Greedily pack fields into embeds and embeds into messages while
+        # staying under the per-embed field count, the per-message embed
+        # count and the per-message character budget.
+        for action, group in self._sorted_groups():
+            title = f"{self.title}: {action}"
+            name = f"{action} ({len(group['lines'])})"
+            # Fields of the group's current embed
+            fields = []
+            for value in _chunks(group["lines"], DISCORD_MAX_FIELD_VALUE):
+                field_size = len(name) + len(value)
+                new_embed = not fields or len(fields) == DISCORD_MAX_FIELDS
+                needed = field_size + (len(title) if new_embed else 0)
+                if size + needed > DISCORD_MAX_MESSAGE_CHARS or (new_embed and len(embeds) == DISCORD_MAX_EMBEDS):
+                    close_message()
+                    new_embed = True
+                    needed = field_size + len(title)
+                if new_embed:
+                    fields = []
+                    embeds.append({
+                        "title": title,
+                        "color": COLORS.get(group["status"], COLORS["info"]),
+                        "timestamp": timestamp,
+                        "fields": fields,
+                    })
+                fields.append({"name": name, "value": value, "inline": False})
+                size += needed
+        close_message()
+        return payloads
+
+    def send(self, slack_webhook_url=None, discord_webhook_url=None):
+        """
+        Queues the digest on the background dispatcher for each configured webhook.
+        """
+        if not self._groups:
+            return
+        slack_webhook_url = slack_webhook_url or os.getenv("SLACK_WEBHOOK_URL")
+        discord_webhook_url = discord_webhook_url or os.getenv("DISCORD_WEBHOOK_URL")
+        if slack_webhook_url:
+            for payload in self.slack_payloads():
+                dispatcher.submit(slack_webhook_url, payload)
+        if discord_webhook_url:
+            for payload in self.discord_payloads():
+                dispatcher.submit(discord_webhook_url, payload)
@@ -1,12 +1,35 @@
 # discord.py - Sends notifications to Discord channels
 
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 import requests
 from rich.console import Console
+from .dispatcher import dispatcher, post_webhook
 
 console = Console()
 
+# Define colors for different statuses
+COLORS = {
+    "success": 0x00ff00,  # Green
+    "warning": 0xffff00,  # Yellow
+    "error": 0xff0000,    # Red
+    "info": 0x0000ff     # Blue
+}
+
+def build_embed(title, description, color=0x00ff00, fields=None):
+    """
+    Builds a Discord embed
+    color: Discord color code (default: green)
+    fields: List of dicts with name and value pairs
+    """
+    return {
+        "title": title,
+        "description": description,
+        "color": color,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "fields": fields or []
+    }
+
 class DiscordNotifier:
     def __init__(self):
         self.webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
@@ -22,39 +45,18 @@ class DiscordNotifier:
         if not self.webhook_url:
             return
 
-        embed = {
-            "title": title,
-            "description": description,
-            "color": color,
-            "timestamp": datetime.utcnow().isoformat(),
-            "fields": fields or []
-        }
-
         data = {
-            "embeds": [embed]
+            "embeds": [build_embed(title, description, color, fields)]
         }
 
         try:
-            response = requests.post(
-                self.webhook_url,
-                json=data
-            )
+            response = post_webhook(self.webhook_url, data)
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             console.print(f"[bold red]Failed to send Discord notification: {str(e)}[/bold red]")
 
-def send_discord_notification(action, details, status="success"):
-    """Helper function to create and send notifications"""
-    notifier = DiscordNotifier()
-
-    # Define colors for different statuses
-    colors = {
-        "success": 0x00ff00,  # Green
-        "warning": 0xffff00,  # Yellow
-        "error": 0xff0000,    # Red
-        "info": 0x0000ff     # Blue
-    }
-
+def build_discord_embed(action, details, status="success"):
+    """Builds the embed for a GitHub Manager notification"""
     # Create fields based on details
     fields = []
     if isinstance(details, dict):
@@ -63,9 +65,28 @@ def send_discord_notification(action, details, status="success"):
             for key, value in details.items()
         ]
 
-    notifier.send_discord_notification(
+    return build_embed(
         title=f"GitHub Manager: {action}",
         description=str(details) if not isinstance(details, dict) else None,
-        color=colors.get(status, 0x00ff00),
+        color=COLORS.get(status, 0x00ff00),
         fields=fields if fields else None
     )
+
+def send_discord_notification(action, details, status="success"):
+    """Helper function to create and send notifications"""
+    notifier = DiscordNotifier()
+    embed = build_discord_embed(action, details, status)
+
+    notifier.send_discord_notification(
+        title=embed["title"],
+        description=embed["description"],
+        color=embed["color"],
+        fields=embed["fields"] or None
+    )
+
+def queue_discord_notification(action, details, status="success"):
+    """Queues a notification on the background dispatcher"""
+    webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
+    if not webhook_url:
+        return
+    dispatcher.submit(webhook_url, {"embeds": [build_discord_embed(action, details, status)]})
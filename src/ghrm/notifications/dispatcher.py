@@ -0,0 +1,119 @@
+# dispatcher.py - Posts webhook notifications from a background thread
+
+import atexit
+import queue
+import random
+import threading
+import time
+import requests
+from rich.console import Console
+from ..metrics import metrics
+from .. import transport
+
+console = Console(stderr=True)
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_MAX_RETRIES = 3
+
+
+def _retry_delay(response, attempt):
+    if response is not None and response.status_code == 429:
+        try:
+            return float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            pass
+    return random.uniform(0, 2 ** attempt)
+
+
+def post_webhook(webhook_url, payload, max_retries=DEFAULT_MAX_RETRIES, timeout=None):
+    """
+    Posts a JSON payload to a webhook through the shared transport's
+    keep-alive session for its host, retrying throttled and failed posts.
+    Returns the last response; raises the last connection error.
+    """
+    session = transport.session_for(webhook_url)
+    timeout = timeout if timeout is not None else transport.request_timeout()
+    for attempt in range(max_retries + 1):
+        response = None
+        started = time.perf_counter()
+        try:
+            response = session.post(webhook_url, json=payload, timeout=timeout)
+            metrics.record_request("webhook", "POST", webhook_url, response.status_code, time.perf_counter() - started)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            metrics.record_request("webhook", "POST", webhook_url, None, time.perf_counter() - started)
+            if attempt >= max_retries:
+                raise
+        if attempt < max_retries:
+            time.sleep(_retry_delay(response, attempt))
+    return response
+
+
+class NotificationDispatcher:
+    """
+    Sends notifications from background threads so slow webhooks never
+    hold up repository operations.
+
+    Each webhook gets its own worker, so messages to one channel keep their
+    order and a slow channel does not delay the others. Buffers are bounded:
+    when one is full, submit waits briefly and then drops the notification
+    with a warning. Pending notifications are flushed when the process exits.
+    """
+
+    def __init__(self, max_queue=DEFAULT_QUEUE_SIZE, max_retries=DEFAULT_MAX_RETRIES):
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _queue_for(self, webhook_url):
+        with self._lock:
+            pending = self._queues.get(webhook_url)
+            if pending is None:
+                if not self._queues:
+                    atexit.register(self.flush)
+                pending = queue.Queue(maxsize=self.max_queue)
+                self._queues[webhook_url] = pending
+                threading.Thread(
+                    target=self._run,
+                    args=(webhook_url, pending),
+                    name="ghrm-notifications",
+                    daemon=True
+                ).start()
+            return pending
+
+    def _run(self, webhook_url, pending):
+        while True:
+            payload = pending.get()
+            try:
+                response = post_webhook(webhook_url, payload, self.max_retries)
+                if response.status_code >= 400:
+                    console.print(
+                        f"[bold red]Failed to send notification. Status code: {response.status_code}[/bold red]"
+                    )
+            except requests.exceptions.RequestException as e:
+                console.print(f"[bold red]Failed to send notification: {str(e)}[/bold red]")
+            finally:
+                pending.task_done()
+
+    def submit(self, webhook_url, payload, timeout=5):
+        """
+        Queues a payload to be posted to webhook_url.
+        """
+        try:
+            self._queue_for(webhook_url).put(payload, timeout=timeout)
+        except queue.Full:
+            console.print("[bold red]Notification buffer is full; dropping notification.[/bold red]")
+
+    def flush(self):
+        """
+        Blocks until every queued notification has been sent.
+        """
+        with self._lock:
+            pending_queues = list(self._queues.values())
+        for pending in pending_queues:
+            pending.join()
+
+
+dispatcher = NotificationDispatcher()
@@ -1,28 +1,24 @@
 # slack.py - Sends notifications to Slack channels
 
 import os
-import requests
 from rich.console import Console
 from rich.markdown import Markdown
+from .dispatcher import dispatcher, post_webhook
 
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 console = Console()
 
-def send_slack_notification(title, details, status="info"):
+def build_slack_payload(title, details, status="info"):
     """
-    Sends a notification message to a Slack channel using a webhook.
+    Builds the Slack webhook payload for a notification.
     Args:
         title (str): The title of the message.
         details (dict or str): The details of the message.
         status (str): The status of the message (info, success, warning, error).
 
     Returns:
-        response: Response object from the Slack API request.
+        dict: JSON payload for the Slack webhook.
     """
-    if not SLACK_WEBHOOK_URL:
-        console.print("[bold red]Error: SLACK_WEBHOOK_URL is not configured.[/bold red]")
-        return None
-
     # Define colors for different statuses
     colors = {
         "success": "#36a64f",  # Green
@@ -38,7 +34,7 @@ def send_slack_notification(title, details, status="info"):
         details_str = details
 
     markdown_message = f"*{title}*\n{details_str}"
-    payload = {
+    return {
         "attachments": [
             {
                 "color": colors.get(status, "#0000ff"),
@@ -47,7 +43,22 @@ def send_slack_notification(title, details, status="info"):
         ]
     }
 
-    response = requests.post(SLACK_WEBHOOK_URL, json=payload)
+def send_slack_notification(title, details, status="info"):
+    """
+    Sends a notification message to a Slack channel using a webhook.
+    Args:
+        title (str): The title of the message.
+        details (dict or str): The details of the message.
+        status (str): The status of the message (info, success, warning, error).
+
+    Returns:
+        response: Response object from the Slack API request.
+    """
+    if not SLACK_WEBHOOK_URL:
+        console.print("[bold red]Error: SLACK_WEBHOOK_URL is not configured.[/bold red]")
+        return None
+
+    response = post_webhook(SLACK_WEBHOOK_URL, build_slack_payload(title, details, status))
 
     if response.status_code == 200:
         console.print("[bold green]Notification sent successfully.[/bold green]")
@@ -55,6 +66,18 @@ def send_slack_notification(title, details, status="info"):
         console.print(f"[bold red]Failed to send notification. Status code: {response.status_code}[/bold red]")
     return response
 
+def queue_slack_notification(title, details, status="info"):
+    """
+    Queues a Slack notification on the background dispatcher.
+    Args:
+        title (str): The title of the message.
+        details (dict or str): The details of the message.
+        status (str): The status of the message (info, success, warning, error).
+    """
+    if not SLACK_WEBHOOK_URL:
+        return
+    dispatcher.submit(SLACK_WEBHOOK_URL, build_slack_payload(title, details, status))
+
 def format_recommendations_for_notification(recommendations):
     """
     Formats recommendations as a message for notifications.
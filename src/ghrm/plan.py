@@ -0,0 +1,91 @@
+# plan.py - Compares desired repository settings with the live repository
+
+# Arguments accepted by org.create_repo but not by repo.edit
+CREATE_ONLY_ARGS = ("auto_init", "gitignore_template", "license_template")
+
+# repo.edit argument -> attribute of a fetched Repository
+EDIT_ATTRIBUTES = {
+    "name": "name",
+    "description": "description",
+    "homepage": "homepage",
+    "private": "private",
+    "visibility": "visibility",
+    "has_issues": "has_issues",
+    "has_projects": "has_projects",
+    "has_wiki": "has_wiki",
+    "has_discussions": "has_discussions",
+    "is_template": "is_template",
+    "default_branch": "default_branch",
+    "allow_squash_merge": "allow_squash_merge",
+    "allow_merge_commit": "allow_merge_commit",
+    "allow_rebase_merge": "allow_rebase_merge",
+    "allow_auto_merge": "allow_auto_merge",
+    "allow_update_branch": "allow_update_branch",
+    "allow_forking": "allow_forking",
+    "delete_branch_on_merge": "delete_branch_on_merge",
+    "web_commit_signoff_required": "web_commit_signoff_required",
+    "use_squash_pr_title_as_default": "use_squash_pr_title_as_default",
+    "squash_merge_commit_title": "squash_merge_commit_title",
+    "squash_merge_commit_message": "squash_merge_commit_message",
+    "merge_commit_title": "merge_commit_title",
+    "merge_commit_message": "merge_commit_message",
+    "archived": "archived",
+}
+
+# GitHub returns these as null or "" interchangeably when unset
+_EMPTY_AS_NONE = ("description", "homepage")
+
+
+def edit_args(repo_config):
+    """
+    Returns a copy of repo_config without the create-only arguments.
+    """
+    return {key: value for key, value in repo_config.items() if key not in CREATE_ONLY_ARGS}
+
+
+def _normalize(key, value):
+    if key in _EMPTY_AS_NONE and value == "":
+        return None
+    return value
+
+
+def _has_attribute(repo, attribute):
+    # A PyGithub Repository answers every attribute, fetching itself in full for
+    # those its listing data lacks; only what it already holds counts as known
+    raw_data = getattr(repo, "_rawData", None)
+    if raw_data is not None:
+        return attribute in raw_data
+    return hasattr(repo, attribute)
+
+
+def missing_attributes(repo, repo_config):
+    """
+    Returns the configured settings that the repository object cannot
+    answer without another request. Organization listings leave out the
+    merge settings, for example.
+    """
+    return sorted(
+        EDIT_ATTRIBUTES[key] for key in edit_args(repo_config)
+        if key in EDIT_ATTRIBUTES and not _has_attribute(repo, EDIT_ATTRIBUTES[key])
+    )
+
+
+def diff_repository(repo, repo_config, uncomparable=True):
+    """
+    Returns the repo.edit arguments whose desired value differs from the repository.
+
+    Arguments without a known repository attribute, or whose attribute the
+    repository object does not hold (e.g. merge settings of a listed
+    repository, or one read back from a snapshot), cannot be compared and
+    are included unless uncomparable is False. Comparing never sends a
+    request. An empty result means the repository is up to date.
+    """
+    changes = {}
+    for key, value in edit_args(repo_config).items():
+        attribute = EDIT_ATTRIBUTES.get(key)
+        if attribute is None or not _has_attribute(repo, attribute):
+            if uncomparable:
+                changes[key] = value
+        elif _normalize(key, getattr(repo, attribute)) != _normalize(key, value):
+            changes[key] = value
+    return changes
@@ -0,0 +1,236 @@
+# ratelimit.py - Paces GitHub API requests and backs off when GitHub pushes back
+
+import os
+import random
+import sys
+import threading
+import time
+
+# GitHub's secondary limit for REST: 900 points per minute, where reads
+# cost 1 point and writes cost 5.
+# https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api
+DEFAULT_POINTS_PER_MINUTE = 900
+READ_POINTS = 1
+WRITE_POINTS = 5
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Start spreading the remaining primary quota over the time left until the
+# reset once less than this share of it is left
+LOW_QUOTA_RATIO = 0.1
+
+# Pushback cuts the pacing rate by BACKOFF_FACTOR, never below MIN_RATE_RATIO
+# of the ceiling; every successful request wins back RECOVERY_RATIO of it
+BACKOFF_FACTOR = 0.7
+MIN_RATE_RATIO = 0.2
+RECOVERY_RATIO = 0.02
+
+DEFAULT_MAX_RETRIES = 6
+BASE_DELAY = 1.0
+MAX_DELAY = 120.0
+
+
+def request_points(verb, url):
+    """
+    Returns the secondary rate limit cost of a request.
+    """
+    if verb in READ_METHODS or url.split("?", 1)[0].endswith("/graphql"):
+        return READ_POINTS
+    return WRITE_POINTS
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers that find it empty reserve their
+    tokens anyway and sleep until the reservation is covered, so waiting
+    callers are served in arrival order.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, cost):
+        """
+        Takes cost tokens and returns how long the caller must wait before using them.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= cost
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+
+class RateLimiter:
+    """
+    Schedules every request sent through the transport.
+
+    Requests are paced by a token bucket sized to the secondary rate limit.
+    The primary limit is tracked from the X-RateLimit-* response headers; when
+    the remaining quota runs low, requests are spread over the time left
+    until the reset. When GitHub answers with a rate-limit 403/429 all
+    workers pause for Retry-After (or an exponential backoff with jitter),
+    and the pacing rate is cut, then recovers gradually on success.
+    """
+
+    def __init__(self, points_per_minute=DEFAULT_POINTS_PER_MINUTE, max_retries=DEFAULT_MAX_RETRIES, name=None):
+        self.name = name
+        self.max_rate = points_per_minute / 60
+        self.max_retries = max_retries
+        self._points = TokenBucket(self.max_rate, self.max_rate * 5)
+        self._requests = None
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+    def _sleep_until(self, deadline):
+        delay = deadline - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def acquire(self, verb, url):
+        """
+        Blocks until the request may be sent.
+        """
+        self._sleep_until(self._paused_until)
+        delay = self._points.reserve(request_points(verb, url))
+        requests_bucket = self._requests
+        if requests_bucket is not None:
+            delay = max(delay, requests_bucket.reserve(1))
+        if delay > 0:
+            time.sleep(delay)
+
+    def is_constrained(self):
+        """
+        Returns True while requests are paused after pushback or are being
+        spread over what is left of a low primary quota.
+        """
+        return time.time() < self._paused_until or self._requests is not None
+
+    def headroom(self):
+        """
+        Returns a score of how freely requests can be sent right now: the
+        share of the primary quota left, or 0 while paused.
+        """
+        if time.time() < self._paused_until:
+            return 0.0
+        if not self.limit or self.remaining is None:
+            return 1.0
+        return self.remaining / self.limit
+
+    def _pause(self, seconds, reason):
+        """
+        Pauses all requests for seconds. Returns False when requests were
+        already paused, so one burst of pushback counts as a single event.
+        """
+        with self._lock:
+            now = time.time()
+            already_paused = now < self._paused_until
+            self._paused_until = max(self._paused_until, now + seconds)
+        if not already_paused:
+            scope = f" for {self.name}" if self.name else ""
+            print(f"GitHub {reason}{scope}; pausing requests for {seconds:.1f}s", file=sys.stderr)
+        return not already_paused
+
+    def _update_quota(self, headers):
+        # GraphQL, search etc. have quotas of their own; pacing follows the core REST quota
+        if headers.get("X-RateLimit-Resource", "core") != "core":
+            return
+        try:
+            limit = int(float(headers["X-RateLimit-Limit"]))
+            remaining = int(float(headers["X-RateLimit-Remaining"]))
+            reset = int(float(headers["X-RateLimit-Reset"]))
+        except (KeyError, TypeError, ValueError):
+            return
+        self.limit, self.remaining, self.reset = limit, remaining, reset
+
+        seconds_left = max(reset - time.time(), 1.0)
+        if remaining > limit * LOW_QUOTA_RATIO:
+            self._requests = None
+            return
+        rate = max(remaining, 1) / seconds_left
+        if self._requests is None:
+            self._requests = TokenBucket(rate, 1)
+        else:
+            self._requests.set_rate(rate)
+
+    def _backoff(self, attempt):
+        # Full jitter: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+    def _pushback_delay(self, status, headers, body, attempt):
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return float(retry_after) + random.uniform(0, 1)
+            except ValueError:
+                pass
+        if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            try:
+                return max(float(headers["X-RateLimit-Reset"]) - time.time(), 0) + random.uniform(1, 3)
+            except ValueError:
+                pass
+        if status == 429 or "rate limit" in body.lower():
+            # Secondary limits without Retry-After: wait at least a minute
+            return max(60.0, BASE_DELAY * 2 ** attempt) + random.uniform(0, 5)
+        return None
+
+    def observe(self, verb, status, headers, body, attempt):
+        """
+        Records a response and returns how long to wait before retrying
+        the request, or None when the response should be returned as is.
+        """
+        self._update_quota(headers)
+
+        if status in (403, 429):
+            delay = self._pushback_delay(status, headers, body, attempt)
+            if delay is None or attempt >= self.max_retries:
+                return None
+            if self._pause(delay, "rate limit reached"):
+                self._points.set_rate(max(self._points.rate * BACKOFF_FACTOR, self.max_rate * MIN_RATE_RATIO))
+            return 0.0
+
+        if status >= 500 and verb != "POST" and attempt < self.max_retries:
+            return self._backoff(attempt)
+
+        if self._points.rate < self.max_rate:
+            self._points.set_rate(min(self.max_rate, self._points.rate + self.max_rate * RECOVERY_RATIO))
+        return None
+
+    def retry_after_error(self, verb, attempt, sent=True):
+        """
+        Returns how long to wait before retrying a request that got no
+        response, or None when it should not be retried. A write that may
+        have been sent is never retried, since GitHub may have applied it.
+        """
+        if (sent and verb not in READ_METHODS) or attempt >= self.max_retries:
+            return None
+        return self._backoff(attempt)
+
+
+def rate_limiter_from_env(name=None):
+    """
+    Returns the rate limiter configured through the environment, named
+    after the credential it paces, if any.
+
+    GHRM_POINTS_PER_MINUTE sets the pacing ceiling (default 900).
+    """
+    try:
+        points_per_minute = float(os.getenv("GHRM_POINTS_PER_MINUTE", str(DEFAULT_POINTS_PER_MINUTE)))
+    except ValueError:
+        raise EnvironmentError("GHRM_POINTS_PER_MINUTE must be a number") from None
+    if points_per_minute <= 0:
+        raise EnvironmentError("GHRM_POINTS_PER_MINUTE must be greater than zero")
+    return RateLimiter(points_per_minute, name=name)
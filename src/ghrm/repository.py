@@ -2,25 +2,62 @@
 
 import os
 import sys
+import threading
 import yaml
-from github import Github, GithubException, Auth
+from github import Github, GithubException, Consts
+from github.Organization import Organization
+from . import transport
+from .cache import http_cache_from_env
+from .ratelimit import rate_limiter_from_env
+from .inventory import Inventory, PER_PAGE
+from .plan import diff_repository, missing_attributes
+from .loader import iter_config, config_cache_from_env
+from .labels import plan_labels
+from .graphql import graphql_reader_from_env
+from .credentials import auth_cache_ttl_from_env, mark_validated, validated_login
+from .auth import credential_pool_from_env, uses_apps_from_env
+from .display import log
 
-def initialize_github():
+def _open_client(org_name):
     """
-    Initialize GitHub connection.
+    Creates a GitHub client authenticated by the credential pool configured
+    for an organization (see ghrm.auth).
     """
-    try:
-        github_token = os.getenv("GITHUB_TOKEN")
-        github_org = os.getenv("GITHUB_ORG")
+    global _transport_installed
 
-        if not github_token:
-            raise EnvironmentError("GITHUB_TOKEN environment variable is not set")
-        if not github_org:
-            raise EnvironmentError("GITHUB_ORG environment variable is not set")
+    if not _transport_installed:
+        transport.install(http_cache_from_env(), rate_limiter_from_env())
+        _transport_installed = True
+    base_url = os.getenv("GITHUB_API_URL") or Consts.DEFAULT_BASE_URL
+    # Pacing and retries are handled by the transport's rate limiters
+    return Github(
+        base_url=base_url,
+        auth=credential_pool_from_env(org_name, base_url),
+        per_page=PER_PAGE,
+        # Read timeout unless GHRM_HTTP_TIMEOUT is set; PyGithub's default is 15 seconds
+        timeout=transport.DEFAULT_READ_TIMEOUT,
+        retry=None,
+        seconds_between_requests=None,
+        seconds_between_writes=None
+    )
+
+def _open_organization(g, org_name, env_hint=""):
+    """
+    Returns the organization, validating the token's access to it unless
+    that was done recently (see GHRM_AUTH_CACHE_TTL), in which case the
+    organization is built from the login recorded then, and only fetched
+    once attributes beyond its login and URL are read.
+    """
+    global _user_checked
 
-        auth = Auth.Token(github_token)
-        g = Github(auth=auth)
+    pool = g.requester.auth
+    base_url = g.requester.base_url
+    login = validated_login(base_url, pool.identity, org_name, auth_cache_ttl_from_env())
+    if login is not None:
+        return Organization(g.requester, {}, {"login": login, "url": f"{base_url}/orgs/{login}"}, completed=False)
 
+    # App installations cannot read /user; their token exchange already proved the app's key
+    if not _user_checked and not pool.uses_apps:
         try:
             # Test the authentication
             g.get_user().login
@@ -30,78 +67,161 @@ def initialize_github():
                     "Invalid GitHub token. Please check your GITHUB_TOKEN environment variable."
                 ) from e
             raise
+        _user_checked = True
 
-        try:
-            org = g.get_organization(github_org)
-            # Test organization access
-            org.login
-            return g, org
-        except GithubException as e:
-            if e.status == 404:
-                raise EnvironmentError(
-                    f"Organization '{github_org}' not found. Please check your GITHUB_ORG environment variable."
-                ) from e
-            if e.status == 403:
-                raise EnvironmentError(
-                    f"No access to organization '{github_org}'. Please check your permissions."
-                ) from e
-            raise
+    try:
+        # Fetching the organization tests access to it
+        org = g.get_organization(org_name)
+        mark_validated(base_url, pool.identity, org_name, org.login)
+        return org
+    except GithubException as e:
+        if e.status == 404:
+            raise EnvironmentError(f"Organization '{org_name}' not found.{env_hint}") from e
+        if e.status == 403:
+            raise EnvironmentError(
+                f"No access to organization '{org_name}'. Please check your permissions."
+            ) from e
+        raise
+
+def initialize_github():
+    """
+    Initialize GitHub connection.
+
+    A token/org pair that was validated recently (see GHRM_AUTH_CACHE_TTL)
+    is trusted without the validation round trips, and the organization is
+    then only fetched once its details are read.
+    """
+    try:
+        github_org = os.getenv("GITHUB_ORG")
+        if not github_org:
+            raise EnvironmentError("GITHUB_ORG environment variable is not set")
+        g = _client(github_org)
+        return g, _open_organization(g, github_org, " Please check your GITHUB_ORG environment variable.")
 
     except Exception as e:
         print(f"Error initializing GitHub connection: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
-# Initialize GitHub connection
-try:
-    g, org = initialize_github()
-except Exception as e:
-    print(f"Failed to initialize: {str(e)}", file=sys.stderr)
-    sys.exit(1)
+# GitHub connection, opened on first use so importing this module stays offline
+_transport_installed = False
+_github = None
+_org = None
+_inventory = None
+_user_checked = False
+# Organizations other than GITHUB_ORG, by lowercased login: (github, org, inventory)
+_organizations = {}
+# Clients by lowercased organization login when GitHub Apps are configured
+_clients = {}
+_connection_lock = threading.Lock()
+
+def _client(org_name):
+    """
+    Returns the client for an organization. Personal access tokens serve
+    every organization from one shared client; a GitHub App authenticates as
+    its installation in each organization, so each one gets its own client.
+    """
+    global _github
+
+    if uses_apps_from_env():
+        if org_name.lower() not in _clients:
+            _clients[org_name.lower()] = _open_client(org_name)
+        return _clients[org_name.lower()]
+    if _github is None:
+        _github = _open_client(org_name)
+    return _github
+
+def get_connection(org_name=None):
+    """
+    Returns (github, org, inventory), initializing the connection on first use.
 
-def get_repo(repo_name):
+    Without org_name, the organization is GITHUB_ORG. Every organization
+    gets its own inventory, and shares one client unless GitHub Apps are
+    configured (see _client); an organization is
+    validated once per process. Errors opening an organization other than
+    GITHUB_ORG are raised rather than exiting, so other organizations can
+    carry on.
     """
-    Fetches a repo from GitHub organization.
+    global _github, _org, _inventory
+
+    default_org = os.getenv("GITHUB_ORG")
+    if org_name is None or (default_org and org_name.lower() == default_org.lower()):
+        if _org is None:
+            with _connection_lock:
+                if _org is None:
+                    _github, org = initialize_github()
+                    # Answers existence checks from one org listing once that is cheaper
+                    _inventory = Inventory(org, reader=graphql_reader_from_env(_github, default_org))
+                    _org = org
+        return _github, _org, _inventory
+
+    connection = _organizations.get(org_name.lower())
+    if connection is None:
+        with _connection_lock:
+            connection = _organizations.get(org_name.lower())
+            if connection is None:
+                g = _client(org_name)
+                org = _open_organization(g, org_name)
+                connection = (g, org, Inventory(org, reader=graphql_reader_from_env(g, org_name)))
+                _organizations[org_name.lower()] = connection
+    return connection
+
+def __getattr__(name):
+    # Keeps `repository.g`, `repository.org` and `repository.inventory` working without connecting at import
+    if name in ("g", "org", "inventory"):
+        return get_connection()[("g", "org", "inventory").index(name)]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_repo(repo_name, org_name=None):
+    """
+    Fetches a repo from GitHub organization (GITHUB_ORG unless org_name is given).
     """
     if not repo_name:
         raise ValueError("Repository name cannot be empty")
 
+    g, org, inventory = get_connection(org_name)
+    known, repo = inventory.get(repo_name)
+    if known:
+        if repo is None:
+            log(f"Repository `{repo_name}` does not exist within GitHub {org.login}")
+        else:
+            log(f"Repository `{repo_name}` exists within GitHub {org.login}")
+        return repo
+
     try:
-        repo = org.get_repo(repo_name)
+        # Fetched through the client rather than the org, which may be a lazy object
+        repo = g.get_repo(f"{org.login}/{repo_name}")
         if repo.name:
-            print(f"Repository `{repo_name}` exists within GitHub {org.login}")
+            log(f"Repository `{repo_name}` exists within GitHub {org.login}")
             return repo
     except GithubException as e:
         if e.status == 404:
-            print(f"Repository `{repo_name}` does not exist within GitHub {org.login}")
+            log(f"Repository `{repo_name}` does not exist within GitHub {org.login}")
             return None
         elif e.status == 401:
             print("Authentication failed. Please check your GitHub token.", file=sys.stderr)
             sys.exit(1)
         elif e.status == 403:
-            print("Access denied. Please check your permissions.", file=sys.stderr)
-            sys.exit(1)
+            # Rate-limit 403s are retried by the transport, so this is a permission problem for this repository
+            print(f"Access denied to repository `{repo_name}`. Please check your permissions.", file=sys.stderr)
+            raise
         else:
             print(f"Error fetching repository from GitHub {org.login} - {str(e)}", file=sys.stderr)
             raise
 
-def load_repo_configs(config_file):
+def iter_repo_configs(config_file):
     """
-    Loads repository configurations from a YAML file.
+    Yields (repo_name, repo_config) pairs from a YAML file, a directory of
+    YAML files or a glob, parsing one repository at a time.
     """
     if not config_file:
         raise ValueError("Configuration file path cannot be empty")
 
     try:
-        with open(config_file, 'r') as f:
-            try:
-                repos = yaml.safe_load(f)
-                if not repos:
-                    print("Warning: Empty configuration file", file=sys.stderr)
-                    return {}
-                return repos.get("repositories", {})
-            except yaml.YAMLError as e:
-                print(f"Invalid YAML format: {str(e)}", file=sys.stderr)
-                sys.exit(1)
+        for entry in iter_config(config_file, config_cache_from_env()):
+            yield entry.name, entry.config
+    except yaml.YAMLError as e:
+        print(f"Invalid YAML format: {str(e)}", file=sys.stderr)
+        sys.exit(1)
     except FileNotFoundError:
         print(f"Configuration file not found: {config_file}", file=sys.stderr)
         sys.exit(1)
@@ -112,17 +232,25 @@ def load_repo_configs(config_file):
         print(f"Unexpected error reading configuration: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
+def load_repo_configs(config_file):
+    """
+    Loads repository configurations from a YAML file.
+    """
+    repos = dict(iter_repo_configs(config_file))
+    if not repos:
+        print("Warning: Empty configuration file", file=sys.stderr)
+    return repos
+
 def configure_repository(config_file):
     """
     Creates GitHub repositories based on YAML.
     """
     try:
-        repo_configs = load_repo_configs(config_file)
-        if not repo_configs:
-            print("No repository configurations found", file=sys.stderr)
-            return
-
-        for repo_name, repo_config in repo_configs.items():
+        _, org, inventory = get_connection()
+        configured = 0
+        for repo_name, repo_config in iter_repo_configs(config_file):
+            configured += 1
+            repo_config = dict(repo_config or {})
             try:
                 repo = get_repo(repo_name)
                 repo_config["name"] = repo_name
@@ -130,7 +258,7 @@ def configure_repository(config_file):
                 if repo is None:
                     try:
                         print(f"Creating GitHub repository `{repo_name}`")
-                        org.create_repo(**repo_config)
+                        inventory.add(org.create_repo(**repo_config))
                     except GithubException as e:
                         if e.status == 422:
                             print(f"Repository `{repo_name}` already exists.")
@@ -138,60 +266,91 @@ def configure_repository(config_file):
                             print(f"Error creating repository `{repo_name}`: {str(e)}", file=sys.stderr)
                             raise
                 else:
-                    print(f"Update GitHub repository `{repo_name}`")
-                    # Remove unsupported arguments for the edit method
-                    unsupported_args = ["auto_init", "gitignore_template", "license_template"]
-                    for arg in unsupported_args:
-                        repo_config.pop(arg, None)
-                    repo.edit(**repo_config)
+                    changes = diff_repository(with_settings(repo, repo_config), repo_config)
+                    if not changes:
+                        print(f"GitHub repository `{repo_name}` is up to date")
+                        continue
+                    print(f"Update GitHub repository `{repo_name}`: {', '.join(sorted(changes))}")
+                    repo.edit(**changes)
 
             except Exception as e:
                 print(f"Error processing repository {repo_name}: {str(e)}", file=sys.stderr)
                 continue
 
+        if not configured:
+            print("No repository configurations found", file=sys.stderr)
+
     except Exception as e:
         print(f"Error in repository configuration: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
-def create_repository(repo_name, description=None, repo_config=None):
+def with_settings(repo, repo_config):
+    """
+    Returns repo, fetched in full when its listing data lacks settings
+    repo_config sets. That is one explicit request on the calling worker
+    rather than one lazy request per attribute read.
+    """
+    missing = missing_attributes(repo, repo_config)
+    if missing and getattr(repo, "_rawData", None) is not None:
+        log(f"Reading {', '.join(missing)} of `{repo.name}`")
+        repo.update()
+    return repo
+
+def desired_config(repo_name, description=None, repo_config=None, selected=False):
+    """
+    Returns the settings a repository is created or updated with: the
+    defaults overridden by its config. A repository matched by a selector
+    (selected) already exists and only gets the settings its config lists.
+    """
+    if selected:
+        return {"name": repo_name, **(repo_config or {})}
+    default_config = {
+        "name": repo_name,
+        "description": description,
+        "private": True
+    }
+    if repo_config is None:
+        return default_config
+    return {**default_config, **repo_config}
+
+def create_repository(repo_name, description=None, repo_config=None, changed=None, org_name=None, selected=False):
     """
     Creates a single GitHub repository.
+
+    When changed is a list, the names of the settings that were set or
+    updated are appended to it. See desired_config for selected.
     """
     if not repo_name:
         raise ValueError("Repository name cannot be empty")
 
+    _, org, inventory = get_connection(org_name)
     try:
-        repo = get_repo(repo_name)
-        default_config = {
-            "name": repo_name,
-            "description": description,
-            "private": True
-        }
-
-        if repo_config is None:
-            repo_config = default_config
-        else:
-            repo_config = {**default_config, **repo_config}
+        repo = get_repo(repo_name, org_name)
+        repo_config = desired_config(repo_name, description, repo_config, selected)
 
         if repo is None:
             try:
-                print(f"Creating GitHub repository `{repo_name}`")
-                org.create_repo(**repo_config)
+                log(f"Creating GitHub repository `{repo_name}`")
+                inventory.add(org.create_repo(**repo_config))
+                if changed is not None:
+                    changed.extend(sorted(key for key in repo_config if key != "name"))
                 return "created"
             except GithubException as e:
                 if e.status == 422:
-                    print(f"Repository `{repo_name}` already exists.")
+                    log(f"Repository `{repo_name}` already exists.")
                 else:
                     print(f"Error creating repository `{repo_name}`: {str(e)}", file=sys.stderr)
                     raise
         else:
-            print(f"Repository `{repo_name}` already exists. Updating repository.")
-            # Remove unsupported arguments for the edit method
-            unsupported_args = ["auto_init", "gitignore_template", "license_template"]
-            for arg in unsupported_args:
-                repo_config.pop(arg, None)
+            changes = diff_repository(with_settings(repo, repo_config), repo_config)
+            if not changes:
+                log(f"Repository `{repo_name}` already exists and is up to date.")
+                return "unchanged"
+            log(f"Repository `{repo_name}` already exists. Updating {', '.join(sorted(changes))}.")
             try:
-                repo.edit(**repo_config)
+                repo.edit(**changes)
+                if changed is not None:
+                    changed.extend(sorted(changes))
                 return "updated"
             except GithubException as e:
                 print(f"Error updating repository `{repo_name}`: {str(e)}", file=sys.stderr)
@@ -201,19 +360,77 @@ def create_repository(repo_name, description=None, repo_config=None):
         print(f"Error in repository creation/update: {str(e)}", file=sys.stderr)
         raise
 
-def delete_repository(repo_name):
+def audit_repository(
+    repo_name, description=None, repo_config=None, changed=None, org_name=None, inventory=None, selected=False
+):
+    """
+    Compares a repository with its config without changing anything.
+
+    Returns "missing" when the repository does not exist, "drifted" when
+    settings differ from what create_repository would set, and "in-sync"
+    otherwise. When changed is a list, the drifted settings are appended to it.
+    With an inventory (e.g. from ghrm.snapshot), the repository is looked
+    up there instead of on GitHub. See desired_config for selected.
+    """
+    if not repo_name:
+        raise ValueError("Repository name cannot be empty")
+
+    repo = inventory.get(repo_name)[1] if inventory is not None else get_repo(repo_name, org_name)
+    if repo is None:
+        return "missing"
+    repo_config = desired_config(repo_name, description, repo_config, selected)
+    if inventory is None:
+        repo = with_settings(repo, repo_config)
+    # Settings that cannot be read back would always look drifted
+    changes = diff_repository(repo, repo_config, uncomparable=False)
+    if not changes:
+        log(f"Repository `{repo_name}` matches its config")
+        return "in-sync"
+    log(f"Repository `{repo_name}` has drifted: {', '.join(sorted(changes))}")
+    if changed is not None:
+        changed.extend(sorted(changes))
+    return "drifted"
+
+def archive_repository(repo_name, repo=None, org_name=None):
+    """
+    Archives a repository, looked up unless repo is given.
+
+    Returns "archived", or "unchanged" when it already was archived.
+    """
+    if not repo_name:
+        raise ValueError("Repository name cannot be empty")
+
+    if repo is None:
+        repo = get_repo(repo_name, org_name)
+    if repo is None:
+        raise ValueError(f"Repository `{repo_name}` does not exist")
+    if repo.archived:
+        log(f"Repository `{repo_name}` is already archived")
+        return "unchanged"
+    try:
+        log(f"Archiving GitHub repository `{repo_name}`")
+        repo.edit(archived=True)
+        return "archived"
+    except GithubException as e:
+        print(f"Error archiving repository `{repo_name}`: {str(e)}", file=sys.stderr)
+        raise
+
+def delete_repository(repo_name, org_name=None, repo=None):
     """
-    Deletes GitHub repository.
+    Deletes GitHub repository, looked up unless repo is given.
     """
     if not repo_name:
         raise ValueError("Repository name cannot be empty")
 
+    inventory = get_connection(org_name)[2]
     try:
-        repo = get_repo(repo_name)
+        if repo is None:
+            repo = get_repo(repo_name, org_name)
         if repo:
             try:
-                print(f"Deleting GitHub repository `{repo_name}`")
+                log(f"Deleting GitHub repository `{repo_name}`")
                 repo.delete()
+                inventory.discard(repo_name)
                 return True
             except GithubException as e:
                 if e.status == 403:
@@ -222,16 +439,85 @@ def delete_repository(repo_name):
                     print(f"Error deleting repository `{repo_name}`: {str(e)}", file=sys.stderr)
                 raise
         else:
-            print(f"Repository `{repo_name}` does not exist. Skipping deletion.")
+            log(f"Repository `{repo_name}` does not exist. Skipping deletion.")
             return False
 
     except Exception as e:
         print(f"Error in repository deletion: {str(e)}", file=sys.stderr)
         raise
 
+def get_labels(repo_name, org_name=None):
+    """
+    Fetches the labels of a repository.
+    """
+    repo = get_repo(repo_name, org_name)
+    if repo is None:
+        raise ValueError(f"Repository `{repo_name}` does not exist")
+    return list(repo.get_labels())
+
+def sync_labels(repo_name, labels, prune=False, repo=None, changed=None, org_name=None):
+    """
+    Brings a repository's labels in line with the canonical labels.
+
+    Returns "synced" when labels were changed and "unchanged" otherwise, or
+    "skipped" for an archived repository, which is read-only. When changed
+    is a list, each label operation is appended to it as
+    "create <name>", "update <old> -> <name>", "merge <alias> -> <name>"
+    or "delete <name>".
+    """
+    if not repo_name:
+        raise ValueError("Repository name cannot be empty")
+
+    try:
+        if repo is None:
+            repo = get_repo(repo_name, org_name)
+        if repo is None:
+            raise ValueError(f"Repository `{repo_name}` does not exist")
+        if repo.archived:
+            log(f"Skipping labels of `{repo_name}`: the repository is archived")
+            return "skipped"
+
+        changes = plan_labels(repo.get_labels(), labels, prune)
+        if not changes:
+            log(f"Labels of `{repo_name}` are up to date")
+            return "unchanged"
+
+        # Deletes first, so renamed labels never collide with leftover aliases;
+        # merges come after the update that gives the canonical label its name
+        for change in sorted(changes, key=lambda change: change.operation != "delete"):
+            if change.operation == "create":
+                log(f"Creating label `{change.name}` in `{repo_name}`")
+                repo.create_label(change.name, change.color, change.description)
+                operation = f"create {change.name}"
+            elif change.operation == "update":
+                log(f"Updating label `{change.label.name}` in `{repo_name}` to `{change.name}`")
+                operation = f"update {change.label.name} -> {change.name}"
+                change.label.edit(change.name, change.color, change.description)
+            elif change.operation == "merge":
+                log(f"Merging label `{change.label.name}` into `{change.name}` in `{repo_name}`")
+                # Issues and pull requests alike; the alias is only deleted once all carry the canonical label
+                for issue in repo.get_issues(state="all", labels=[change.label]):
+                    issue.add_to_labels(change.name)
+                change.label.delete()
+                operation = f"merge {change.label.name} -> {change.name}"
+            else:
+                log(f"Deleting label `{change.name}` from `{repo_name}`")
+                change.label.delete()
+                operation = f"delete {change.name}"
+            if changed is not None:
+                changed.append(operation)
+        return "synced"
+
+    except GithubException as e:
+        print(f"Error syncing labels of `{repo_name}`: {str(e)}", file=sys.stderr)
+        raise
+
 def decommission_repository(repositories_decom_list):
     """
-    To delete repositories based on a list in YAML file.
+    To delete repositories based on a list in YAML file, right away.
+
+    `ghrm decommission` archives them first and deletes them after a
+    grace period, concurrently; see ghrm.decommission.
     """
     if not repositories_decom_list:
         raise ValueError("Decommission list file path cannot be empty")
@@ -252,6 +538,8 @@ def decommission_repository(repositories_decom_list):
             print("No repositories found in decommission list", file=sys.stderr)
             return
 
+        # One listing of the organization answers every lookup
+        get_connection()[2].load()
         for repo_name in repo_names:
             try:
                 delete_repository(repo_name)
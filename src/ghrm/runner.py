@@ -0,0 +1,703 @@
+# runner.py - Runs an action over the repositories of one or more organizations
+
+import os
+import queue
+import sys
+import threading
+import time
+from itertools import islice
+from rich.text import Text
+from .repository import (
+    archive_repository,
+    audit_repository,
+    create_repository,
+    delete_repository,
+    get_connection,
+    sync_labels
+)
+from .display import display_result, display_list, log
+from .executor import TaskResult, run_tasks
+from .loader import iter_config, config_cache_from_env
+from .journal import config_hash, full_refresh_hours_from_env, open_checkpoint, open_journal
+from .labels import labels_hash
+from .snapshot import Snapshot
+from .selection import Selector, selector_from_config
+from .decommission import batches, grace_hours_from_env, is_due, open_state, plan_decommission
+from .metrics import metrics
+from . import transport
+
+# result -> (notification title, name style, status)
+RESULT_MESSAGES = {
+    "created": ("Repository Created", "bold green", "success"),
+    "updated": ("Repository Updated", "bold blue", "success"),
+    "archived": ("Repository Archived", "bold yellow", "warning"),
+    "deleted": ("Repository Deleted", "bold red", "warning"),
+    "synced": ("Labels Synced", "bold blue", "success"),
+}
+
+# Repositories read from the config between inventory prefetches
+PREFETCH_CHUNK = 50
+
+# Results that leave a repository in its desired state, per action
+APPLIED_RESULTS = {
+    "create": ("created", "updated", "unchanged"),
+    "delete": ("deleted", "skipped"),
+    "labels": ("synced", "unchanged"),
+    "audit": (),
+    "decommission": (),
+}
+
+# Actions that only read from GitHub, and keep no journal or checkpoint
+READ_ONLY_ACTIONS = ("audit",)
+
+# Actions that record their own progress across runs instead of a journal and checkpoint
+STAGED_ACTIONS = ("decommission",)
+
+
+def _org_entries(pending_entries):
+    # Yields the entries routed to one organization until the router is done
+    while True:
+        entry = pending_entries.get()
+        if entry is None:
+            return
+        yield entry
+
+
+class Run:
+    """
+    One run of an action over the repositories of one or more organizations.
+
+    args are the parsed command line. progress is the run's RunProgress,
+    records its RecordWriter (or None) and notify(title, details, status)
+    sends a notification. labels is the label config of a labels sync,
+    and snapshot the Snapshot an audit reads instead of GitHub. connect
+    returns (client, organization, inventory) for an organization name,
+    None meaning GITHUB_ORG (default_org).
+
+    Results are collected in results, and the repositories skipped as
+    finished or unchanged in resumed and journaled.
+    """
+
+    def __init__(self, args, progress, notify, records=None, labels=None, snapshot=None,
+                 connect=get_connection, default_org=None, cli_selector=None):
+        self.args = args
+        self.progress = progress
+        self.notify = notify
+        self.records = records
+        self.labels = labels
+        self.snapshot = snapshot
+        self.connect = connect
+        self.default_org = default_org
+        self.cli_selector = cli_selector
+        # Full sweeps are tracked per config, since several configs (e.g. shards) can manage one organization
+        self.sweep_key = None
+        if args.repos or args.config:
+            self.sweep_key = os.path.abspath(args.repos or args.config)
+            if cli_selector is not None:
+                self.sweep_key += f" [{cli_selector}]"
+        self.scope = "labels" if args.action == "labels" else "repositories"
+        # (description, config hash) of the repositories in flight, by (org, repository)
+        self._pending = {}
+        # Settings or labels changed per repository in flight, filled in by the workers
+        self._changed = {}
+        self.journaled = []
+        self.resumed = []
+        self.results = []
+        # Repositories of the config reported on by an audit, by organization
+        self._audited = {}
+        # Set when the run is cut short, so no organization records a full sweep
+        self.stop = threading.Event()
+        # (organization, exception) of organization threads that died
+        self._org_errors = []
+
+    def _org_key(self, org_name):
+        return (org_name or self.default_org or "").lower()
+
+    def _display_name(self, org_name, repo_name):
+        # Repositories outside GITHUB_ORG are shown with their organization
+        return repo_name if self._org_key(org_name) == self._org_key(None) else f"{org_name}/{repo_name}"
+
+    def _entry_target(self, entry):
+        # The repository name, or the Selector of a `selectors` entry
+        if entry.selector is None:
+            return entry.name
+        try:
+            selector = selector_from_config(entry.selector)
+        except ValueError as e:
+            raise ValueError(f"Invalid selector {entry.selector}: {str(e)}") from None
+        if self.args.action in STAGED_ACTIONS and "archived" not in entry.selector:
+            # Decommissioned repositories are archived along the way and must keep matching
+            selector.archived = None
+        return selector
+
+    def config_entries(self):
+        """
+        Yields (org, entry) for each entry of --config, parsed one repository
+        at a time so work starts before the whole config is read.
+        """
+        for entry in iter_config(self.args.config, config_cache_from_env()):
+            kwargs = {"description": entry.description, "repo_config": entry.config}
+            state_hash = config_hash(self.args.action, entry.description, entry.config)
+            yield entry.org, (self._entry_target(entry), kwargs, entry.description, state_hash)
+
+    def repos_entries(self):
+        """
+        Yields (org, entry) for each repository of --repos, to sync the labels of.
+        """
+        state_hash = labels_hash(self.labels, self.args.prune)
+        for entry in iter_config(self.args.repos, config_cache_from_env()):
+            yield entry.org, (self._entry_target(entry), {}, None, state_hash)
+
+    def _inventory_entries(self, inventory):
+        inventory.load(workers=self.args.workers)
+        # Archived repositories are read-only
+        repos = [
+            repo for repo in inventory.repositories()
+            if not repo.archived and (self.cli_selector is None or self.cli_selector.matches(repo))
+        ]
+        self.progress.add_total(len(repos))
+        state_hash = labels_hash(self.labels, self.args.prune)
+        for repo in repos:
+            yield repo.name, {"repo": repo}, None, state_hash
+
+    def count_entries(self, path):
+        """
+        Counts the entries of a config for the live view's ETA, alongside the
+        run rather than before it. Counting a config that is not compiled yet
+        would parse it twice at once, so it goes without an ETA.
+        """
+        cache = config_cache_from_env()
+        try:
+            if cache is None or not cache.is_compiled(path):
+                return
+        except OSError:
+            return
+
+        def count():
+            try:
+                self.progress.add_total(sum(1 for _ in iter_config(path, cache)))
+            except Exception:
+                pass
+
+        threading.Thread(target=count, name="ghrm-progress-total", daemon=True).start()
+
+    def _cli_selects(self, repo_name, inventory):
+        # Repositories missing from the organization have nothing --select could match but a name
+        if not self.cli_selector.matches_name(repo_name):
+            return False
+        if not self.cli_selector.needs_repository:
+            return True
+        _, repo = inventory.get(repo_name)
+        return repo is not None and self.cli_selector.matches(repo)
+
+    def select_entries(self, org_name, entries, inventory):
+        """
+        Expands selector entries into the repositories they match and leaves
+        out repositories that do not match --select. Both are resolved from
+        one listing of the organization rather than repository by repository.
+        Selectors are expanded after every named entry, so a repository named
+        anywhere in the config keeps its own settings, and a repository
+        matched by an earlier selector is not matched again.
+        """
+        cli_selector = self.cli_selector
+        if cli_selector is not None and cli_selector.needs_repository:
+            inventory.load(workers=self.args.workers)
+        seen = set()
+        selectors = []
+        for target, kwargs, description, state_hash in entries:
+            if isinstance(target, Selector):
+                selectors.append((target, kwargs, description, state_hash))
+                continue
+            if cli_selector is not None and not self._cli_selects(target, inventory):
+                self._skip(org_name, target, "excluded")
+                continue
+            seen.add(target.lower())
+            yield target, kwargs, description, state_hash
+
+        for target, kwargs, description, state_hash in selectors:
+            inventory.load(workers=self.args.workers)
+            repos = [
+                repo for repo in target.select(inventory.repositories())
+                if repo.name.lower() not in seen and (cli_selector is None or cli_selector.matches(repo))
+            ]
+            log(f"Selector {target} matched {len(repos)} repositories", file=sys.stderr)
+            if self.progress.console.is_terminal:
+                # The selector was counted as one entry
+                self.progress.add_total(len(repos) - 1)
+            for repo in repos:
+                seen.add(repo.name.lower())
+                # Matched repositories only get the settings the selector lists, not the defaults of named entries
+                if self.args.action == "labels":
+                    item_kwargs = dict(kwargs, repo=repo)
+                else:
+                    item_kwargs = dict(kwargs, selected=True)
+                yield repo.name, item_kwargs, description, state_hash
+
+    def _work_items(self, org_name, entries, inventory, journal, checkpoint, full_sweep):
+        # Streams (repo_name, kwargs) items, leaving out finished and unchanged repositories
+        for chunk in iter(lambda: list(islice(entries, PREFETCH_CHUNK)), []):
+            if self.stop.is_set():
+                return
+            changed_entries = []
+            for repo_name, kwargs, description, state_hash in chunk:
+                if self.args.resume and checkpoint.is_current(repo_name, state_hash):
+                    self.resumed.append(repo_name)
+                    self._skip(org_name, repo_name, "resumed")
+                    continue
+                if not full_sweep and journal.is_current(repo_name, state_hash):
+                    self.journaled.append(repo_name)
+                    self._skip(org_name, repo_name, "journaled")
+                    continue
+                changed_entries.append((repo_name, kwargs, description, state_hash))
+            inventory.prefetch([repo_name for repo_name, _, _, _ in changed_entries])
+            for repo_name, kwargs, description, state_hash in changed_entries:
+                if self.stop.is_set():
+                    return
+                self._pending[self._org_key(org_name), repo_name] = (description, state_hash)
+                yield repo_name, kwargs
+
+    def _write_record(self, org_name, repo_name, result, seconds=0.0, changes=(), error=None):
+        if self.records is not None:
+            self.records.write({
+                "type": "result",
+                "action": self.args.action,
+                "org": org_name or self.default_org,
+                "name": repo_name,
+                "result": result,
+                "seconds": round(seconds, 3),
+                "changes": list(changes),
+                "error": str(error) if error is not None else None
+            })
+
+    def _skip(self, org_name, repo_name, outcome):
+        self.progress.skip(outcome)
+        self._write_record(org_name, repo_name, outcome)
+
+    def _operation(self, org_name, inventory=None, phase=None):
+        # Returns the function that applies the action (or its phase) to one repository of the organization
+        action = self.args.action
+        changed = self._changed
+        org_key = self._org_key(org_name)
+
+        def run_create(repo_name, description=None, repo_config=None, selected=False):
+            changes = changed[org_key, repo_name] = []
+            return create_repository(
+                repo_name,
+                description=description,
+                repo_config=repo_config,
+                changed=changes,
+                org_name=org_name,
+                selected=selected
+            ) or "skipped"
+
+        def run_delete(repo_name, **_):
+            return "deleted" if delete_repository(repo_name, org_name=org_name) else "skipped"
+
+        def run_archive(repo_name, repo=None):
+            return archive_repository(repo_name, repo=repo, org_name=org_name)
+
+        def run_delete_archived(repo_name, repo=None):
+            return "deleted" if delete_repository(repo_name, org_name=org_name, repo=repo) else "missing"
+
+        if action == "decommission":
+            return run_archive if phase == "archive" else run_delete_archived
+
+        def run_labels(repo_name, repo=None):
+            changes = changed[org_key, repo_name] = []
+            return sync_labels(
+                repo_name, self.labels, self.args.prune, repo=repo, changed=changes, org_name=org_name
+            )
+
+        def run_audit(repo_name, description=None, repo_config=None, selected=False):
+            changes = changed[org_key, repo_name] = []
+            return audit_repository(
+                repo_name,
+                description=description,
+                repo_config=repo_config,
+                changed=changes,
+                org_name=org_name,
+                inventory=inventory if self.snapshot is not None else None,
+                selected=selected
+            )
+
+        return {"create": run_create, "delete": run_delete, "labels": run_labels, "audit": run_audit}[action]
+
+    def _report(self, org_name, journal, checkpoint, task_result):
+        action = self.args.action
+        repo_name = task_result.name
+        name = self._display_name(org_name, repo_name)
+        description, state_hash = self._pending.pop((self._org_key(org_name), repo_name), (None, None))
+        changes = self._changed.pop((self._org_key(org_name), repo_name), [])
+        result = "failed" if task_result.error is not None else task_result.result
+        metrics.record_result(action, result)
+        self._write_record(org_name, repo_name, result, task_result.seconds, changes, task_result.error)
+        if action in READ_ONLY_ACTIONS:
+            self._audited.setdefault(self._org_key(org_name), set()).add(repo_name.lower())
+        elif action in STAGED_ACTIONS:
+            pass
+        elif task_result.result in APPLIED_RESULTS[action]:
+            journal.record(repo_name, state_hash)
+            checkpoint.record(repo_name, state_hash)
+        else:
+            journal.forget(repo_name)
+
+        if task_result.error is not None:
+            error_message = str(task_result.error)
+            self.notify(
+                "Error Occurred",
+                {
+                    "Action": action,
+                    "Repository": name,
+                    "Error": error_message
+                },
+                "error"
+            )
+            self.progress.add(
+                name,
+                "failed",
+                Text.assemble(f"{name}: ", (error_message, "bold red")),
+                "error"
+            )
+            return
+
+        if action == "audit":
+            # Findings are reported, not notified one by one
+            message = Text.assemble(f"{name}: ", (", ".join(changes), "yellow")) if changes else None
+            self.progress.add(
+                name, task_result.result, message, "info" if task_result.result == "in-sync" else "warning"
+            )
+            return
+
+        outcome = RESULT_MESSAGES.get(task_result.result)
+        if outcome is None:
+            self.progress.add(name, str(task_result.result).lower(), status="info")
+            return
+        title, style, status = outcome
+        details = {"Repository": name}
+        if action == "create":
+            details["Description"] = description
+        self.notify(title, details, status)
+        self.progress.add(name, task_result.result, Text(name, style=style), status)
+
+    def _fail_org(self, org_name, error, entries):
+        # The organization could not be opened, so everything routed to it fails with that error
+        error_message = str(error)
+        self.notify(
+            "Error Occurred",
+            {
+                "Action": self.args.action,
+                "Organization": org_name,
+                "Error": error_message
+            },
+            "error"
+        )
+        display_result(
+            Text.assemble(
+                f"Error opening organization {org_name}: ",
+                (error_message, "bold red")
+            ),
+            "error"
+        )
+        # Selector entries are reported by their selector
+        names = [org_name] if entries is None else [str(target) for target, _, _, _ in entries]
+        failed = []
+        for index, name in enumerate(names):
+            metrics.record_result(self.args.action, "failed")
+            self.progress.skip("failed")
+            self._write_record(org_name, name, "failed", error=error)
+            display_name = name if entries is None else self._display_name(org_name, name)
+            failed.append(TaskResult(index, display_name, None, error, 0.0))
+        return failed
+
+    def _extend_results(self, org_name, org_results):
+        self.results.extend(
+            task_result._replace(name=self._display_name(org_name, task_result.name)) for task_result in org_results
+        )
+
+    def run_org(self, org_name, entries=None):
+        """
+        Runs the action over one organization's entries, or over every
+        repository in its inventory when entries is None. An error that
+        escapes it stops the run and is raised again by fan_out once every
+        organization's thread has finished.
+        """
+        try:
+            self.process_org(org_name, entries)
+        except BaseException as e:
+            self.stop.set()
+            self._org_errors.append((org_name or self.default_org, e))
+
+    def process_org(self, org_name, entries=None):
+        """
+        Opens one organization and runs the action over its entries, or over
+        its whole inventory when entries is None.
+        """
+        args = self.args
+        try:
+            if org_name is None and not self.default_org:
+                raise EnvironmentError(
+                    "GITHUB_ORG environment variable is not set; "
+                    "name the organization with a top-level `organization` or `org/name` entries"
+                )
+            if self.snapshot is not None:
+                # Offline: only audits read a snapshot, and they never need the connection
+                g = org = None
+                inventory = self.snapshot.inventory(org_name or self.default_org)
+            else:
+                g, org, inventory = self.connect(org_name)
+        except Exception as e:
+            self.results.extend(self._fail_org(org_name or self.default_org, e, entries))
+            return
+
+        if entries is not None:
+            entries = self.select_entries(org_name, entries, inventory)
+        if args.action in READ_ONLY_ACTIONS:
+            self.audit_org(org_name, inventory, entries)
+            return
+        if args.action in STAGED_ACTIONS:
+            self.decommission_org(org_name, g, org, inventory, entries)
+            return
+        if entries is None:
+            entries = self._inventory_entries(inventory)
+        journal = open_journal(g.requester.base_url, org.login, self.scope)
+        full_sweep = not args.incremental or journal.refresh_due(full_refresh_hours_from_env(), self.sweep_key)
+        if args.incremental and full_sweep:
+            print(f"Full refresh due for {org.login}; processing every repository", file=sys.stderr)
+        # Completed repositories are checkpointed as the run goes, so --resume can skip them
+        checkpoint = open_checkpoint(g.requester.base_url, org.login, args.action, args.config)
+        if not args.resume:
+            checkpoint.discard()
+
+        try:
+            org_results = run_tasks(
+                self._operation(org_name),
+                self._work_items(org_name, entries, inventory, journal, checkpoint, full_sweep),
+                workers=args.workers,
+                on_result=lambda task_result: self._report(org_name, journal, checkpoint, task_result)
+            )
+            self._extend_results(org_name, org_results)
+            if self.stop.is_set():
+                return
+            if full_sweep:
+                # Repositories that failed were dropped from the journal, so incremental runs retry them
+                journal.mark_full_refresh(self.sweep_key)
+            if not any(task_result.error is not None for task_result in org_results):
+                checkpoint.discard()
+        finally:
+            journal.close()
+            checkpoint.close()
+
+    def audit_org(self, org_name, inventory, entries):
+        """
+        Audits the configured repositories of one organization from a single
+        listing of it, then reports the repositories missing from the config.
+        """
+        # Listed with the workers up front, so every lookup is answered from memory
+        inventory.load(workers=self.args.workers)
+        org_results = run_tasks(
+            self._operation(org_name, inventory),
+            self._work_items(org_name, entries, inventory, None, None, True),
+            workers=self.args.workers,
+            on_result=lambda task_result: self._report(org_name, None, None, task_result)
+        )
+        self._extend_results(org_name, org_results)
+        if self.stop.is_set():
+            return
+
+        configured = self._audited.get(self._org_key(org_name), set())
+        unmanaged = sorted(
+            (repo.name for repo in inventory.repositories() if repo.name.lower() not in configured), key=str.lower
+        )
+        self.progress.add_total(len(unmanaged))
+        for index, repo_name in enumerate(unmanaged, len(org_results)):
+            name = self._display_name(org_name, repo_name)
+            metrics.record_result(self.args.action, "unmanaged")
+            self._write_record(org_name, repo_name, "unmanaged")
+            self.progress.add(name, "unmanaged", status="warning")
+            self.results.append(TaskResult(index, name, "unmanaged", None, 0.0))
+
+    def _note(self, org_name, repo_name, outcome, status="info"):
+        # An outcome settled from the plan, without a request of its own
+        name = self._display_name(org_name, repo_name)
+        metrics.record_result(self.args.action, outcome)
+        self._write_record(org_name, repo_name, outcome)
+        self.progress.add(name, outcome, status=status)
+        self.results.append(TaskResult(len(self.results), name, outcome, None, 0.0))
+
+    def decommission_org(self, org_name, g, org, inventory, entries):
+        """
+        Decommissions the listed repositories of one organization in two
+        phases: every repository not archived yet is archived, concurrently;
+        then repositories past their grace period are deleted, in batches of
+        --batch-size. A batch with failures stops the deletions, and the
+        next run picks up the rest. Progress is kept per repository, so
+        reruns only do what is left.
+        """
+        args = self.args
+        grace_hours = args.grace_hours if args.grace_hours is not None else grace_hours_from_env()
+        # Listed with the workers up front, so no repository is looked up on its own
+        inventory.load(workers=args.workers)
+        repo_names = [repo_name for repo_name, _, _, _ in entries]
+        state = open_state(g.requester.base_url, org.login)
+        try:
+            archive, delete = [], []
+            for repo_name, stage, repo in plan_decommission(repo_names, inventory, state, grace_hours):
+                if stage == "archive":
+                    archive.append((repo_name, {"repo": repo}))
+                elif stage == "delete":
+                    delete.append((repo_name, {"repo": repo}))
+                elif stage == "unarchived":
+                    state.forget(repo_name)
+                    self._note(org_name, repo_name, stage, "warning")
+                else:
+                    self._note(org_name, repo_name, stage)
+
+            def archived(task_result):
+                if task_result.error is None:
+                    state.mark_archived(task_result.name)
+                    if is_due(time.time(), grace_hours):
+                        # Without a grace period, the repository goes on to the deletions of this run
+                        delete.append((task_result.name, {"repo": inventory.get(task_result.name)[1]}))
+                        if self.progress.console.is_terminal:
+                            self.progress.add_total(1)
+                self._report(org_name, None, None, task_result)
+
+            def deleted(task_result):
+                if task_result.error is None:
+                    state.mark_deleted(task_result.name)
+                self._report(org_name, None, None, task_result)
+
+            def archive_items():
+                # Interrupted: repositories in flight finish, and no more are archived
+                for item in archive:
+                    if self.stop.is_set():
+                        return
+                    yield item
+
+            org_results = list(run_tasks(
+                self._operation(org_name, phase="archive"), archive_items(), workers=args.workers, on_result=archived
+            ))
+            for number, batch in enumerate(batches(delete, args.batch_size)):
+                if self.stop.is_set():
+                    break
+                batch_results = run_tasks(
+                    self._operation(org_name, phase="delete"), batch, workers=args.workers, on_result=deleted
+                )
+                org_results.extend(batch_results)
+                if any(task_result.error is not None for task_result in batch_results):
+                    left = delete[(number + 1) * args.batch_size:]
+                    if left:
+                        print(
+                            f"Stopping deletions in {org.login} after failures; "
+                            f"{len(left)} repositories are left for the next run",
+                            file=sys.stderr
+                        )
+                    for repo_name, _ in left:
+                        self._note(org_name, repo_name, "waiting")
+                    break
+            self._extend_results(org_name, org_results)
+        finally:
+            state.close()
+
+    def fan_out(self, routed, orgs=()):
+        """
+        Runs each organization in its own thread with its own pool of
+        workers, so a run takes as long as its largest organization.
+
+        Entries from routed, (org, entry) pairs, are handed to their
+        organization's thread as they are read, and a thread is started
+        when an organization first appears; orgs lists organizations run
+        over their whole inventory. Each organization queues at most
+        --workers * PREFETCH_CHUNK entries, so reading the config waits for
+        the workers instead of holding the whole manifest in memory. A config
+        sorted by organization therefore fills one organization's queue
+        before the next one starts.
+        """
+        workers = self.args.workers
+        runners = {}
+
+        def hand_over(runner, entry):
+            thread, pending_entries = runner
+            while True:
+                try:
+                    pending_entries.put(entry, timeout=0.1)
+                    return
+                except queue.Full:
+                    # An organization whose thread died takes no more entries
+                    if not thread.is_alive():
+                        return
+
+        def start(org_name, pending_entries=None):
+            entries = _org_entries(pending_entries) if pending_entries is not None else None
+            thread = threading.Thread(target=self.run_org, args=(org_name, entries), name=f"ghrm-org-{org_name}")
+            runners[self._org_key(org_name)] = (thread, pending_entries)
+            if workers > 1 or len(runners) > 1:
+                transport.set_pool_size(workers * len(runners))
+            thread.start()
+
+        try:
+            for org_name in orgs:
+                start(org_name)
+            for org_name, entry in routed:
+                runner = runners.get(self._org_key(org_name))
+                if runner is None:
+                    start(org_name, queue.Queue(maxsize=workers * PREFETCH_CHUNK))
+                    runner = runners[self._org_key(org_name)]
+                hand_over(runner, entry)
+        except BaseException:
+            self.stop.set()
+            raise
+        finally:
+            for runner in runners.values():
+                if runner[1] is not None:
+                    hand_over(runner, None)
+            try:
+                for thread, _ in runners.values():
+                    thread.join()
+            except BaseException:
+                # Interrupted: workers finish the repositories in flight and take no more
+                self.stop.set()
+                for thread, _ in runners.values():
+                    thread.join()
+                raise
+        if self._org_errors:
+            org_name, error = self._org_errors[0]
+            raise RuntimeError(f"Run for organization {org_name} failed: {str(error)}") from error
+
+
+def run_snapshot(args, org_names, records=None, connect=get_connection):
+    """
+    Refreshes the snapshot file args.snapshot for each of org_names, one
+    after the other, and writes a "snapshot" record per organization.
+    """
+    hours = full_refresh_hours_from_env()
+    if args.workers > 1:
+        transport.set_pool_size(args.workers)
+    rows = []
+    with Snapshot(args.snapshot) as snapshot_file:
+        for org_name in org_names:
+            if org_name is None:
+                raise EnvironmentError("GITHUB_ORG environment variable is not set; name organizations with --org")
+            started = time.monotonic()
+            _, org, inventory = connect(org_name)
+            mode, stored, removed, renamed = snapshot_file.refresh(org, inventory, args.workers, args.full, hours)
+            seconds = time.monotonic() - started
+            total = snapshot_file.count(org.login)
+            metrics.record_result(args.action, mode)
+            rows.append((org.login, mode, stored, removed, renamed, total, f"{seconds:.1f}"))
+            if records is not None:
+                records.write({
+                    "type": "snapshot",
+                    "org": org.login,
+                    "refresh": mode,
+                    "stored": stored,
+                    "removed": removed,
+                    "renamed": renamed,
+                    "repositories": total,
+                    "seconds": round(seconds, 3)
+                })
+    display_list(
+        f"Snapshot {args.snapshot}",
+        rows,
+        ["Organization", "Refresh", "Stored", "Removed", "Renamed", "Repositories", "Seconds"]
+    )
@@ -0,0 +1,136 @@
+# selection.py - Targets repositories by name pattern, topic, visibility and archived state
+
+import fnmatch
+import re
+
+VISIBILITIES = ("public", "private", "internal")
+
+# Keys of a selector's `match` mapping; name, regex and topic take one value or a list
+MATCH_KEYS = ("name", "regex", "topics", "visibility", "archived")
+
+
+def _as_list(value, key):
+    values = value if isinstance(value, list) else [value]
+    if not all(isinstance(item, str) and item for item in values):
+        raise ValueError(f"Selector `{key}` must be a string or a list of strings")
+    return values
+
+
+def _as_bool(value, key):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "yes", "1", "false", "no", "0"):
+        return value.lower() in ("true", "yes", "1")
+    raise ValueError(f"Selector `{key}` must be true or false")
+
+
+class Selector:
+    """
+    Matches repositories by attributes found in organization listings, so
+    a selector is resolved against the inventory rather than by looking up
+    repositories one by one.
+
+    A repository matches when its name matches any of names (globs,
+    case-insensitive) or patterns (regular expressions, searched), when
+    either is given; when it has every topic in topics; and when its
+    visibility and archived state equal the ones given. None leaves a
+    criterion out.
+    """
+
+    def __init__(self, names=(), patterns=(), topics=(), visibility=None, archived=None):
+        if visibility is not None and visibility not in VISIBILITIES:
+            raise ValueError(f"Selector `visibility` must be one of {', '.join(VISIBILITIES)}")
+        self.names = tuple(names)
+        self.patterns = tuple(patterns)
+        try:
+            self._regexes = [re.compile(pattern) for pattern in self.patterns]
+        except re.error as e:
+            raise ValueError(f"Invalid selector `regex`: {str(e)}") from None
+        self.topics = tuple(topic.lower() for topic in topics)
+        self.visibility = visibility
+        self.archived = archived
+
+    @property
+    def needs_repository(self):
+        """True when matching needs more than the repository name."""
+        return bool(self.topics) or self.visibility is not None or self.archived is not None
+
+    def matches_name(self, name):
+        if not self.names and not self.patterns:
+            return True
+        return (
+            any(fnmatch.fnmatchcase(name.lower(), pattern.lower()) for pattern in self.names)
+            or any(regex.search(name) for regex in self._regexes)
+        )
+
+    def matches(self, repo):
+        if not self.matches_name(repo.name):
+            return False
+        if self.topics and not set(self.topics) <= {topic.lower() for topic in (getattr(repo, "topics", None) or [])}:
+            return False
+        if self.visibility is not None:
+            visibility = getattr(repo, "visibility", None) or ("private" if repo.private else "public")
+            if visibility != self.visibility:
+                return False
+        return self.archived is None or bool(getattr(repo, "archived", False)) == self.archived
+
+    def select(self, repos):
+        """
+        Returns the matching repositories, sorted by name.
+        """
+        return sorted((repo for repo in repos if self.matches(repo)), key=lambda repo: repo.name.lower())
+
+    def __str__(self):
+        parts = [f"name={name}" for name in self.names] + [f"regex={pattern}" for pattern in self.patterns]
+        parts += [f"topic={topic}" for topic in self.topics]
+        if self.visibility is not None:
+            parts.append(f"visibility={self.visibility}")
+        if self.archived is not None:
+            parts.append(f"archived={str(self.archived).lower()}")
+        return " ".join(parts) or "all"
+
+
+def selector_from_config(match):
+    """
+    Returns the Selector for the `match` mapping of a config selector.
+
+    Archived repositories are read-only, so they are left out unless
+    `archived` is given.
+    """
+    if not isinstance(match, dict) or not match:
+        raise ValueError("A selector needs a `match` mapping")
+    unknown = sorted(set(match) - set(MATCH_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown selector keys: {', '.join(unknown)}")
+    return Selector(
+        names=_as_list(match["name"], "name") if "name" in match else (),
+        patterns=_as_list(match["regex"], "regex") if "regex" in match else (),
+        topics=_as_list(match["topics"], "topics") if "topics" in match else (),
+        visibility=match.get("visibility"),
+        archived=_as_bool(match["archived"], "archived") if "archived" in match else False,
+    )
+
+
+def selector_from_args(expressions):
+    """
+    Returns the Selector for --select key=value expressions, or None when
+    there are none. Keys are those of a config selector, with `topic`
+    accepted for `topics`; repeated keys add values.
+    """
+    if not expressions:
+        return None
+    match = {}
+    for expression in expressions:
+        key, separator, value = expression.partition("=")
+        key = "topics" if key.strip() == "topic" else key.strip()
+        if not separator or not value:
+            raise ValueError(f"--select expects key=value, got `{expression}`")
+        if key in ("visibility", "archived"):
+            match[key] = value.strip()
+        else:
+            match.setdefault(key, []).append(value.strip())
+    selector = selector_from_config(match)
+    if "archived" not in match:
+        # On the command line, only an explicit archived= filters by it
+        selector.archived = None
+    return selector
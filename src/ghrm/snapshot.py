@@ -0,0 +1,285 @@
+# snapshot.py - Local SQLite snapshot of organization repositories for offline queries
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from github.GithubObject import CompletableGithubObject, GithubObject
+from .inventory import PER_PAGE
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS organizations (
+    org TEXT PRIMARY KEY,
+    login TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    full_refresh_at REAL
+);
+CREATE TABLE IF NOT EXISTS repositories (
+    org TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    name TEXT NOT NULL,
+    id INTEGER,
+    private INTEGER,
+    visibility TEXT,
+    archived INTEGER,
+    fork INTEGER,
+    topics TEXT,
+    updated_at TEXT,
+    pushed_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (org, name_lower)
+);
+CREATE INDEX IF NOT EXISTS repositories_updated_at ON repositories (org, updated_at);
+CREATE INDEX IF NOT EXISTS repositories_pushed_at ON repositories (org, pushed_at);
+CREATE INDEX IF NOT EXISTS repositories_visibility ON repositories (org, visibility, archived);
+"""
+
+
+def _listing_data(repo):
+    # Repository.raw_data fetches a listed repository in full first; the
+    # raw_data of GithubObject itself returns what the listing held
+    if isinstance(repo, CompletableGithubObject):
+        return GithubObject.raw_data.fget(repo)
+    return repo.raw_data
+
+
+def snapshot_path_from_env():
+    """
+    Returns the snapshot file set with GHRM_SNAPSHOT_FILE, or None.
+    """
+    return os.getenv("GHRM_SNAPSHOT_FILE") or None
+
+
+class SnapshotRepository:
+    """
+    A repository read back from a snapshot, with the attributes GitHub
+    returned when it was listed. Attributes the listing did not include
+    are missing rather than None, so they are never mistaken for settings.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["_data"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @property
+    def raw_data(self):
+        return self._data
+
+
+class SnapshotInventory:
+    """
+    An organization's repositories as recorded in a snapshot, answering
+    the same lookups as ghrm.inventory.Inventory without any requests.
+    """
+
+    loaded = True
+
+    def __init__(self, login, repositories):
+        self.login = login
+        self._repos = {repo.name.lower(): repo for repo in repositories}
+
+    def load(self, workers=1):
+        pass
+
+    def prefetch(self, repo_names):
+        pass
+
+    def repositories(self):
+        return list(self._repos.values())
+
+    def get(self, repo_name):
+        return True, self._repos.get(repo_name.lower())
+
+
+class Snapshot:
+    """
+    SQLite file holding the listing data of every repository of one or
+    more organizations, indexed for queries by name, visibility, archived
+    state and activity.
+
+    A full refresh lists the whole organization. An incremental refresh
+    lists it newest first by push and by update, stopping at the first
+    repository that is older than the snapshot, so only what changed is
+    read. A renamed repository shows up under its new name and replaces
+    the row with its id. Repositories deleted or transferred away do not
+    show up at all; when the organization's repository count no longer
+    matches the snapshot with the changes stored, or when the count is not
+    visible to the token, the refresh falls back to a full one. Changes
+    are stored before the counts are compared, so a repository created
+    in the same window does not hide a deletion.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Organizations are read from their own threads; the lock keeps them to one query at a time
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def organization(self, org_name):
+        """
+        Returns {"login", "refreshed_at", "full_refresh_at"} for an organization, or None.
+        """
+        row = self._db.execute("SELECT * FROM organizations WHERE org = ?", (org_name.lower(),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def count(self, org_name):
+        return self._db.execute(
+            "SELECT COUNT(*) FROM repositories WHERE org = ?", (org_name.lower(),)
+        ).fetchone()[0]
+
+    def repositories(self, org_name):
+        """
+        Returns the SnapshotRepository objects of an organization.
+        """
+        rows = self._db.execute("SELECT data FROM repositories WHERE org = ? ORDER BY name_lower", (org_name.lower(),))
+        return [SnapshotRepository(json.loads(row["data"])) for row in rows]
+
+    def inventory(self, org_name):
+        """
+        Returns a SnapshotInventory of the organization, or raises
+        LookupError when the snapshot does not cover it.
+        """
+        with self._lock:
+            organization = self.organization(org_name)
+            if organization is None:
+                raise LookupError(f"Organization '{org_name}' is not in snapshot {self.path}")
+            return SnapshotInventory(organization["login"], self.repositories(org_name))
+
+    def _watermarks(self, org_name):
+        row = self._db.execute(
+            "SELECT MAX(updated_at), MAX(pushed_at) FROM repositories WHERE org = ?", (org_name.lower(),)
+        ).fetchone()
+        return row[0], row[1]
+
+    def _store(self, org_name, repos):
+        rows = []
+        for repo in repos:
+            # Listing attributes only, without fetching every repository in full
+            data = _listing_data(repo)
+            rows.append((
+                org_name.lower(),
+                data["name"].lower(),
+                data["name"],
+                data.get("id"),
+                data.get("private"),
+                data.get("visibility"),
+                data.get("archived"),
+                data.get("fork"),
+                json.dumps(data.get("topics") or []),
+                data.get("updated_at"),
+                data.get("pushed_at"),
+                json.dumps(data),
+            ))
+        self._db.executemany(
+            "INSERT OR REPLACE INTO repositories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        return len(rows)
+
+    def _changed_since(self, org, sort, field, watermark):
+        # Sorted newest first, so the first repository older than the watermark ends the listing
+        listing = org.get_repos(type="all", sort=sort, direction="desc")
+        page_number = 0
+        while True:
+            page = listing.get_page(page_number)
+            for repo in page:
+                if (_listing_data(repo).get(field) or "") < watermark:
+                    return
+                yield repo
+            if len(page) < PER_PAGE:
+                return
+            page_number += 1
+
+    def refresh(self, org, inventory, workers=1, full=False, full_refresh_hours=None):
+        """
+        Brings the snapshot of an organization up to date. inventory is the
+        organization's ghrm.inventory.Inventory, used to list it in full.
+        The refresh is a full one when full is True, when the organization
+        is new to the snapshot, or when its last full refresh is more than
+        full_refresh_hours old.
+
+        Returns (mode, changed, removed, renamed): mode is "full" or
+        "incremental", changed the number of repositories stored, removed
+        the number dropped from the snapshot and renamed the number stored
+        under a new name.
+        """
+        org_name = org.login
+        previous = self.organization(org_name)
+        updated_watermark, pushed_watermark = self._watermarks(org_name)
+        now = time.time()
+        if previous is not None and full_refresh_hours is not None:
+            full = full or now - (previous["full_refresh_at"] or 0) >= full_refresh_hours * 3600
+
+        # Without the private repository count, deletions cannot be told from an incremental listing
+        known_count = org.total_private_repos is not None
+        if not full and known_count and previous is not None and updated_watermark is not None:
+            changed = {}
+            for sort, field, watermark in (
+                ("updated", "updated_at", updated_watermark),
+                ("pushed", "pushed_at", pushed_watermark or ""),
+            ):
+                for repo in self._changed_since(org, sort, field, watermark):
+                    changed[repo.name.lower()] = repo
+            # Repositories as new as the watermark are read again in case they changed within that second
+            for row in self._db.execute(
+                "SELECT name_lower, data FROM repositories WHERE org = ? AND (updated_at >= ? OR pushed_at >= ?)",
+                (org_name.lower(), updated_watermark, pushed_watermark or "")
+            ):
+                repo = changed.get(row["name_lower"])
+                if repo is not None and json.loads(row["data"]) == _listing_data(repo):
+                    del changed[row["name_lower"]]
+            with self._db:
+                # A repository listed under a new name replaces the row of its old one
+                renamed = self._db.executemany(
+                    "DELETE FROM repositories WHERE org = ? AND id = ? AND name_lower != ?",
+                    [(org_name.lower(), _listing_data(repo).get("id"), name) for name, repo in changed.items()]
+                ).rowcount
+                stored = self._store(org_name, changed.values())
+                self._db.execute(
+                    "UPDATE organizations SET refreshed_at = ?, login = ? WHERE org = ?",
+                    (now, org_name, org_name.lower())
+                )
+            expected = (org.public_repos or 0) + org.total_private_repos
+            if self.count(org_name) == expected:
+                return "incremental", stored, 0, max(renamed, 0)
+
+        inventory.load(workers=workers)
+        repos = inventory.repositories()
+        names = {repo.name.lower() for repo in repos}
+        ids = {_listing_data(repo).get("id") for repo in repos}
+        with self._db:
+            known = self._db.execute(
+                "SELECT name_lower, id FROM repositories WHERE org = ?", (org_name.lower(),)
+            ).fetchall()
+            removed = [name for name, _ in known if name not in names]
+            # A repository missing under its old name but listed with its id was renamed
+            renamed = sum(1 for name, repo_id in known if name not in names and repo_id in ids)
+            self._db.executemany(
+                "DELETE FROM repositories WHERE org = ? AND name_lower = ?",
+                [(org_name.lower(), name) for name in removed]
+            )
+            stored = self._store(org_name, repos)
+            self._db.execute(
+                "INSERT OR REPLACE INTO organizations VALUES (?, ?, ?, ?)", (org_name.lower(), org_name, now, now)
+            )
+        return "full", stored, len(removed) - renamed, renamed
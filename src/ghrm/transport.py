@@ -0,0 +1,300 @@
+# transport.py - Shared HTTP transport for the GitHub client and webhooks
+
+import hashlib
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from urllib3.exceptions import NewConnectionError
+from github.Requester import Requester, RequestsResponse
+from .auth import take_selected
+from .metrics import metrics
+
+# PyGithub's default connection classes keep the pending request on the
+# connection object and share that object between threads, so two workers
+# can end up sending each other's requests. The classes below keep pending
+# requests per thread and share one pooled session per host instead.
+# Webhook posts go through the same sessions.
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_pool_size = requests.adapters.DEFAULT_POOLSIZE
+_timeout = None
+_response_cache = None
+_rate_limiter = None
+
+# Request headers that make GitHub return a different representation
+_VARY_HEADERS = ("Accept", "Authorization", "X-GitHub-Api-Version")
+_CONDITIONAL_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+
+def _mount(session, protocol, retry, pool_size):
+    prefix = f"{protocol}://"
+    replaced = session.adapters.get(prefix)
+    adapter = requests.adapters.HTTPAdapter(
+        max_retries=retry if retry is not None else requests.adapters.DEFAULT_RETRIES,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+    )
+    session.mount(prefix, adapter)
+    if replaced is not None:
+        # Idle connections of the old pool are closed now; those in use are closed once released
+        replaced.close()
+
+
+def timeout_from_env():
+    """
+    Returns the (connect, read) timeout of outbound requests.
+
+    GHRM_HTTP_TIMEOUT sets the read timeout in seconds (default 30);
+    connecting is given at most 5 seconds of it.
+    """
+    try:
+        read_timeout = float(os.getenv("GHRM_HTTP_TIMEOUT", str(DEFAULT_READ_TIMEOUT)))
+    except ValueError:
+        raise EnvironmentError("GHRM_HTTP_TIMEOUT must be a number") from None
+    if read_timeout <= 0:
+        raise EnvironmentError("GHRM_HTTP_TIMEOUT must be greater than zero")
+    return min(DEFAULT_CONNECT_TIMEOUT, read_timeout), read_timeout
+
+
+def request_timeout():
+    """
+    Returns the (connect, read) timeout every request is sent with.
+    """
+    global _timeout
+
+    if _timeout is None:
+        _timeout = timeout_from_env()
+    return _timeout
+
+
+def connection_timeout(timeout=None):
+    """
+    Returns the (connect, read) timeout of a connection whose client asked
+    for a read timeout of timeout seconds. GHRM_HTTP_TIMEOUT overrides it.
+    """
+    if timeout is None or os.getenv("GHRM_HTTP_TIMEOUT"):
+        return request_timeout()
+    return min(DEFAULT_CONNECT_TIMEOUT, timeout), timeout
+
+
+def get_session(protocol, host, port, retry=None):
+    """
+    Returns the shared session for a host, creating it on first use.
+    """
+    key = (protocol, host, port)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            # A non-None auth disables requests' fallback to ~/.netrc
+            session.auth = Requester.noopAuth
+            _mount(session, protocol, retry, _pool_size)
+            session.ghrm_retry = retry
+            _sessions[key] = session
+        return session
+
+
+def session_for(url):
+    """
+    Returns the shared session for the host of a URL, e.g. a webhook.
+    """
+    parts = urlsplit(url)
+    return get_session(parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+
+
+def set_pool_size(pool_size):
+    """
+    Resizes the connection pools so every worker can hold a connection.
+    """
+    global _pool_size
+
+    with _sessions_lock:
+        _pool_size = max(int(pool_size), requests.adapters.DEFAULT_POOLSIZE)
+        for (protocol, _, _), session in _sessions.items():
+            _mount(session, protocol, session.ghrm_retry, _pool_size)
+
+
+def _was_sent(error):
+    # Only a failure to connect proves GitHub never saw the request
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return not isinstance(reason, NewConnectionError)
+
+
+def _cache_key(url, headers, credential=None):
+    # Hash the credential so the cache never stores tokens. The credentials
+    # of a pool take turns, so their responses are cached under the pool.
+    if credential is not None:
+        headers = dict(headers, Authorization=credential.pool.identity)
+    vary = "\n".join(f"{name}: {headers.get(name, '')}" for name in _VARY_HEADERS)
+    return f"{url}\n{hashlib.sha256(vary.encode()).hexdigest()}"
+
+
+class CachedResponse:
+    """
+    Replays a cached 200 response after GitHub answered 304 Not Modified.
+    """
+
+    def __init__(self, entry, not_modified_headers):
+        self.status = 200
+        # Keep the cached entity headers but take rate-limit and date headers from the 304
+        self.headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+        self.headers.update(not_modified_headers)
+        self.body = entry["body"]
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self):
+        return self.body
+
+    def iter_content(self, chunk_size=1):
+        data = self.body.encode()
+        chunk_size = chunk_size or len(data) or 1
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+
+class _ThreadSafeConnection:
+    protocol = None
+    default_port = None
+
+    def __init__(self, host, port=None, timeout=None, retry=None, **kwargs):
+        # The pool size PyGithub passes is ignored; pools are sized for --workers by set_pool_size
+        self.host = host
+        self.port = port if port else self.default_port
+        self.timeout = connection_timeout(timeout)
+        self.verify = kwargs.get("verify", True)
+        self.session = get_session(self.protocol, self.host, self.port, retry)
+        self._pending = threading.local()
+
+    def request(self, verb, url, body, headers, stream=False):
+        self._pending.request = (verb, url, body, headers, stream)
+
+    def getresponse(self):
+        verb, url, data, headers, stream = self._pending.request
+        self._pending.request = None
+        credential = take_selected()
+        full_url = f"{self.protocol}://{self.host}:{self.port}{url}"
+
+        # PyGithub sends its own validators when refreshing an object; leave those alone
+        cache = _response_cache
+        if cache is None or verb != "GET" or stream or any(h in headers for h in _CONDITIONAL_HEADERS):
+            cache = None
+        entry = None
+        if cache is not None:
+            key = _cache_key(full_url, headers, credential)
+            entry = cache.get(key)
+            if entry is not None:
+                headers = dict(headers)
+                if entry["etag"]:
+                    headers["If-None-Match"] = entry["etag"]
+                if entry["last_modified"]:
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self._send(verb, full_url, data, headers, stream, credential)
+
+        if cache is not None:
+            if response.status_code == 304 and entry is not None:
+                return CachedResponse(entry, response.headers)
+            if response.status_code == 200:
+                cache.put(
+                    key,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    dict(response.headers),
+                    response.text,
+                )
+        return RequestsResponse(response)
+
+    def _send(self, verb, url, data, headers, stream, credential=None):
+        # Requests authenticated by a credential pool are paced by their credential's own limiter
+        limiter = credential.limiter if credential is not None else _rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                waited = time.perf_counter()
+                limiter.acquire(verb, url)
+                metrics.record_wait(time.perf_counter() - waited)
+            started = time.perf_counter()
+            try:
+                response = self.session.request(
+                    verb,
+                    url,
+                    headers=headers,
+                    data=data,
+                    timeout=self.timeout,
+                    verify=self.verify,
+                    allow_redirects=False,
+                    stream=stream,
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.record_request("github", verb, url, None, time.perf_counter() - started, credential=credential)
+                delay = limiter.retry_after_error(verb, attempt, _was_sent(e)) if limiter is not None else None
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            metrics.record_request(
+                "github", verb, url, response.status_code, time.perf_counter() - started, response.headers, credential
+            )
+
+            if limiter is None:
+                return response
+            body = response.text if response.status_code in (403, 429) else ""
+            delay = limiter.observe(verb, response.status_code, response.headers, body, attempt)
+            if delay is None:
+                return response
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+            if credential is not None:
+                # Retry with whichever credential of the pool is least constrained now
+                credential = credential.pool.select()
+                limiter = credential.limiter
+                headers = dict(headers, Authorization=credential.authorization())
+
+    def close(self):
+        # Sessions are shared between connections and live for the whole process
+        pass
+
+
+class HTTPConnection(_ThreadSafeConnection):
+    protocol = "http"
+    default_port = 80
+
+
+class HTTPSConnection(_ThreadSafeConnection):
+    protocol = "https"
+    default_port = 443
+
+
+def install(response_cache=None, rate_limiter=None):
+    """
+    Makes PyGithub use the thread-safe connection classes.
+
+    When a response cache is given, GET requests are sent as conditional
+    requests and 304 responses, which do not count against the rate limit,
+    are answered from the cache. When a rate limiter is given, every request
+    waits for it and rate-limited or failed requests are retried through it.
+    """
+    global _response_cache, _rate_limiter
+
+    _response_cache = response_cache
+    _rate_limiter = rate_limiter
+    Requester.injectConnectionClasses(HTTPConnection, HTTPSConnection)
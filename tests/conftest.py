@@ -0,0 +1,144 @@
+"""Shared fixtures: GitHub object stand-ins, a fake GitHub served in-process and a ghrm runner."""
+import importlib.util
+import itertools
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+import pytest
+from ghrm.inventory import PER_PAGE
+
+HERE = os.path.dirname(__file__)
+
+_ids = itertools.count(1)
+
+def _make_repo(name="repo1", **attributes):
+    """Build a listed repository stand-in; raw_data holds the listing data its attributes come from."""
+    data = {
+        "id": next(_ids), "name": name, "description": "Example", "homepage": None, "private": True,
+        "visibility": "private", "archived": False, "fork": False, "has_wiki": True, "topics": [],
+        "updated_at": "2024-01-01T00:00:00Z", "pushed_at": attributes.get("updated_at", "2024-01-01T00:00:00Z"),
+        **attributes,
+    }
+    return SimpleNamespace(raw_data=data, **data)
+
+class FakeListing:
+    """Paginated listing stand-in; the org records every page read."""
+
+    def __init__(self, org, repos):
+        self.org = org
+        self.repos = repos
+
+    def __iter__(self):
+        return iter(self.repos)
+
+    def get_page(self, page):
+        self.org.pages.append(page)
+        return self.repos[page * PER_PAGE:(page + 1) * PER_PAGE]
+
+class FakeOrg:
+    """
+    Organization stand-in listing its repositories like GitHub and counting
+    list calls. Its private repository count follows the repositories unless
+    `counted` freezes it, and is None without count_visible, as for a token
+    that cannot see it.
+    """
+    login = "acme"
+    public_repos = 0
+
+    def __init__(self, repos, count_visible=True):
+        self.repos = list(repos)
+        self.count_visible = count_visible
+        self.counted = None
+        self.list_calls = 0
+        self.pages = []
+
+    @property
+    def total_private_repos(self):
+        if not self.count_visible:
+            return None
+        return self.counted if self.counted is not None else len(self.repos)
+
+    def get_repos(self, type=None, sort=None, direction=None):
+        self.list_calls += 1
+        repos = self.repos
+        if sort is not None:
+            field = {"updated": "updated_at", "pushed": "pushed_at"}[sort]
+            repos = sorted(repos, key=lambda repo: repo.raw_data[field], reverse=direction == "desc")
+        return FakeListing(self, repos)
+
+class FakeInventory:
+    """Inventory stand-in answering from its organization's repositories, counting full loads."""
+
+    def __init__(self, org):
+        self.org = org
+        self.loads = 0
+
+    def load(self, workers=1):
+        self.loads += 1
+
+    def repositories(self):
+        return list(self.org.repos)
+
+    def get(self, repo_name):
+        return True, next((repo for repo in self.org.repos if repo.name.lower() == repo_name.lower()), None)
+
+@pytest.fixture
+def make_repo():
+    """Factory of listed repository stand-ins."""
+    return _make_repo
+
+@pytest.fixture
+def make_org():
+    """Factory of organization stand-ins."""
+    return FakeOrg
+
+@pytest.fixture
+def make_inventory():
+    """Factory of inventory stand-ins over an organization stand-in."""
+    return FakeInventory
+
+def load_fake_github():
+    path = os.path.join(HERE, "..", "benchmarks", "fake_github.py")
+    spec = importlib.util.spec_from_file_location("fake_github", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def github():
+    """A fake GitHub serving the acme and beta organizations, and its URL."""
+    fake_github = load_fake_github()
+    state = fake_github.FakeGitHub(["acme", "beta"])
+    server = fake_github.serve(state)
+    yield state, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+@pytest.fixture
+def ghrm_process(github, tmp_path):
+    """Runs ghrm against the fake GitHub with ndjson output; returns its returncode, records and stderr."""
+    _, url = github
+    env = {
+        **os.environ, "PYTHONPATH": os.path.join(HERE, "..", "src"), "GITHUB_API_URL": url, "GITHUB_TOKEN": "x",
+        "GITHUB_ORG": "acme", "GHRM_CACHE_DIR": str(tmp_path / "cache"), "GHRM_POINTS_PER_MINUTE": "1000000",
+    }
+
+    def run(*args):
+        completed = subprocess.run(
+            [sys.executable, "-m", "ghrm", *args, "--output", "ndjson"],
+            env=env, capture_output=True, text=True, timeout=60, check=False
+        )
+        records = [json.loads(line) for line in completed.stdout.splitlines()]
+        return SimpleNamespace(returncode=completed.returncode, records=records, stderr=completed.stderr)
+
+    return run
+
+@pytest.fixture
+def ghrm(ghrm_process):
+    """Runs ghrm against the fake GitHub and returns its ndjson result records as (name, result) pairs."""
+    def run(*args):
+        records = ghrm_process(*args).records
+        return [(record["name"], record["result"]) for record in records if record["type"] == "result"]
+
+    return run
@@ -0,0 +1,51 @@
+"""Tests for credential pools."""
+import time
+import pytest
+from github import Auth
+from ghrm.auth import Credential, CredentialPool, credential_pool_from_env, take_selected
+from ghrm.ratelimit import RateLimiter
+
+def _pool(*names):
+    return CredentialPool([Credential(name, Auth.Token(name), RateLimiter(name=name)) for name in names])
+
+def test_pool_rotates_credentials():
+    """Requests take turns across the credentials of a pool."""
+    pool = _pool("a", "b", "c")
+    headers = []
+    for _ in range(6):
+        request = {}
+        pool.authentication(request)
+        headers.append(request["Authorization"])
+        assert take_selected().name == request["Authorization"].split()[-1]
+    assert headers == ["token a", "token b", "token c"] * 2
+    assert take_selected() is None
+
+def test_pool_skips_constrained_credentials():
+    """Paused credentials and credentials low on quota are passed over."""
+    pool = _pool("a", "b", "c")
+    pool.credentials[0].limiter._paused_until = time.time() + 60
+    pool.credentials[1].limiter.observe("GET", 200, {
+        "X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(int(time.time()) + 600)
+    }, "", attempt=0)
+    assert {pool.select().name for _ in range(4)} == {"c"}
+
+    # With every credential constrained, the one with the most quota left is used
+    pool.credentials[2].limiter._paused_until = time.time() + 60
+    assert pool.select().name == "b"
+
+def test_pool_from_env_splits_tokens(monkeypatch):
+    """GITHUB_TOKEN may list several tokens; none of them ends up in names."""
+    monkeypatch.setenv("GITHUB_TOKEN", "first, second")
+    monkeypatch.delenv("GITHUB_APP_ID", raising=False)
+    pool = credential_pool_from_env("acme")
+    assert len(pool.credentials) == 2
+    assert not pool.uses_apps
+    assert all("first" not in c.name and "second" not in c.name for c in pool.credentials)
+    assert pool.identity == _pool(*(c.name for c in pool.credentials)).identity
+
+def test_pool_from_env_requires_a_credential(monkeypatch):
+    """Without a token or an app there is nothing to authenticate with."""
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_APP_ID", raising=False)
+    with pytest.raises(EnvironmentError):
+        credential_pool_from_env("acme")
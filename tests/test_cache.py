@@ -0,0 +1,35 @@
+"""Tests for the on-disk response cache."""
+import os
+import time
+from ghrm.cache import ResponseCache
+
+def test_response_cache_round_trip(tmp_path):
+    """Stored entries come back with their validators."""
+    cache = ResponseCache(str(tmp_path), 1024 * 1024)
+    cache.put("GET /orgs/acme", '"abc"', None, {"ETag": '"abc"'}, '{"login": "acme"}')
+
+    entry = cache.get("GET /orgs/acme")
+    assert entry["etag"] == '"abc"'
+    assert entry["body"] == '{"login": "acme"}'
+    assert cache.get("GET /orgs/other") is None
+
+def test_response_cache_skips_responses_without_validators(tmp_path):
+    """Responses without ETag or Last-Modified cannot be revalidated."""
+    cache = ResponseCache(str(tmp_path), 1024 * 1024)
+    cache.put("key", None, None, {}, "body")
+    assert cache.get("key") is None
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    """Going over the size cap evicts the entries read least recently."""
+    cache = ResponseCache(str(tmp_path), 600)
+    for index in range(3):
+        cache.put(f"key-{index}", f'"{index}"', None, {}, "x" * 100)
+        # Spread mtimes so LRU order does not depend on filesystem timestamp resolution
+        path = cache._path(f"key-{index}")
+        os.utime(path, (time.time() - 100 + index, time.time() - 100 + index))
+    cache.get("key-0")
+    cache.put("key-3", '"3"', None, {}, "x" * 100)
+
+    assert cache.get("key-0") is not None
+    assert cache.get("key-1") is None
+    assert cache.get("key-3") is not None
@@ -0,0 +1,48 @@
+"""Tests for lazy connection and cached credential validation."""
+import importlib
+import time
+import pytest
+from ghrm import credentials
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep validation records out of the user's cache directory."""
+    monkeypatch.setenv("GHRM_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+def test_validation_is_cached_per_token_and_org():
+    """A validated pair is trusted, with the org's login; other tokens and orgs are not."""
+    credentials.mark_validated("https://api.github.com", "token-a", "acme", "Acme")
+
+    assert credentials.validated_login("https://api.github.com", "token-a", "acme", ttl=60) == "Acme"
+    assert credentials.validated_login("https://api.github.com", "token-b", "acme", ttl=60) is None
+    assert credentials.validated_login("https://api.github.com", "token-a", "other", ttl=60) is None
+
+def test_validation_expires_after_ttl(monkeypatch):
+    """Validation older than the TTL is ignored."""
+    credentials.mark_validated("https://api.github.com", "token-a", "acme", "acme")
+    monkeypatch.setattr(time, "time", lambda: 10 ** 12)
+    assert credentials.validated_login("https://api.github.com", "token-a", "acme", ttl=60) is None
+
+def test_validation_cache_never_stores_the_token(cache_dir):
+    """Only a hash of the token reaches the disk."""
+    credentials.mark_validated("https://api.github.com", "secret-token", "acme", "acme")
+    for path in cache_dir.rglob("*"):
+        if path.is_file():
+            assert "secret-token" not in path.read_text()
+
+def test_importing_repository_module_does_not_connect(monkeypatch):
+    """Importing the module needs neither credentials nor network access."""
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.delenv("GITHUB_ORG", raising=False)
+    repository = importlib.import_module("ghrm.repository")
+    assert repository._org is None
+
+def test_installation_is_cached_per_app_and_org():
+    """An app's installation id is remembered per organization until the TTL runs out."""
+    credentials.mark_installation("https://api.github.com", "42", "acme", 7)
+
+    assert credentials.cached_installation("https://api.github.com", "42", "acme", ttl=60) == 7
+    assert credentials.cached_installation("https://api.github.com", "42", "other", ttl=60) is None
+    assert credentials.cached_installation("https://api.github.com", "43", "acme", ttl=60) is None
+    assert credentials.cached_installation("https://api.github.com", "42", "acme", ttl=0) is None
@@ -0,0 +1,97 @@
+"""Tests for the two-phase decommission plan."""
+import pytest
+from ghrm.decommission import DecommissionState, batches, plan_decommission
+from ghrm.journal import ApplyJournal
+
+def stages(plan):
+    return {repo_name: stage for repo_name, stage, _ in plan}
+
+def test_plan_moves_repositories_through_both_phases(tmp_path, make_repo, make_org, make_inventory):
+    """Repositories are archived first and only deleted once their grace period is over."""
+    state = DecommissionState(ApplyJournal(str(tmp_path / "state.jsonl")))
+    inventory = make_inventory(make_org([make_repo("old"), make_repo("gone-soon", archived=True)]))
+    assert stages(plan_decommission(["old", "gone-soon", "absent"], inventory, state, 24)) == {
+        "old": "archive", "gone-soon": "archive", "absent": "missing"
+    }
+
+    state.mark_archived("old")
+    state.mark_archived("gone-soon")
+    inventory.get("old")[1].archived = True
+    archived_at = state.archived_at("old")
+    assert stages(plan_decommission(["old"], inventory, state, 24, now=archived_at + 3600)) == {"old": "waiting"}
+    assert stages(plan_decommission(["old"], inventory, state, 24, now=archived_at + 24 * 3600)) == {"old": "delete"}
+
+    state.mark_deleted("gone-soon")
+    assert stages(plan_decommission(["gone-soon"], inventory, state, 24)) == {"gone-soon": "decommissioned"}
+
+def test_plan_keeps_repositories_unarchived_during_grace(tmp_path, make_repo, make_org, make_inventory):
+    """Unarchiving a repository within its grace period stops its deletion."""
+    path = str(tmp_path / "state.jsonl")
+    state = DecommissionState(ApplyJournal(path))
+    state.mark_archived("api")
+    state.close()
+
+    # State survives between runs
+    state = DecommissionState(ApplyJournal(path))
+    inventory = make_inventory(make_org([make_repo("api")]))
+    assert stages(plan_decommission(["API"], inventory, state, 0)) == {"API": "unarchived"}
+
+def test_batches():
+    assert batches(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    assert batches([], 2) == []
+
+@pytest.fixture
+def decommission(ghrm, tmp_path):
+    """Runs `ghrm decommission` on a config listing repo_names."""
+    def run(repo_names, *args):
+        config = tmp_path / "retired.yaml"
+        config.write_text("repositories:\n" + "".join(f"  - {repo_name}\n" for repo_name in repo_names))
+        return ghrm("decommission", "--config", str(config), *args)
+
+    return run
+
+def test_cli_decommissions_across_runs(github, decommission):
+    """Reruns archive, wait, reset unarchived repositories and delete without a grace period."""
+    state, _ = github
+    for repo_name in ("old", "kept"):
+        state.add_repo(repo_name, {}, "acme")
+
+    assert sorted(decommission(["old", "kept", "absent"])) == [
+        ("absent", "missing"), ("kept", "archived"), ("old", "archived")
+    ]
+    assert sorted(decommission(["old", "kept"])) == [("kept", "waiting"), ("old", "waiting")]
+
+    # Unarchived within its grace period: kept, and archived again with a new grace period on the next run
+    state.repos["acme"]["kept"]["attrs"]["archived"] = False
+    assert sorted(decommission(["old", "kept"], "--grace-hours", "0")) == [
+        ("kept", "unarchived"), ("old", "deleted")
+    ]
+    assert decommission(["kept"]) == [("kept", "archived")]
+    assert decommission(["old"]) == [("old", "decommissioned")]
+
+def test_cli_deletes_without_grace_in_the_same_run(github, decommission):
+    """With --grace-hours 0, archived repositories are deleted by the run that archived them."""
+    state, _ = github
+    state.add_repo("old", {}, "acme")
+    assert decommission(["old"], "--grace-hours", "0") == [("old", "archived"), ("old", "deleted")]
+    assert not state.repos["acme"]
+
+def test_cli_stops_deletions_after_a_failed_batch(github, decommission):
+    """A batch with failures leaves the later batches waiting for the next run."""
+    state, _ = github
+    repo_names = [f"old-{index}" for index in range(6)]
+    for repo_name in repo_names:
+        state.add_repo(repo_name, {"archived": True}, "acme")
+    decommission(repo_names)
+
+    state.protected.add("old-0")
+    assert decommission(repo_names, "--grace-hours", "0", "--batch-size", "2", "--workers", "1") == [
+        ("old-0", "failed"), ("old-1", "deleted"),
+        ("old-2", "waiting"), ("old-3", "waiting"), ("old-4", "waiting"), ("old-5", "waiting"),
+    ]
+
+    state.protected.clear()
+    assert sorted(decommission(repo_names, "--grace-hours", "0")) == [
+        ("old-0", "deleted"), ("old-1", "decommissioned"), ("old-2", "deleted"),
+        ("old-3", "deleted"), ("old-4", "deleted"), ("old-5", "deleted"),
+    ]
@@ -0,0 +1,58 @@
+"""Tests for digest notifications."""
+from ghrm.notifications.digest import (
+    Digest,
+    DISCORD_MAX_EMBEDS,
+    DISCORD_MAX_FIELDS,
+    DISCORD_MAX_FIELD_VALUE,
+    DISCORD_MAX_MESSAGE_CHARS,
+    SLACK_MAX_BLOCKS,
+    SLACK_MAX_SECTION_TEXT
+)
+
+def make_digest(created, errors=0):
+    """Build a digest with the given number of events."""
+    digest = Digest("GitHub Manager: create")
+    for i in range(created):
+        digest.add("Repository Created", {"Repository": f"service-{i:05d}", "Description": "Example"})
+    for i in range(errors):
+        digest.add("Error Occurred", {"Action": "create", "Repository": f"broken-{i}", "Error": "boom"}, "error")
+    return digest
+
+def test_digest_summary_puts_errors_first():
+    """The summary line counts each kind of event."""
+    assert make_digest(3, errors=1).summary() == "Error Occurred: 1, Repository Created: 3"
+
+def test_slack_digest_respects_block_limits():
+    """Large runs are split into messages within Slack's limits."""
+    payloads = make_digest(20000).slack_payloads()
+
+    assert len(payloads) > 1
+    for payload in payloads:
+        assert len(payload["blocks"]) <= SLACK_MAX_BLOCKS
+        for block in payload["blocks"]:
+            assert len(block["text"]["text"]) <= SLACK_MAX_SECTION_TEXT
+
+def test_discord_digest_respects_embed_limits():
+    """Large runs are split into messages within Discord's limits."""
+    payloads = make_digest(5000, errors=30).discord_payloads()
+
+    names = []
+    for payload in payloads:
+        assert len(payload["embeds"]) <= DISCORD_MAX_EMBEDS
+        total = 0
+        for embed in payload["embeds"]:
+            assert len(embed["fields"]) <= DISCORD_MAX_FIELDS
+            total += len(embed["title"])
+            for field in embed["fields"]:
+                assert len(field["value"]) <= DISCORD_MAX_FIELD_VALUE
+                total += len(field["name"]) + len(field["value"])
+                names.extend(field["value"].split("\n"))
+        assert total <= DISCORD_MAX_MESSAGE_CHARS
+
+    assert len(names) == 5030
+
+def test_digest_message_count_grows_with_chunks_not_repositories():
+    """A few thousand repositories fit in a handful of posts."""
+    digest = make_digest(2000)
+    assert len(digest.slack_payloads()) == 1
+    assert len(digest.discord_payloads()) < 20
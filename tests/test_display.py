@@ -0,0 +1,55 @@
+"""Tests for run progress output."""
+import io
+import json
+from rich.console import Console
+from ghrm.display import RecordWriter, RunProgress
+
+def make_console(terminal):
+    """A console writing to a buffer."""
+    return Console(file=io.StringIO(), force_terminal=terminal, width=120)
+
+def test_progress_prints_one_line_per_repo_without_terminal():
+    """CI logs get a compact line per repository."""
+    output = make_console(False)
+    with RunProgress("create", output=output) as progress:
+        progress.add("service-a", "created")
+        progress.add("service-b", "failed", "service-b: boom", "error")
+
+    lines = output.file.getvalue().splitlines()
+    assert lines == ["created    service-a", "failed     service-b: boom"]
+
+def test_progress_status_line_counts_outcomes_and_eta():
+    """The status line aggregates outcomes and shows an ETA once the total is known."""
+    progress = RunProgress("create", total=10, output=make_console(False))
+    progress.started -= 2
+    progress.skip("journaled")
+    for name in ("a", "b", "c", "d"):
+        progress.add(name, "created")
+
+    line = progress.status_line().plain
+    assert line.startswith("create: 5/10 · created 4 · journaled 1 · 2.0/s")
+    assert line.endswith("ETA 0:02")
+
+def test_live_progress_only_prints_errors():
+    """On a terminal, successful repositories only update the live line."""
+    output = make_console(True)
+    with RunProgress("delete", output=output) as progress:
+        for index in range(500):
+            progress.add(f"service-{index}", "deleted")
+        progress.add("broken", "failed", "broken: boom", "error")
+
+    text = output.file.getvalue()
+    assert "broken: boom" in text
+    assert "service-1" not in text
+
+def test_record_writer_flushes_one_json_object_per_line():
+    """Each record is a complete line as soon as it is written."""
+    stream = io.StringIO()
+    writer = RecordWriter(stream)
+    writer.write({"type": "result", "name": "service-a", "changes": ["private"]})
+    writer.write({"type": "summary", "total": 1})
+
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+        {"type": "result", "name": "service-a", "changes": ["private"]},
+        {"type": "summary", "total": 1},
+    ]
@@ -0,0 +1,64 @@
+"""Tests for the bounded worker pool."""
+import threading
+import time
+from ghrm.executor import run_tasks
+
+def test_run_tasks_returns_results_in_input_order():
+    """Results come back in input order regardless of completion order."""
+    def work(name, delay):
+        time.sleep(delay)
+        return name.upper()
+
+    items = [("a", {"delay": 0.03}), ("b", {"delay": 0.0}), ("c", {"delay": 0.01})]
+    results = run_tasks(work, items, workers=3)
+
+    assert [r.name for r in results] == ["a", "b", "c"]
+    assert [r.result for r in results] == ["A", "B", "C"]
+
+def test_run_tasks_captures_errors_per_item():
+    """A failing item does not abort the remaining items."""
+    def work(name):
+        if name == "bad":
+            raise RuntimeError("boom")
+        return "ok"
+
+    results = run_tasks(work, [("good", {}), ("bad", {}), ("other", {})], workers=2)
+
+    assert [r.result for r in results] == ["ok", None, "ok"]
+    assert str(results[1].error) == "boom"
+
+def test_run_tasks_bounds_concurrency():
+    """No more than `workers` calls run at the same time."""
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work(name):
+        with lock:
+            running.append(name)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(name)
+
+    run_tasks(work, ((str(i), {}) for i in range(20)), workers=4)
+
+    assert max(peak) <= 4
+
+def test_run_tasks_reports_each_result():
+    """on_result sees every item exactly once."""
+    seen = []
+    run_tasks(lambda name: name, [("x", {}), ("y", {})], workers=1, on_result=seen.append)
+    assert [r.name for r in seen] == ["x", "y"]
+
+def test_run_tasks_times_each_item():
+    """Each result carries the wall time of its call, failures included."""
+    def work(name, delay):
+        time.sleep(delay)
+        if name == "b":
+            raise RuntimeError("boom")
+
+    results = run_tasks(work, [("a", {"delay": 0.02}), ("b", {"delay": 0.01})], workers=2)
+
+    assert results[0].seconds >= 0.02
+    assert results[1].seconds >= 0.01 and results[1].error is not None
@@ -0,0 +1,89 @@
+"""Tests for the GraphQL read backend."""
+from types import SimpleNamespace
+from ghrm.graphql import GraphQLReader, rest_attributes
+from ghrm.inventory import Inventory
+
+class FakeRequester:
+    """Requester stand-in that answers GraphQL queries from a dict of nodes."""
+    base_url = "https://api.github.com"
+    graphql_url = "https://api.github.com/graphql"
+    is_not_lazy = True
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.queries = []
+
+    def requestJsonAndCheck(self, verb, url, input=None):
+        self.queries.append(input)
+        variables = input["variables"]
+        if "organization" in input["query"]:
+            names = sorted(self.nodes)
+            start = int(variables["after"] or 0)
+            end = start + variables["first"]
+            return {}, {"data": {"organization": {"repositories": {
+                "pageInfo": {"hasNextPage": end < len(names), "endCursor": str(end)},
+                "nodes": [self.nodes[name] for name in names[start:end]],
+            }}}}
+        data, errors = {}, []
+        for key, name in variables.items():
+            if key.startswith("n"):
+                data["r" + key[1:]] = self.nodes.get(name)
+                if name not in self.nodes:
+                    errors.append({"type": "NOT_FOUND", "path": ["r" + key[1:]]})
+        return {}, {"data": data, "errors": errors}
+
+def node(name, **fields):
+    """Build a GraphQL Repository node."""
+    return {"name": name, "nameWithOwner": f"acme/{name}", **fields}
+
+def make_reader(names):
+    requester = FakeRequester({name: node(name) for name in names})
+    return GraphQLReader(SimpleNamespace(requester=requester), "acme"), requester
+
+def test_graphql_fields_map_to_edit_arguments():
+    """GraphQL fields come back under the names repo.edit accepts."""
+    attributes = rest_attributes(node(
+        "api",
+        homepageUrl="https://example.com",
+        isPrivate=True,
+        visibility="INTERNAL",
+        defaultBranchRef={"name": "trunk"},
+        squashMergeAllowed=False,
+        isArchived=False
+    ))
+
+    assert attributes["homepage"] == "https://example.com"
+    assert attributes["private"] is True
+    assert attributes["visibility"] == "internal"
+    assert attributes["default_branch"] == "trunk"
+    assert attributes["allow_squash_merge"] is False
+    assert attributes["archived"] is False
+
+def test_fetch_batches_lookups_and_reports_missing():
+    """Dozens of repositories are read per query; missing ones map to None."""
+    reader, requester = make_reader([f"repo-{i}" for i in range(120)])
+    found = reader.fetch([f"repo-{i}" for i in range(110)] + ["ghost"])
+
+    assert len(requester.queries) == 3
+    assert found["ghost"] is None
+    assert found["repo-7"].name == "repo-7"
+    assert found["repo-7"].url == "https://api.github.com/repos/acme/repo-7"
+
+def test_list_repositories_follows_cursors():
+    """The whole org is listed 100 repositories per query."""
+    reader, requester = make_reader([f"repo-{i:03d}" for i in range(250)])
+
+    assert len(list(reader.list_repositories())) == 250
+    assert len(requester.queries) == 3
+
+def test_inventory_prefetch_answers_lookups():
+    """Prefetched names are answered without direct lookups."""
+    reader, requester = make_reader(["a", "b"])
+    org = SimpleNamespace(login="acme", public_repos=500, total_private_repos=0)
+    inventory = Inventory(org, reader=reader)
+    inventory.prefetch(["a", "missing"])
+
+    assert len(requester.queries) == 1
+    assert inventory.get("A")[1].name == "a"
+    assert inventory.get("missing") == (True, None)
+    assert inventory.get("b") == (False, None)
@@ -0,0 +1,60 @@
+"""Tests for the organization inventory."""
+import pytest
+from ghrm.inventory import Inventory
+
+@pytest.fixture
+def org_of(make_repo, make_org):
+    """Builds an organization stand-in holding repositories with the given names."""
+    return lambda names: make_org([make_repo(name) for name in names])
+
+def test_inventory_defers_listing_until_break_even(org_of):
+    """Small runs keep using direct lookups instead of listing the org."""
+    org = org_of([f"repo-{i}" for i in range(150)])
+    inventory = Inventory(org)
+
+    assert inventory.page_count() == 2
+    assert inventory.get("repo-1") == (False, None)
+    assert inventory.get("repo-2") == (False, None)
+    assert org.list_calls == 0
+
+    known, repo = inventory.get("REPO-3")
+    assert known and repo.name == "repo-3"
+    assert org.list_calls == 1
+
+def test_inventory_reports_missing_repositories(org_of):
+    """A loaded inventory is authoritative for repositories it does not contain."""
+    inventory = Inventory(org_of(["a"]))
+    inventory.load()
+    assert inventory.get("b") == (True, None)
+
+def test_inventory_tracks_created_and_deleted_repositories(org_of, make_repo):
+    """Repositories created or deleted during the run update the index."""
+    inventory = Inventory(org_of(["a"]))
+    inventory.load()
+    inventory.add(make_repo("b"))
+    inventory.discard("a")
+
+    assert inventory.get("b")[1].name == "b"
+    assert inventory.get("a") == (True, None)
+
+def test_inventory_lists_pages_concurrently(org_of):
+    """With workers, every page is fetched by number, including pages added since counting."""
+    org = org_of([f"repo-{i}" for i in range(250)])
+    org.counted = 150
+    inventory = Inventory(org)
+    inventory.load(workers=4)
+
+    assert sorted(org.pages) == [0, 1, 2]
+    assert len(inventory.repositories()) == 250
+
+def test_inventory_without_a_private_count(org_of):
+    """An unknown private repository count is not taken for zero."""
+    org = org_of([f"repo-{i}" for i in range(250)])
+    org.count_visible = False
+    inventory = Inventory(org)
+
+    assert inventory.page_count() is None
+    assert all(inventory.get(f"repo-{i}") == (False, None) for i in range(5))
+    inventory.load(workers=2)
+    assert sorted(org.pages) == [0, 1, 2, 3]
+    assert len(inventory.repositories()) == 250
@@ -0,0 +1,67 @@
+"""Tests for the apply journal."""
+from ghrm.journal import ApplyJournal, config_hash
+
+def test_config_hash_ignores_key_order():
+    """Equivalent configs hash the same; any change in desired state does not."""
+    assert config_hash("create", "API", {"a": 1, "b": 2}) == config_hash("create", "API", {"b": 2, "a": 1})
+    assert config_hash("create", "API", {"a": 1}) != config_hash("create", "API", {"a": 2})
+    assert config_hash("create", None, None) != config_hash("delete", None, None)
+
+def test_journal_survives_reopening(tmp_path):
+    """Recorded applies are read back, later lines win, and torn lines are skipped."""
+    path = tmp_path / "journal.jsonl"
+    journal = ApplyJournal(str(path))
+    journal.record("API", "one")
+    journal.record("web", "two")
+    journal.record("api", "three")
+    journal.forget("web")
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"repo": "do')
+
+    reopened = ApplyJournal(str(path))
+    assert reopened.is_current("api", "three")
+    assert not reopened.is_current("api", "one")
+    assert reopened.get("web") is None
+
+def test_journal_full_refresh_schedule(tmp_path):
+    """A full sweep is due until one is recorded, and again once the interval passes."""
+    journal = ApplyJournal(str(tmp_path / "journal.jsonl"))
+    assert journal.refresh_due(24)
+
+    journal.mark_full_refresh()
+    assert not journal.refresh_due(24)
+    assert journal.refresh_due(0)
+
+def test_journal_full_refresh_is_per_config(tmp_path):
+    """A full sweep of one config does not count for other configs of the organization."""
+    path = str(tmp_path / "journal.jsonl")
+    journal = ApplyJournal(path)
+    journal.mark_full_refresh("/configs/shard-a.yaml")
+    journal.close()
+
+    reopened = ApplyJournal(path)
+    assert not reopened.refresh_due(24, "/configs/shard-a.yaml")
+    assert reopened.refresh_due(24, "/configs/shard-b.yaml")
+
+def test_journal_compacts_stale_lines(tmp_path):
+    """Closing rewrites the journal once most of its lines are superseded."""
+    path = tmp_path / "journal.jsonl"
+    journal = ApplyJournal(str(path))
+    for attempt in range(10):
+        journal.record("api", str(attempt))
+    journal.close()
+
+    assert len(path.read_text().splitlines()) == 1
+    assert ApplyJournal(str(path)).is_current("api", "9")
+
+def test_checkpoint_discard_removes_file(tmp_path):
+    """A discarded checkpoint leaves nothing to resume from."""
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = ApplyJournal(str(path))
+    checkpoint.record("api", "one")
+    checkpoint.discard()
+    checkpoint.close()
+
+    assert not path.exists()
+    assert not ApplyJournal(str(path)).is_current("api", "one")
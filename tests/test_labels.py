@@ -0,0 +1,59 @@
+"""Tests for label sync planning."""
+import os
+from types import SimpleNamespace
+from ghrm.labels import CanonicalLabel, DEFAULT_COLOR, load_label_config, plan_labels
+
+LABELS_CONFIG = os.path.join(os.path.dirname(__file__), "..", "config", "labels.yaml")
+
+def label(name, color="ededed", description=""):
+    """Build a label stand-in."""
+    return SimpleNamespace(name=name, color=color, description=description)
+
+def operations(changes):
+    return sorted((change.operation, change.name) for change in changes)
+
+def test_load_label_config_reads_aliases():
+    """Every canonical label is its own first alias."""
+    labels = {canonical.name: canonical for canonical in load_label_config(LABELS_CONFIG)}
+    assert labels["bug"].aliases == ["bug", "error"]
+    assert labels["invalid"].aliases == ["invalid"]
+
+def test_plan_renames_aliases_and_creates_missing():
+    """Aliases are renamed to the canonical name; missing labels are created."""
+    labels = [
+        CanonicalLabel("bug", ["bug", "error"], None, None),
+        CanonicalLabel("docs", ["docs"], "0075CA", "Documentation"),
+    ]
+    changes = plan_labels([label("error", "ff0000")], labels)
+
+    assert operations(changes) == [("create", "docs"), ("update", "bug")]
+    create = [change for change in changes if change.operation == "create"][0]
+    assert (create.color, create.description) == ("0075CA", "Documentation")
+
+def test_plan_merges_leftover_aliases_and_only_prunes_on_request():
+    """Aliases of an existing canonical label are merged into it; unmanaged labels need prune."""
+    labels = [CanonicalLabel("bug", ["bug", "error"], None, None)]
+    existing = [label("Bug"), label("error"), label("wontfix")]
+
+    changes = plan_labels(existing, labels)
+    assert operations(changes) == [("merge", "bug"), ("update", "bug")]
+    assert [change.label.name for change in changes if change.operation == "merge"] == ["error"]
+    assert ("delete", "wontfix") in operations(plan_labels(existing, labels, prune=True))
+
+def test_plan_is_empty_when_in_sync():
+    """Repositories that already match need no calls."""
+    labels = [CanonicalLabel("bug", ["bug", "error"], None, None)]
+    assert plan_labels([label("bug", DEFAULT_COLOR)], labels) == []
+
+def test_sync_skips_archived_repositories(github, ghrm, tmp_path):
+    """Archived repositories named in --repos are read-only, so their labels are left alone."""
+    state, _ = github
+    state.add_repo("live", {}, "acme")
+    state.add_repo("old", {"archived": True}, "acme")
+    repos = tmp_path / "repos.yaml"
+    repos.write_text("repositories:\n  - live\n  - old\n")
+
+    assert sorted(ghrm("labels", "sync", "--config", LABELS_CONFIG, "--repos", str(repos))) == [
+        ("live", "synced"), ("old", "skipped")
+    ]
+    assert not state.repos["acme"]["old"]["labels"]
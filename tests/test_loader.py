@@ -0,0 +1,125 @@
+"""Tests for the streaming config loader."""
+import os
+import pytest
+import yaml
+from ghrm import loader
+from ghrm.loader import CompiledConfigCache, config_files, iter_config
+
+def test_mapping_and_list_layouts(tmp_path):
+    """Both layouts yield the same entries the old whole-file loader produced."""
+    config = tmp_path / "repositories.yaml"
+    config.write_text(
+        "repositories:\n"
+        "  api:\n"
+        "    description: API\n"
+        "    private: true\n"
+        "  web:\n"
+        "---\n"
+        "description: Shared\n"
+        "repositories:\n"
+        "  - docs\n"
+    )
+
+    entries = list(iter_config(str(config)))
+
+    assert [entry.name for entry in entries] == ["api", "web", "docs"]
+    assert entries[0].config == {"description": "API", "private": True}
+    assert entries[0].description == "API"
+    assert entries[1].config is None
+    assert entries[2].description == "Shared"
+
+def test_entries_name_their_organization(tmp_path):
+    """A top-level `organization` applies to its document; `org/name` entries override it."""
+    config = tmp_path / "repositories.yaml"
+    config.write_text(
+        "organization: acme\n"
+        "repositories:\n"
+        "  api: {}\n"
+        "  beta/web: {}\n"
+        "---\n"
+        "repositories:\n"
+        "  - docs\n"
+        "  - gamma/site\n"
+    )
+
+    entries = list(iter_config(str(config)))
+
+    assert [(entry.org, entry.name) for entry in entries] == [
+        ("acme", "api"), ("beta", "web"), (None, "docs"), ("gamma", "site")
+    ]
+
+def test_entries_must_be_mappings(tmp_path):
+    """A scalar in place of an entry's settings is a config error, not a crash."""
+    config = tmp_path / "repositories.yaml"
+    config.write_text("repositories:\n  api: true\n")
+
+    with pytest.raises(yaml.YAMLError, match="api"):
+        list(iter_config(str(config)))
+
+def test_selectors_are_entries(tmp_path):
+    """Each selector becomes an entry carrying its match mapping and settings."""
+    config = tmp_path / "repositories.yaml"
+    config.write_text(
+        "organization: acme\n"
+        "selectors:\n"
+        "  - match: {name: svc-*, topics: [python]}\n"
+        "    has_wiki: false\n"
+        "repositories:\n"
+        "  api: {}\n"
+    )
+
+    selector, api = list(iter_config(str(config)))
+
+    assert selector == (None, {"has_wiki": False}, None, "acme", {"name": "svc-*", "topics": ["python"]})
+    assert api.name == "api" and api.selector is None
+
+def test_entries_are_streamed(tmp_path):
+    """Entries before a syntax error are yielded before the error is raised."""
+    config = tmp_path / "repositories.yaml"
+    config.write_text("repositories:\n  api: {}\n  web: [\n")
+
+    entries = iter_config(str(config))
+    assert next(entries).name == "api"
+    with pytest.raises(Exception):
+        next(entries)
+
+def test_directory_and_glob_shards(tmp_path):
+    """Directories and globs expand to their YAML files in sorted order."""
+    (tmp_path / "b.yaml").write_text("repositories:\n  - two\n")
+    (tmp_path / "a.yml").write_text("repositories:\n  - one\n")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    assert [entry.name for entry in iter_config(str(tmp_path))] == ["one", "two"]
+    assert config_files(str(tmp_path / "*.yaml")) == [str(tmp_path / "b.yaml")]
+    with pytest.raises(FileNotFoundError):
+        config_files(str(tmp_path / "*.json"))
+
+def test_compiled_cache_skips_parsing_unchanged_files(tmp_path, monkeypatch):
+    """Unchanged files, even with a new mtime, are read from the compiled cache."""
+    config = tmp_path / "repositories.yaml"
+    config.write_text("repositories:\n  api:\n    private: true\n")
+    cache = CompiledConfigCache(str(tmp_path / "cache"))
+    (tmp_path / "cache").mkdir()
+    parsed = []
+    real_iter_file = loader._iter_file
+    monkeypatch.setattr(loader, "_iter_file", lambda path: parsed.append(path) or real_iter_file(path))
+
+    assert not cache.is_compiled(str(config))
+    first = list(iter_config(str(config), cache))
+    os.utime(config, (1, 1))
+    assert cache.is_compiled(str(config))
+    second = list(iter_config(str(config), cache))
+
+    assert first == second == [("api", {"private": True}, None, None, None)]
+    assert len(parsed) == 1
+
+def test_compiled_cache_invalidates_changed_files(tmp_path):
+    """Changing a file's content recompiles it."""
+    config = tmp_path / "repositories.yaml"
+    config.write_text("repositories:\n  - api\n")
+    cache = CompiledConfigCache(str(tmp_path))
+    list(iter_config(str(config), cache))
+
+    config.write_text("repositories:\n  - web\n")
+    os.utime(config, (1, 1))
+    assert [entry.name for entry in iter_config(str(config), cache)] == ["web"]
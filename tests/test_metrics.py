@@ -0,0 +1,62 @@
+"""Tests for run metrics."""
+import json
+from ghrm.metrics import Metrics, endpoint
+
+def headers(remaining, reset=1000, resource="core"):
+    """Rate-limit headers as GitHub sends them."""
+    return {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(reset),
+        "X-RateLimit-Resource": resource,
+    }
+
+def test_endpoint_templates_object_names():
+    """Endpoints are grouped by route rather than by repository."""
+    assert endpoint("https://api.github.com/repos/acme/service-a?per_page=100") == "/repos/{owner}/{repo}"
+    assert endpoint("https://ghe.example.com/api/v3/repos/acme/b/labels/bug%20fix") == "/repos/{owner}/{repo}/labels/{name}"
+    assert endpoint("https://api.github.com/orgs/acme/repos") == "/orgs/{org}/repos"
+
+def test_requests_latency_and_quota():
+    """Attempts are counted per status and the quota used is derived from the headers."""
+    metrics = Metrics()
+    metrics.record_request("github", "GET", "https://api.github.com/repos/acme/a", 200, 0.02, headers(4990))
+    metrics.record_request("github", "GET", "https://api.github.com/repos/acme/b", 404, 0.2, headers(4989))
+    metrics.record_request("github", "GET", "https://api.github.com/repos/acme/c", None, 3.0)
+
+    data = metrics.snapshot()
+
+    counts = {item["status"]: item["count"] for item in data["requests"]}
+    assert counts == {"200": 1, "404": 1, "error": 1}
+    [latency] = data["latency"]
+    assert latency["count"] == 3
+    assert latency["buckets"]["0.025"] == 1
+    assert latency["buckets"]["0.25"] == 2
+    assert latency["buckets"]["+Inf"] == 3
+    assert data["rate_limit"]["core"] == {"limit": 5000, "remaining": 4989, "reset": 1000, "used": 2}
+
+def test_quota_used_spans_window_reset():
+    """Usage from a window that reset during the run is kept."""
+    metrics = Metrics()
+    metrics.record_request("github", "GET", "https://api.github.com/user", 200, 0.01, headers(10, reset=1000))
+    metrics.record_request("github", "GET", "https://api.github.com/user", 200, 0.01, headers(4999, reset=4600))
+
+    assert metrics.snapshot()["rate_limit"]["core"]["used"] == 2
+
+def test_webhooks_keep_only_the_host(tmp_path):
+    """Webhook secrets never reach the metrics file."""
+    metrics = Metrics()
+    metrics.record_request("webhook", "POST", "https://hooks.slack.com/services/T0/B0/secret", 200, 0.1)
+    metrics.record_result("create", "created", 3)
+
+    path = tmp_path / "ghrm.prom"
+    metrics.write(str(path))
+    text = path.read_text()
+    assert "secret" not in text
+    assert 'ghrm_http_requests_total{kind="webhook",method="POST",endpoint="hooks.slack.com",status="200"} 1' in text
+    assert 'ghrm_run_repositories{action="create",outcome="created"} 3' in text
+
+    metrics.write(str(tmp_path / "ghrm.json"))
+    assert json.loads((tmp_path / "ghrm.json").read_text())["results"] == [
+        {"action": "create", "outcome": "created", "count": 3}
+    ]
@@ -0,0 +1,57 @@
+"""Tests for notification payloads and the background dispatcher."""
+import threading
+from types import SimpleNamespace
+from ghrm.notifications import dispatcher as dispatcher_module
+from ghrm.notifications.dispatcher import NotificationDispatcher
+from ghrm.notifications.slack import build_slack_payload
+from ghrm.notifications.discord import build_discord_embed
+
+def test_build_slack_payload():
+    """Details are rendered as Slack markdown with the status color."""
+    payload = build_slack_payload("Repository Created", {"Repository": "repo1"}, "success")
+    attachment = payload["attachments"][0]
+    assert attachment["color"] == "#36a64f"
+    assert attachment["text"] == "*Repository Created*\n*Repository*: repo1"
+
+def test_build_discord_embed():
+    """Details become inline embed fields."""
+    embed = build_discord_embed("Repository Deleted", {"Repository": "repo1"}, "warning")
+    assert embed["title"] == "GitHub Manager: Repository Deleted"
+    assert embed["color"] == 0xffff00
+    assert embed["fields"] == [{"name": "Repository", "value": "repo1", "inline": True}]
+
+def test_dispatcher_flush_delivers_in_order(monkeypatch):
+    """Queued payloads are posted in order per webhook before flush returns."""
+    posted = []
+
+    def fake_post(webhook_url, payload, max_retries):
+        posted.append((webhook_url, payload["n"]))
+        return SimpleNamespace(status_code=200)
+
+    monkeypatch.setattr(dispatcher_module, "post_webhook", fake_post)
+    dispatcher = NotificationDispatcher()
+    for n in range(20):
+        dispatcher.submit("https://hooks.example/a", {"n": n})
+    dispatcher.flush()
+
+    assert posted == [("https://hooks.example/a", n) for n in range(20)]
+
+def test_dispatcher_drops_when_buffer_is_full(monkeypatch):
+    """A full buffer drops new notifications instead of blocking forever."""
+    release = threading.Event()
+    posted = []
+
+    def slow_post(webhook_url, payload, max_retries):
+        release.wait()
+        posted.append(payload["n"])
+        return SimpleNamespace(status_code=200)
+
+    monkeypatch.setattr(dispatcher_module, "post_webhook", slow_post)
+    dispatcher = NotificationDispatcher(max_queue=1)
+    dispatcher.submit("https://hooks.example/b", {"n": 1})
+    dispatcher.submit("https://hooks.example/b", {"n": 2}, timeout=1)
+    dispatcher.submit("https://hooks.example/b", {"n": 3}, timeout=0.01)
+    release.set()
+    dispatcher.flush()
+
+    assert posted == [1, 2]
@@ -0,0 +1,50 @@
+"""Tests for repository settings diffing."""
+from ghrm.plan import diff_repository, edit_args, missing_attributes
+
+def test_diff_repository_no_changes(make_repo):
+    """Matching settings produce an empty diff."""
+    repo = make_repo()
+    assert diff_repository(repo, {"name": "repo1", "description": "Example", "private": True}) == {}
+
+def test_diff_repository_only_changed_fields(make_repo):
+    """Only fields that differ are returned."""
+    repo = make_repo()
+    changes = diff_repository(repo, {"name": "repo1", "private": False, "has_wiki": True})
+    assert changes == {"private": False}
+
+def test_diff_repository_ignores_create_only_args(make_repo):
+    """Create-only arguments never show up as changes."""
+    repo = make_repo()
+    config = {"auto_init": True, "gitignore_template": "Python", "license_template": "mit"}
+    assert diff_repository(repo, config) == {}
+    assert edit_args({**config, "private": True}) == {"private": True}
+
+def test_diff_repository_treats_empty_homepage_as_unset(make_repo):
+    """An empty homepage matches an unset one."""
+    repo = make_repo(homepage=None)
+    assert diff_repository(repo, {"homepage": ""}) == {}
+
+def test_diff_repository_keeps_unknown_args(make_repo):
+    """Arguments that cannot be compared are always sent."""
+    repo = make_repo()
+    assert diff_repository(repo, {"security_and_analysis": {}}) == {"security_and_analysis": {}}
+
+def test_diff_repository_can_leave_out_unknown_args(make_repo):
+    """Audits only report settings that can be read back."""
+    repo = make_repo()
+    changes = diff_repository(repo, {"security_and_analysis": {}, "has_wiki": False}, uncomparable=False)
+    assert changes == {"has_wiki": False}
+
+def test_diff_repository_only_reads_listed_attributes():
+    """Settings missing from a listed repository's data are not read, so no request is sent."""
+    class ListedRepository:
+        _rawData = {"name": "repo1", "has_wiki": True}
+
+        def __getattr__(self, name):
+            raise AssertionError(f"{name} would be fetched")
+
+    repo = ListedRepository()
+    repo.has_wiki = True
+    config = {"has_wiki": True, "allow_squash_merge": False}
+    assert missing_attributes(repo, config) == ["allow_squash_merge"]
+    assert diff_repository(repo, config, uncomparable=False) == {}
@@ -0,0 +1,58 @@
+"""Tests for request pacing and rate-limit backoff."""
+import time
+from ghrm.ratelimit import RateLimiter, TokenBucket, request_points
+
+def test_request_points():
+    """Reads cost one point and writes cost five."""
+    assert request_points("GET", "/repos/acme/repo1") == 1
+    assert request_points("POST", "/graphql") == 1
+    assert request_points("PATCH", "/repos/acme/repo1") == 5
+
+def test_token_bucket_reserves_ahead():
+    """An empty bucket tells the caller how long to wait."""
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket.reserve(1) == 0.0
+    assert 0.05 < bucket.reserve(1) <= 0.1
+
+def test_secondary_limit_is_retried_after_pause():
+    """A secondary rate limit 403 pauses requests and asks for a retry."""
+    limiter = RateLimiter()
+    delay = limiter.observe("GET", 403, {"Retry-After": "2"}, "secondary rate limit", attempt=0)
+
+    assert delay == 0.0
+    assert limiter._paused_until >= time.time() + 1.5
+    assert limiter._points.rate < limiter.max_rate
+
+def test_permission_denied_is_not_retried():
+    """A 403 that is not about rate limits is returned to the caller."""
+    limiter = RateLimiter()
+    assert limiter.observe("GET", 403, {}, '{"message": "Must have admin rights"}', attempt=0) is None
+
+def test_server_errors_are_retried_except_for_post():
+    """5xx responses are retried unless the request could create something twice."""
+    limiter = RateLimiter()
+    assert limiter.observe("GET", 502, {}, "", attempt=0) is not None
+    assert limiter.observe("POST", 502, {}, "", attempt=0) is None
+    assert limiter.observe("GET", 502, {}, "", attempt=limiter.max_retries) is None
+
+def test_writes_without_a_response_are_retried_only_when_unsent():
+    """A write that timed out may have been applied, so only reads and requests that never connected are retried."""
+    limiter = RateLimiter()
+    assert limiter.retry_after_error("GET", 0) is not None
+    assert limiter.retry_after_error("PATCH", 0) is None
+    assert limiter.retry_after_error("DELETE", 0) is None
+    assert limiter.retry_after_error("DELETE", 0, sent=False) is not None
+    assert limiter.retry_after_error("GET", limiter.max_retries) is None
+
+def test_low_primary_quota_spreads_requests_until_reset():
+    """Requests are paced to the remaining quota once it runs low."""
+    limiter = RateLimiter()
+    headers = {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": "100",
+        "X-RateLimit-Reset": str(int(time.time()) + 1000),
+    }
+    limiter.observe("GET", 200, headers, "", attempt=0)
+
+    assert limiter.remaining == 100
+    assert 0.09 < limiter._requests.rate < 0.11
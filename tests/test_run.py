@@ -0,0 +1,110 @@
+"""Tests for running actions across organizations through the CLI."""
+import hashlib
+from argparse import Namespace
+from ghrm.runner import Run
+
+def config_file(tmp_path, text):
+    config = tmp_path / "repositories.yaml"
+    config.write_text(text)
+    return str(config)
+
+def results(completed):
+    return sorted(
+        (record["org"], record["name"], record["result"]) for record in completed.records if record["type"] == "result"
+    )
+
+def test_org_flag_is_rejected_where_it_does_not_apply(github, ghrm_process, tmp_path):
+    """--org never silently sends a config's entries to GITHUB_ORG instead."""
+    state, _ = github
+    state.add_repo("x", {}, "acme")
+    state.add_repo("x", {}, "beta")
+    config = config_file(tmp_path, "repositories:\n  - x\n")
+
+    completed = ghrm_process("delete", "--config", config, "--org", "beta")
+
+    assert completed.returncode == 2
+    assert "--org only applies to" in completed.stderr
+    assert "x" in state.repos["acme"] and "x" in state.repos["beta"]
+
+def test_entries_fan_out_to_their_organizations(github, ghrm_process, tmp_path):
+    """Each organization runs on its own; one that cannot be opened fails only its own entries."""
+    state, _ = github
+    entries = "".join(
+        f"  {org}/repo-{index}: {{description: Service}}\n" for org in ("acme", "beta", "gamma") for index in range(3)
+    )
+    config = config_file(tmp_path, "repositories:\n" + entries)
+
+    completed = ghrm_process("create", "--config", config, "--workers", "2")
+
+    assert results(completed) == [
+        (org, f"repo-{index}", "created") for org in ("acme", "beta") for index in range(3)
+    ] + [("gamma", f"repo-{index}", "failed") for index in range(3)]
+    assert sorted(state.repos["acme"]) == sorted(state.repos["beta"]) == ["repo-0", "repo-1", "repo-2"]
+    assert completed.returncode == 1
+    summary = completed.records[-1]
+    assert (summary["failed"], summary["error"]) == (3, None)
+
+def test_a_clean_run_exits_zero(github, ghrm_process, tmp_path):
+    """Only a run where every repository succeeded exits 0."""
+    config = config_file(tmp_path, "repositories:\n  api: {description: API}\n")
+
+    completed = ghrm_process("create", "--config", config)
+
+    assert completed.returncode == 0
+    assert completed.records[-1]["failed"] == 0
+
+def test_an_organization_thread_error_ends_the_run(github, ghrm_process, tmp_path):
+    """An error that ends an organization's thread is reported and fails the run."""
+    _, url = github
+    # A directory in place of beta's journal makes opening it fail once the organization is connected
+    digest = hashlib.sha256(f"{url}\nbeta\nrepositories".encode()).hexdigest()
+    (tmp_path / "cache" / "journal" / f"{digest}.jsonl").mkdir(parents=True)
+    config = config_file(tmp_path, "repositories:\n  acme/api: {description: API}\n  beta/web: {description: Web}\n")
+
+    completed = ghrm_process("create", "--config", config)
+
+    assert completed.returncode == 1
+    summary = completed.records[-1]
+    assert summary["type"] == "summary"
+    assert "Run for organization beta failed" in summary["error"]
+
+class FakeProgress:
+    def __init__(self):
+        self.skipped = []
+
+    def skip(self, outcome):
+        self.skipped.append(outcome)
+
+def test_run_takes_its_connection_explicitly():
+    """A Run opens organizations through the connect it is given, and fails the entries of one it cannot open."""
+    opened = []
+
+    def connect(org_name):
+        opened.append(org_name)
+        raise ConnectionError(f"cannot open {org_name}")
+
+    args = Namespace(
+        action="delete", workers=1, repos=None, config="repositories.yaml", resume=False, incremental=False
+    )
+    progress = FakeProgress()
+    run = Run(args, progress, lambda *_: None, connect=connect, default_org="acme")
+
+    run.fan_out([("beta", ("x", {}, None, "hash")), ("beta", ("y", {}, None, "hash"))])
+
+    assert opened == ["beta"]
+    assert [(result.name, str(result.error)) for result in run.results] == [
+        ("beta/x", "cannot open beta"), ("beta/y", "cannot open beta")
+    ]
+    assert progress.skipped == ["failed", "failed"]
+
+def test_a_validated_organization_keeps_its_login(github, ghrm_process, tmp_path):
+    """Within GHRM_AUTH_CACHE_TTL, an organization named in another case is opened under its login, unrequested."""
+    state, _ = github
+    config = config_file(tmp_path, "repositories:\n  BETA/api: {description: API}\n")
+
+    assert results(ghrm_process("create", "--config", config, "--incremental")) == [("BETA", "api", "created")]
+    fetched = state.stats.get("GET /orgs/BETA", 0)
+
+    # The journal is kept under the organization's login, so it is found again
+    assert results(ghrm_process("create", "--config", config, "--incremental")) == [("BETA", "api", "journaled")]
+    assert state.stats.get("GET /orgs/BETA", 0) == fetched
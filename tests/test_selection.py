@@ -0,0 +1,78 @@
+"""Tests for selector-based repository targeting."""
+import pytest
+from ghrm.selection import selector_from_args, selector_from_config
+
+@pytest.fixture
+def repos(make_repo):
+    return [
+        make_repo("svc-billing", topics=["backend", "payments"]),
+        make_repo("svc-search", topics=["backend"], visibility="internal"),
+        make_repo("svc-legacy", topics=["backend"], archived=True),
+        make_repo("web-app", private=False, visibility="public", topics=["frontend"]),
+    ]
+
+def names(repos):
+    return [repo.name for repo in repos]
+
+def test_selector_matches_globs_and_regexes(repos):
+    """Names match case-insensitive globs or searched regular expressions."""
+    assert names(selector_from_config({"name": "SVC-*"}).select(repos)) == ["svc-billing", "svc-search"]
+    assert names(selector_from_config({"regex": "app$"}).select(repos)) == ["web-app"]
+    assert names(selector_from_config({"name": ["web-*", "svc-s*"]}).select(repos)) == ["svc-search", "web-app"]
+
+def test_selector_matches_topics_visibility_and_archived(repos):
+    """Every topic given must be present; archived repositories are opted into."""
+    assert names(selector_from_config({"topics": ["backend", "payments"]}).select(repos)) == ["svc-billing"]
+    assert names(selector_from_config({"topics": "backend", "visibility": "internal"}).select(repos)) == ["svc-search"]
+    assert names(selector_from_config({"topics": "backend", "archived": True}).select(repos)) == ["svc-legacy"]
+
+def test_selector_rejects_unknown_keys():
+    """Typos in a selector fail loudly instead of matching everything."""
+    with pytest.raises(ValueError):
+        selector_from_config({"nmae": "svc-*"})
+    with pytest.raises(ValueError):
+        selector_from_config({"visibility": "secret"})
+
+def test_selector_from_args(repos):
+    """--select expressions combine, and only filter by archived state when asked."""
+    selector = selector_from_args(["name=svc-*", "topic=backend"])
+    assert names(selector.select(repos)) == ["svc-billing", "svc-legacy", "svc-search"]
+    assert not selector_from_args(["name=svc-*"]).needs_repository
+    assert selector_from_args(None) is None
+    with pytest.raises(ValueError):
+        selector_from_args(["name"])
+
+def test_named_entries_take_precedence_over_selectors(github, ghrm, tmp_path):
+    """A repository named after a selector that matches it keeps its own settings and is processed once."""
+    state, _ = github
+    for repo_name in ("svc-a", "svc-b"):
+        state.add_repo(repo_name, {"description": "old"}, "acme")
+    config = tmp_path / "repositories.yaml"
+    config.write_text(
+        "selectors:\n"
+        "  - match: {name: svc-*}\n"
+        "    description: Selected\n"
+        "repositories:\n"
+        "  svc-a:\n"
+        "    description: Named\n"
+    )
+
+    assert sorted(ghrm("create", "--config", str(config))) == [("svc-a", "updated"), ("svc-b", "updated")]
+    assert state.repos["acme"]["svc-a"]["attrs"]["description"] == "Named"
+    assert state.repos["acme"]["svc-b"]["attrs"]["description"] == "Selected"
+
+def test_selectors_only_change_the_settings_they_list(github, ghrm, tmp_path):
+    """Matched repositories keep their description and visibility; only the selector's settings apply."""
+    state, _ = github
+    for repo_name in ("svc-a", "svc-b"):
+        state.add_repo(repo_name, {"description": "Service", "private": False, "visibility": "public"}, "acme")
+    config = tmp_path / "repositories.yaml"
+    config.write_text("selectors:\n  - match: {name: svc-*}\n    has_wiki: false\n")
+
+    assert sorted(ghrm("audit", "--config", str(config))) == [("svc-a", "drifted"), ("svc-b", "drifted")]
+    assert sorted(ghrm("create", "--config", str(config))) == [("svc-a", "updated"), ("svc-b", "updated")]
+    for repo_name in ("svc-a", "svc-b"):
+        assert state.repos["acme"][repo_name]["attrs"] == {
+            "description": "Service", "private": False, "visibility": "public", "has_wiki": False
+        }
+    assert sorted(ghrm("audit", "--config", str(config))) == [("svc-a", "in-sync"), ("svc-b", "in-sync")]
@@ -0,0 +1,68 @@
+"""Tests for the SQLite organization snapshot."""
+import pytest
+from ghrm.snapshot import Snapshot
+
+@pytest.fixture
+def org(make_repo, make_org):
+    """Three repositories, last updated and pushed at the start of 2024."""
+    return make_org([make_repo(f"repo-{i}") for i in range(3)])
+
+def test_snapshot_refreshes_incrementally(tmp_path, org, make_repo, make_inventory):
+    """Later refreshes only read and store repositories changed since the snapshot."""
+    inventory = make_inventory(org)
+    with Snapshot(str(tmp_path / "org.sqlite")) as snapshot:
+        assert snapshot.refresh(org, inventory) == ("full", 3, 0, 0)
+
+        org.repos[1] = make_repo("repo-1", updated_at="2024-02-01T00:00:00Z", description="changed")
+        assert snapshot.refresh(org, inventory) == ("incremental", 1, 0, 0)
+        assert inventory.loads == 1
+        assert snapshot.inventory("ACME").get("repo-1")[1].description == "changed"
+
+def test_snapshot_falls_back_to_full_refresh_on_deletion(tmp_path, org, make_inventory):
+    """A repository count that no longer matches means repositories went away."""
+    inventory = make_inventory(org)
+    with Snapshot(str(tmp_path / "org.sqlite")) as snapshot:
+        snapshot.refresh(org, inventory)
+        del org.repos[0]
+        assert snapshot.refresh(org, inventory) == ("full", 2, 1, 0)
+        assert snapshot.inventory("acme").get("repo-0") == (True, None)
+
+def test_snapshot_sees_deletions_behind_new_repositories(tmp_path, org, make_repo, make_inventory):
+    """A repository created in the same window does not hide a deletion; a rename replaces its row."""
+    inventory = make_inventory(org)
+    with Snapshot(str(tmp_path / "org.sqlite")) as snapshot:
+        snapshot.refresh(org, inventory)
+        org.repos[0] = make_repo("repo-3", updated_at="2024-02-01T00:00:00Z")
+        assert snapshot.refresh(org, inventory) == ("full", 3, 1, 0)
+
+        org.repos[1] = make_repo("renamed-1", id=org.repos[1].id, updated_at="2024-03-01T00:00:00Z")
+        assert snapshot.refresh(org, inventory) == ("incremental", 1, 0, 1)
+        assert [repo.name for repo in snapshot.repositories("acme")] == ["renamed-1", "repo-2", "repo-3"]
+
+def test_snapshot_tells_renames_from_removals(tmp_path, org, make_repo, make_inventory):
+    """A full refresh counts a repository listed with a known id under a new name as renamed, not removed."""
+    inventory = make_inventory(org)
+    with Snapshot(str(tmp_path / "org.sqlite")) as snapshot:
+        snapshot.refresh(org, inventory)
+        org.repos[1] = make_repo("renamed-1", id=org.repos[1].id)
+        del org.repos[0]
+        inventory = make_inventory(org)
+        assert snapshot.refresh(org, inventory, full=True) == ("full", 2, 1, 1)
+
+def test_snapshot_lists_in_full_without_a_repository_count(tmp_path, org, make_inventory):
+    """When the token cannot see the private repository count, every refresh is a full one."""
+    org.count_visible = False
+    inventory = make_inventory(org)
+    with Snapshot(str(tmp_path / "org.sqlite")) as snapshot:
+        snapshot.refresh(org, inventory)
+        del org.repos[0]
+        assert snapshot.refresh(org, inventory) == ("full", 2, 1, 0)
+        assert org.pages == []
+
+def test_snapshot_repositories_lack_unlisted_attributes(tmp_path, org, make_inventory):
+    """Settings the listing did not include are missing, not None."""
+    with Snapshot(str(tmp_path / "org.sqlite")) as snapshot:
+        snapshot.refresh(org, make_inventory(org))
+        repo = snapshot.inventory("acme").get("repo-0")[1]
+    assert repo.private is True
+    assert not hasattr(repo, "allow_squash_merge")
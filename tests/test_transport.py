@@ -0,0 +1,68 @@
+"""Tests for the shared HTTP transport."""
+import pytest
+import requests
+from ghrm.ratelimit import RateLimiter
+from ghrm import transport
+
+def test_hosts_share_one_session():
+    """Every request to a host, webhooks included, reuses one pooled session accepting compressed responses."""
+    slack = transport.session_for("https://hooks.slack.com/services/T0/B0/a")
+    assert transport.session_for("https://hooks.slack.com/services/T0/B0/b") is slack
+    assert transport.session_for("https://discord.com/api/webhooks/1/a") is not slack
+    assert "gzip" in slack.headers["Accept-Encoding"]
+
+def test_resizing_pools_closes_the_old_ones():
+    """Remounting for more workers releases the sockets of the pools it replaces."""
+    session = transport.session_for("https://pool.example.com/")
+    old = session.get_adapter("https://pool.example.com/")
+    old.poolmanager.connection_from_url("https://pool.example.com/")
+    assert len(old.poolmanager.pools) == 1
+    transport.set_pool_size(64)
+    assert session.get_adapter("https://pool.example.com/") is not old
+    assert len(old.poolmanager.pools) == 0
+
+def test_timeout_from_env(monkeypatch):
+    """GHRM_HTTP_TIMEOUT sets the read timeout; connecting never gets more than 5 seconds."""
+    monkeypatch.delenv("GHRM_HTTP_TIMEOUT", raising=False)
+    assert transport.timeout_from_env() == (5.0, 30.0)
+    monkeypatch.setenv("GHRM_HTTP_TIMEOUT", "2")
+    assert transport.timeout_from_env() == (2.0, 2.0)
+    monkeypatch.setenv("GHRM_HTTP_TIMEOUT", "soon")
+    with pytest.raises(EnvironmentError):
+        transport.timeout_from_env()
+
+def test_connections_keep_the_client_timeout(monkeypatch):
+    """A client's timeout is the read timeout, unless GHRM_HTTP_TIMEOUT is set."""
+    monkeypatch.delenv("GHRM_HTTP_TIMEOUT", raising=False)
+    monkeypatch.setattr(transport, "_timeout", None)
+    assert transport.HTTPSConnection("api.example.com", timeout=15, pool_size=None).timeout == (5.0, 15)
+    assert transport.HTTPSConnection("api.example.com").timeout == (5.0, 30.0)
+    monkeypatch.setenv("GHRM_HTTP_TIMEOUT", "2")
+    monkeypatch.setattr(transport, "_timeout", None)
+    assert transport.HTTPSConnection("api.example.com", timeout=15).timeout == (2.0, 2.0)
+
+class TimingOutSession:
+    def __init__(self, error):
+        self.error = error
+        self.calls = []
+
+    def request(self, verb, url, **_):
+        self.calls.append(verb)
+        raise self.error
+
+def test_timed_out_writes_are_not_sent_again(monkeypatch):
+    """A PATCH that timed out is not repeated; a GET is, and so is a write that never connected."""
+    monkeypatch.setattr(transport.time, "sleep", lambda _: None)
+    limiter = RateLimiter(max_retries=2)
+
+    def send(verb, error):
+        connection = transport.HTTPSConnection("api.example.com")
+        connection.session = TimingOutSession(error)
+        with pytest.raises(type(error)):
+            connection._send(verb, "https://api.example.com/repos/acme/x", None, {}, False, None)
+        return len(connection.session.calls)
+
+    monkeypatch.setattr(transport, "_rate_limiter", limiter)
+    assert send("PATCH", requests.exceptions.ReadTimeout()) == 1
+    assert send("GET", requests.exceptions.ReadTimeout()) == 3
+    assert send("DELETE", requests.exceptions.ConnectTimeout()) == 3